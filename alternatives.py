@@ -0,0 +1,120 @@
+# alternatives.py
+# k-shortest loopless paths (Yen's algorithm) over a RouteGraph, for showing
+# alternative routes side by side (e.g. when a pass is closed).
+#
+# Each spur search first tries the cached fastest-path tree rooted at the target:
+# if the tree path from the spur node avoids every removed node and edge it is
+# the answer and no search runs at all. Otherwise an A* search runs with the
+# tree's exact distances as the heuristic, so it expands very few nodes.
+
+import heapq
+
+from tracing import traced
+
+
+def _spur_path(route_graph, spur, target, removed_nodes, removed_edges):
+    """Fastest spur -> target path avoiding removed nodes/edges: (path, seconds) or (None, None).
+    Relies on symmetric drive times: the tree rooted at target gives distances *to* target.
+    """
+    to_target, next_hop = route_graph.dijkstra(target)
+    if to_target[spur] == float('inf'):
+        return None, None
+
+    # Fast path: follow the cached tree towards the target
+    path = [spur]
+    node = spur
+    while node != target:
+        nxt = next_hop[node]
+        if nxt in removed_nodes or (node, nxt) in removed_edges:
+            break
+        path.append(nxt)
+        node = nxt
+    else:
+        return path, to_target[spur]
+
+    # A* with the unrestricted distances as an exact lower bound
+    best = {spur: 0}
+    parent = {spur: None}
+    heap = [(to_target[spur], 0, spur)]
+    while heap:
+        _, g, u = heapq.heappop(heap)
+        if g > best[u]:
+            continue
+        if u == target:
+            path = [u]
+            while parent[u] is not None:
+                u = parent[u]
+                path.append(u)
+            path.reverse()
+            return path, g
+        for v, w in zip(route_graph.neighbors(u), route_graph.neighbor_weights(u)):
+            if v in removed_nodes or (u, v) in removed_edges or to_target[v] == float('inf'):
+                continue
+            ng = g + w
+            if ng < best.get(v, float('inf')):
+                best[v] = ng
+                parent[v] = u
+                heapq.heappush(heap, (ng + to_target[v], ng, v))
+    return None, None
+
+
+def k_shortest_paths(route_graph, source, target, k):
+    """Up to k loopless source -> target paths in increasing drive time.
+    Returns a list of (path_ids, seconds).
+    """
+    # The first path is read off the target's tree too, so every search in
+    # this call shares one cached tree
+    first, first_time = route_graph.shortest_path(target, source)
+    if first is None or k < 1:
+        return []
+    first.reverse()
+
+    found = [(first, first_time)]
+    candidates = []
+    seen = {tuple(first)}
+
+    while len(found) < k:
+        prev_path = found[-1][0]
+        root_time = 0
+        for i in range(len(prev_path) - 1):
+            spur = prev_path[i]
+            root = prev_path[:i + 1]
+
+            # Block the next edge of every accepted path sharing this root, and
+            # the root itself so spur paths stay loopless
+            removed_edges = {(path[i], path[i + 1]) for path, _ in found
+                             if len(path) > i + 1 and path[:i + 1] == root}
+            removed_nodes = set(root[:-1])
+
+            spur_path, spur_time = _spur_path(route_graph, spur, target, removed_nodes, removed_edges)
+            if spur_path is not None:
+                total_path = root[:-1] + spur_path
+                key = tuple(total_path)
+                if key not in seen:
+                    seen.add(key)
+                    heapq.heappush(candidates, (root_time + spur_time, key))
+
+            root_time += route_graph.edge_weight(prev_path[i], prev_path[i + 1])
+
+        if not candidates:
+            break
+        seconds, path = heapq.heappop(candidates)
+        found.append((list(path), seconds))
+
+    return found
+
+
+@traced("alternatives")
+def alternative_routes(route_graph, start, end, k=5):
+    """Top-k routes between two named nodes, fastest first.
+    Returns a list of dicts with 'route' (names), 'time' (seconds) and 'delta'
+    (seconds slower than the fastest route).
+    """
+    if start not in route_graph or end not in route_graph:
+        return []
+    paths = k_shortest_paths(route_graph, route_graph.id_of(start), route_graph.id_of(end), k)
+    if not paths:
+        return []
+    fastest = paths[0][1]
+    return [{'route': route_graph.names_of(path), 'time': int(seconds), 'delta': int(seconds - fastest)}
+            for path, seconds in paths]
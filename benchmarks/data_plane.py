@@ -0,0 +1,116 @@
+# data_plane.py
+# Memory footprint of N worker processes holding the derived planner data
+# (city routing graph, county border geometry and point-in-polygon index),
+# either built privately in every worker or attached from the published data
+# plane. Reports each mode's unique (USS) and proportional (PSS) memory the
+# loading added, summed over the workers: with the data plane the shared pages
+# are counted once however many workers attach, so the border geometry adds
+# little per extra worker. The city graph still grows with the worker count:
+# each RouteGraph keeps private per-node neighbor lists built from the mapped
+# CSR.
+#
+# Usage:
+#   python benchmarks/data_plane.py                       # 1, 2, 4 and 8 workers
+#   python benchmarks/data_plane.py --workers 1 16 --borders wa_counties.geojson
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def _memory_kb():
+    """(USS, PSS) of this process in kB from /proc/self/smaps_rollup."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Private_Clean"] + fields["Private_Dirty"], fields["Pss"]
+
+
+def _worker(mode, borders, ready, release, results):
+    import county_polygons
+    import route_graph
+    from route_maps import create_simple_county_borders
+
+    before = _memory_kb()
+    if mode == "private":
+        geojson = county_polygons.read_county_borders(borders) if borders else create_simple_county_borders()
+        county_polygons.install_county_borders(geojson)
+        graph = route_graph.get_city_route_graph()
+    else:
+        import data_plane
+
+        plane = data_plane.attach_current()
+        graph = plane.city_graph
+    # Touch the data as a query would, so mapped pages are resident
+    index = county_polygons.get_county_polygon_index()
+    for lat, lon in index.centroids.values():
+        index.county_at(lat, lon)
+    graph.distance_rows([0])
+    ready.release()
+    # Measure once every worker is loaded, so PSS splits the shared pages
+    release.acquire()
+    after = _memory_kb()
+    results.put((after[0] - before[0], after[1] - before[1]))
+
+
+def run_level(mode, workers, borders):
+    """Start `workers` processes loading in `mode`; returns (USS kB, PSS kB)
+    added by loading, summed over the workers.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    ready, release, results = ctx.Semaphore(0), ctx.Semaphore(0), ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(mode, borders, ready, release, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+    for _ in processes:
+        release.release()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(uss for uss, _ in samples), sum(pss for _, pss in samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker memory with and without the shared data plane.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--borders", help="county borders GeoJSON (default: the simplified borders)")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    import county_polygons
+    import data_plane
+    from route_maps import create_simple_county_borders
+
+    geojson = (county_polygons.read_county_borders(args.borders) if args.borders
+               else create_simple_county_borders())
+    path = data_plane.publish(polygon_index=county_polygons.CountyPolygonIndex.from_geojson(geojson))
+    print(f"Data plane: {path}")
+
+    levels = []
+    print(f"{'workers':>7} {'private USS':>12} {'private PSS':>12} {'plane USS':>10} {'plane PSS':>10}  (kB)")
+    for workers in args.workers:
+        private = run_level("private", workers, args.borders)
+        plane = run_level("plane", workers, args.borders)
+        levels.append({"workers": workers, "private_uss_kb": private[0], "private_pss_kb": private[1],
+                       "plane_uss_kb": plane[0], "plane_pss_kb": plane[1]})
+        print(f"{workers:>7} {private[0]:>12} {private[1]:>12} {plane[0]:>10} {plane[1]:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"plane": path, "levels": levels}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
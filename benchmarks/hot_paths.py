@@ -0,0 +1,209 @@
+# hot_paths.py
+# Micro-benchmarks for the routing and drive-time hot paths: county BFS,
+# must-visit routing (ordered, optimized and anytime, 0-10 stops), Pareto
+# trade-off routes, detours, fastest pass-through cities, city drive times,
+# highway summaries and map construction. Results are written as JSON and compared against a saved
+# baseline; anything whose best run is slower than the baseline's by more than
+# --threshold is flagged as a regression (exit status 1).
+#
+# Usage:
+#   python benchmarks/hot_paths.py --save-baseline    # record a baseline
+#   python benchmarks/hot_paths.py                    # compare against it
+#   python benchmarks/hot_paths.py -k optimal --json hot_paths.json
+#
+# Baselines are machine specific; record one on the machine you compare on.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "hot_paths_baseline.json")
+
+# Route used throughout: across the state, so every leg does real work
+START, END = "Clallam", "Asotin"
+MUST_VISIT = ["King", "Chelan", "Spokane", "Yakima", "Whatcom",
+              "Clark", "Grant", "Okanogan", "Benton", "Thurston"]
+
+
+def build_benchmarks():
+    """Benchmarks as (name, zero-argument callable) pairs, in report order."""
+    from pareto_routes import pareto_routes
+    from route_graph import get_route_graph
+    from route_maps import create_simple_county_borders, plot_map, show_interactive_map, _pyplot
+    from route_planner import (bfs_path, calculate_route_with_fastest_cities, find_best_city_detour,
+                               find_optimal_route, find_ordered_route, get_route_highways,
+                               iter_optimal_routes)
+    from wa_counties import (county_coords, get_cities_by_county, get_city_drive_time,
+                             intra_county_drive_times, wa_county_graph, wa_highway_connections)
+
+    graph = wa_county_graph
+    route = bfs_path(graph, START, END)
+    cities_by_county = get_cities_by_county()
+    route_cities = {START: "Forks", END: "Clarkston"}
+    geojson = create_simple_county_borders()
+    # A city pair in the explicit intra-county table, and one that falls back
+    # to the coordinate estimate
+    hit_pair = next(iter(intra_county_drive_times))
+    miss_pair = ("Forks", "Pullman")
+
+    benchmarks = [("bfs_path", lambda: bfs_path(graph, START, END))]
+    for k in range(len(MUST_VISIT) + 1):
+        stops = MUST_VISIT[:k]
+        benchmarks.append((f"find_optimal_route/ordered/{k}",
+                           lambda stops=stops: find_ordered_route(graph, START, END, stops)))
+    for k in range(len(MUST_VISIT) + 1):
+        stops = MUST_VISIT[:k]
+        benchmarks.append((f"find_optimal_route/optimized/{k}",
+                           lambda stops=stops: find_optimal_route(graph, START, END, stops)))
+
+    # Anytime optimizer over all stops: time to the first usable route and to
+    # the proven optimum
+    benchmarks += [
+        ("iter_optimal_routes/first",
+         lambda: next(iter_optimal_routes(graph, START, END, MUST_VISIT))),
+        ("iter_optimal_routes/optimal",
+         lambda: list(iter_optimal_routes(graph, START, END, MUST_VISIT))),
+    ]
+    for factor in (1.5, 2.0):
+        benchmarks.append((f"pareto_routes/{factor}",
+                           lambda factor=factor: pareto_routes(get_route_graph(graph), START, END, factor)))
+
+    def plot():
+        _pyplot().close(plot_map(graph, county_coords, route=route, geojson=geojson, route_cities=route_cities))
+
+    benchmarks += [
+        ("find_best_city_detour", lambda: find_best_city_detour(graph, route, "Leavenworth")),
+        ("calculate_route_with_fastest_cities",
+         lambda: calculate_route_with_fastest_cities(route, route_cities, cities_by_county)),
+        ("get_city_drive_time/hit", lambda: get_city_drive_time(*hit_pair, use_apis=False)),
+        ("get_city_drive_time/miss", lambda: get_city_drive_time(*miss_pair, use_apis=False)),
+        ("get_route_highways", lambda: get_route_highways(route, wa_highway_connections)),
+        ("plot_map", plot),
+        ("show_interactive_map",
+         lambda: show_interactive_map(graph, county_coords, route=route, geojson=geojson,
+                                      route_cities=route_cities)),
+    ]
+    return benchmarks
+
+
+def time_call(fn, repeats=5, min_time=0.02):
+    """Per-call time of fn in microseconds: one warm-up call, then `repeats`
+    runs of as many loops as take at least min_time seconds.
+    """
+    fn()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed < min_time / 4 else 4
+    runs = [elapsed / loops]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - started) / loops)
+    return {
+        "median_us": round(statistics.median(runs) * 1e6, 3),
+        "min_us": round(min(runs) * 1e6, 3),
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Status per benchmark against `baseline` results: 'REGRESSION' if the
+    best run is more than `threshold` (a fraction) slower, 'faster' if more
+    than that faster, 'ok' otherwise and 'new' if the baseline lacks it. The
+    best run is compared because it is the least disturbed by other load.
+    Returns {name: (status, ratio or None)}.
+    """
+    statuses = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            statuses[name] = ("new", None)
+            continue
+        ratio = result["min_us"] / max(base["min_us"], 1e-9)
+        if ratio > 1.0 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1.0 / (1.0 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        statuses[name] = (status, ratio)
+    return statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the routing and drive-time hot paths.")
+    parser.add_argument("-k", dest="filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.02, help="seconds per timed run")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown (fraction of the baseline best run) flagged as a regression")
+    parser.add_argument("--no-fail", action="store_true", help="report only, never fail")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    results = {}
+    for name, fn in build_benchmarks():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = time_call(fn, repeats=args.repeats, min_time=args.min_time)
+
+    statuses = compare(results, baseline, args.threshold) if baseline else {}
+    width = max((len(name) for name in results), default=0)
+    for name, result in results.items():
+        line = f"{name:<{width}}  {result['median_us']:12.2f} us median {result['min_us']:12.2f} us best"
+        if name in statuses:
+            status, ratio = statuses[name]
+            line += f"  {status}" if ratio is None else f"  x{ratio:.2f} {status}"
+            results[name]["baseline_ratio"] = None if ratio is None else round(ratio, 3)
+            results[name]["status"] = status
+        print(line)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "threshold": args.threshold,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    regressions = [name for name, (status, _) in statuses.items() if status == "REGRESSION"]
+    if regressions and not args.no_fail:
+        print(f"Regressions against the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
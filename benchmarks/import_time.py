@@ -0,0 +1,122 @@
+# import_time.py
+# Import-time benchmark: runs `python -X importtime` in fresh interpreters and
+# reports a per-module breakdown, failing if a module blows its startup budget.
+#
+# Usage:
+#   python benchmarks/import_time.py                 # all modules, default budgets
+#   python benchmarks/import_time.py wa_counties --top 15
+#   python benchmarks/import_time.py --json import_times.json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budgets in milliseconds (cumulative import time of the module,
+# median over several fresh interpreters). Worker processes pay this on spawn.
+IMPORT_BUDGETS_MS = {
+    "wa_counties": 50,
+    "wa_artifact": 150,
+    "route_graph": 150,
+    "time_matrix": 150,
+}
+
+
+def measure_import(module, repeats=5):
+    """Import `module` in `repeats` fresh interpreters with -X importtime.
+    Returns {"total_us": [...], "modules": {name: (self_us, cumulative_us)}} where
+    the per-module numbers are medians across runs.
+    """
+    totals = []
+    per_module = {}
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{proc.stderr}")
+
+        total = None
+        subtree = []
+        for line in proc.stderr.splitlines():
+            # Format: "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            name = name.rstrip()
+            stripped = name.strip()
+            subtree.append((stripped, int(self_us), int(cumulative_us)))
+            # Children are printed before their parent; a top-level entry (one
+            # space of indentation) closes the subtree. Interpreter startup
+            # imports (site, encodings, ...) are dropped this way.
+            if name == " " + stripped:
+                if stripped == module:
+                    total = int(cumulative_us)
+                    for entry, s, c in subtree:
+                        per_module.setdefault(entry, []).append((s, c))
+                subtree = []
+        if total is None:
+            raise RuntimeError(f"no importtime entry for {module}")
+        totals.append(total)
+
+    modules = {}
+    for name, samples in per_module.items():
+        modules[name] = (int(statistics.median(s for s, _ in samples)),
+                         int(statistics.median(c for _, c in samples)))
+    return {"total_us": totals, "modules": modules}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure module import (cold start) time.")
+    parser.add_argument("modules", nargs="*", help="modules to measure (default: all budgeted)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest sub-imports to show")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--no-budget", action="store_true", help="report only, never fail")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or sorted(IMPORT_BUDGETS_MS)
+    results = {}
+    over_budget = []
+
+    for module in modules:
+        result = measure_import(module, repeats=args.repeats)
+        median_ms = statistics.median(result["total_us"]) / 1000.0
+        budget = IMPORT_BUDGETS_MS.get(module)
+        results[module] = {
+            "median_ms": round(median_ms, 2),
+            "runs_ms": [round(t / 1000.0, 2) for t in result["total_us"]],
+            "budget_ms": budget,
+            "modules": {name: {"self_us": s, "cumulative_us": c}
+                        for name, (s, c) in result["modules"].items()},
+        }
+
+        status = ""
+        if budget is not None:
+            status = "OK" if median_ms <= budget else "OVER BUDGET"
+            if median_ms > budget:
+                over_budget.append(module)
+        budget_str = f" (budget {budget} ms) {status}" if budget is not None else ""
+        print(f"{module}: {median_ms:.1f} ms{budget_str}")
+
+        slowest = sorted(result["modules"].items(), key=lambda kv: kv[1][0], reverse=True)
+        for name, (self_us, cumulative_us) in slowest[:args.top]:
+            print(f"    {self_us / 1000.0:8.2f} ms self {cumulative_us / 1000.0:8.2f} ms cumulative  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if over_budget and not args.no_budget:
+        print(f"Import time budget exceeded: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
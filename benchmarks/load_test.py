@@ -0,0 +1,238 @@
+# load_test.py
+# End-to-end load test: N simulated users drive the Streamlit app at the same
+# time through streamlit.testing's AppTest, each repeating a realistic flow
+# (search and pick start and end, add must-visits, find the route, toggle
+# optimize, flip map settings). Every interaction is a full script rerun, as in
+# the real server, and its latency is recorded. As in the server, every
+# session's script runs in its own thread of one process, so sessions contend
+# for the same GIL and share the module-level caches. (AppTest gives every
+# session the same session ID, so the job pool and the memory accounting see
+# them as one user.)
+#
+# Reports p50/p95/p99 rerun latency, throughput and the process's peak memory
+# (and its growth per session over the memory before the level started; the
+# first level's includes loading the app) for each session count, and the
+# capacity: the largest count whose p95 meets --slo-ms.
+#
+# Usage:
+#   python benchmarks/load_test.py                        # 1, 2, 4 and 8 sessions
+#   python benchmarks/load_test.py --sessions 1 16 --flows 3 --json load.json
+
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+APP_PATH = os.path.join(REPO_ROOT, "roadtripplannerwa.py")
+
+# Searches typed into the pickers; each flow picks a random start, end and stops
+PLACES = ["forks", "pullman", "seattle", "spokane", "wenatchee", "yakima", "bellingham",
+          "walla walla", "vancouver", "olympia", "ellensburg", "moses lake", "port angeles"]
+
+
+def percentile(samples, q):
+    """q-th percentile (0-100) of samples, linearly interpolated."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _rss_mb():
+    """Resident set size of this process in MB (peak RSS if /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class MemorySampler:
+    """Samples RSS from a thread and keeps the peak seen since start()."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.peak_mb = _rss_mb()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _rss_mb())
+        return self.peak_mb
+
+
+def _by_label(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise KeyError(label)
+
+
+@contextlib.contextmanager
+def _shared_runtime():
+    """Let AppTest run from several threads at once, sharing what the sessions
+    of one server share. Each run installs a mock Runtime as the process-wide
+    instance and clears it when done, which would pull it from under the runs
+    still going in other threads; inside this block clearing is skipped. Runs
+    also share one script cache, as a server's sessions do, so the script is
+    compiled once, before any session starts (concurrent compiles can fail
+    on Python 3.11).
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    class KeepInstance(type):
+        def __setattr__(cls, name, value):
+            if name == "_instance":
+                if value is not None:
+                    Runtime._instance = value
+                return
+            super().__setattr__(name, value)
+
+    script_cache = ScriptCache()
+    script_cache.get_bytecode(APP_PATH)
+    app_test.Runtime = KeepInstance("Runtime", (Runtime,), {})
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        yield
+    finally:
+        app_test.Runtime = Runtime
+        app_test.ScriptCache = local_script_runner.ScriptCache = ScriptCache
+        Runtime._instance = None
+
+
+def run_session(session_id, flows, timeout):
+    """One simulated user: `flows` passes through the app's main flow.
+    Returns (latency in seconds of every rerun, seconds for the first load).
+    The first load is reported apart: the first session's includes the
+    process's cold start (imports, data loading).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_id)
+    latencies = []
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    def rerun(step):
+        started = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"session {session_id}, {step}: {at.exception[0].value}")
+
+    rerun("initial load")
+    first_load = latencies.pop()
+    for _ in range(flows):
+        start, end, *stops = rng.sample(PLACES, 4)
+        at.text_input(key="start_query").set_value(start)
+        rerun("search start")
+        at.text_input(key="end_query").set_value(end)
+        rerun("search end")
+        at.number_input(key="num_must_visit").set_value(len(stops))
+        rerun("add must-visits")
+        for i, stop in enumerate(stops):
+            at.text_input(key=f"must_visit_{i}_query").set_value(stop)
+            rerun("search must-visit")
+        _by_label(at.button, "Find Shortest Path").click()
+        rerun("find route")
+        _by_label(at.checkbox, "Optimize route for fastest travel time").check()
+        _by_label(at.button, "Find Shortest Path").click()
+        rerun("optimize route")
+        for label in ("Show county connections", "Show county labels"):
+            box = _by_label(at.sidebar.checkbox, label)
+            box.set_value(not box.value)
+            rerun("map settings")
+        _by_label(at.checkbox, "Optimize route for fastest travel time").uncheck()
+        at.number_input(key="num_must_visit").set_value(0)
+        rerun("reset")
+    return latencies, first_load
+
+
+def run_level(sessions, flows, timeout):
+    """Run `sessions` concurrent users as threads of this process; returns the
+    summary dict for the level.
+    """
+    rss_before = _rss_mb()
+    sampler = MemorySampler()
+    sampler.start()
+    started = time.perf_counter()
+    with _shared_runtime(), concurrent.futures.ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, i, flows, timeout) for i in range(sessions)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    peak = sampler.stop()
+    ms = [t * 1000.0 for latencies, _ in results for t in latencies]
+    first_loads = [first_load * 1000.0 for _, first_load in results]
+    return {
+        "sessions": sessions,
+        "reruns": len(ms),
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p95_ms": round(percentile(ms, 95), 1),
+        "p99_ms": round(percentile(ms, 99), 1),
+        "mean_ms": round(statistics.fmean(ms), 1),
+        "reruns_per_s": round(len(ms) / elapsed, 2),
+        "first_load_ms": round(statistics.median(first_loads), 1),
+        "peak_rss_mb": round(peak, 1),
+        "rss_growth_per_session_mb": round((peak - rss_before) / sessions, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent rerun-latency load test for the Streamlit app.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="concurrent session counts to test")
+    parser.add_argument("--flows", type=int, default=2, help="flows per session")
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p95 rerun latency target")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per rerun")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    levels = []
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'reruns/s':>9} {'1st load':>9} {'peak MB':>9} {'+MB/session':>11}")
+    for sessions in args.sessions:
+        level = run_level(sessions, args.flows, args.timeout)
+        levels.append(level)
+        print(f"{level['sessions']:>8} {level['reruns']:>7} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} "
+              f"{level['p99_ms']:>9.1f} {level['reruns_per_s']:>9.2f} {level['first_load_ms']:>9.1f} "
+              f"{level['peak_rss_mb']:>9.1f} {level['rss_growth_per_session_mb']:>11.1f}")
+
+    within_slo = [level['sessions'] for level in levels if level['p95_ms'] <= args.slo_ms]
+    capacity = max(within_slo) if within_slo else 0
+    print(f"Capacity: {capacity} concurrent sessions with p95 rerun latency <= {args.slo_ms:g} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"slo_ms": args.slo_ms, "flows": args.flows, "capacity": capacity,
+                       "levels": levels}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
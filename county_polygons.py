@@ -0,0 +1,216 @@
+# county_polygons.py
+# Point-in-polygon county lookup over the county border geometries (the GeoJSON
+# from load_county_borders). Which county a raw coordinate lies in is answered
+# from the actual borders instead of the nearest city's county, and county
+# centroids are computed from the geometry instead of the hand-entered
+# county_coords.
+#
+# The index is "prepared" once per border file: every feature's rings are
+# flattened into one array of edges, and a query first keeps the features
+# whose bounding box contains the point (one vectorized comparison over all
+# features), then runs an exact even-odd ray-casting test on their edges.
+# Even-odd over all rings of a feature handles holes and MultiPolygons alike.
+
+import json
+import os
+
+import numpy as np
+
+from memory_accounting import register_cache
+
+
+def feature_county(feature):
+    """County name of a GeoJSON feature ('name' or 'NAME' property), or None."""
+    props = feature.get('properties') or {}
+    name = props.get('name', props.get('NAME'))
+    if not name:
+        return None
+    name = str(name).strip()
+    if name.endswith(" County"):
+        name = name[:-len(" County")]
+    return name
+
+
+def _feature_rings(feature):
+    """Rings of a Polygon/MultiPolygon feature as (k, 2) lon/lat arrays,
+    exterior rings first within each polygon.
+    """
+    geom = feature.get('geometry') or {}
+    if geom.get('type') == "Polygon":
+        polygons = [geom.get('coordinates', [])]
+    elif geom.get('type') == "MultiPolygon":
+        polygons = geom.get('coordinates', [])
+    else:
+        polygons = []
+    rings = []
+    for polygon in polygons:
+        for i, ring in enumerate(polygon):
+            points = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+            if len(points) < 3:
+                continue
+            if not np.array_equal(points[0], points[-1]):
+                points = np.vstack([points, points[:1]])
+            rings.append((i == 0, points))
+    return rings
+
+
+class CountyPolygonIndex:
+    """Prepared county polygons for point-in-polygon queries.
+
+    names[i] is the county of GeoJSON feature i (None if unnamed), so a
+    picked feature index from the map resolves directly. centroids maps each
+    county to the area-weighted (lat, lon) centroid of its geometry.
+    """
+
+    def __init__(self, features):
+        self.names = [feature_county(feature) for feature in features]
+        n = len(self.names)
+        self.bbox = np.full((n, 4), np.nan)  # min_lon, min_lat, max_lon, max_lat
+        self._edges = [None] * n
+        self.centroids = {}
+        for i, feature in enumerate(features):
+            rings = _feature_rings(feature)
+            if not rings or self.names[i] is None:
+                continue
+            points = np.vstack([ring for _, ring in rings])
+            self.bbox[i] = [*points.min(axis=0), *points.max(axis=0)]
+            # Edge start points and deltas of all rings, ready for ray casting
+            x1 = np.concatenate([ring[:-1, 0] for _, ring in rings])
+            y1 = np.concatenate([ring[:-1, 1] for _, ring in rings])
+            dx = np.concatenate([np.diff(ring[:, 0]) for _, ring in rings])
+            dy = np.concatenate([np.diff(ring[:, 1]) for _, ring in rings])
+            self._edges[i] = (x1, y1, dx, dy)
+            centroid = self._centroid(rings)
+            if centroid is not None:
+                self.centroids[self.names[i]] = centroid
+
+    @classmethod
+    def from_geojson(cls, geojson):
+        return cls((geojson or {}).get('features') or [])
+
+    def to_arrays(self):
+        """The prepared index as plain arrays (see from_arrays): bbox, edges
+        (4, m) with every feature's x1, y1, dx, dy rows side by side, and
+        edge_offsets (n + 1) delimiting each feature's columns.
+        """
+        counts = [0 if edges is None else len(edges[0]) for edges in self._edges]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        edges = np.empty((4, offsets[-1]))
+        for i, feature_edges in enumerate(self._edges):
+            if feature_edges is not None:
+                edges[:, offsets[i]:offsets[i + 1]] = feature_edges
+        return {'bbox': self.bbox, 'edges': edges, 'edge_offsets': offsets}
+
+    @classmethod
+    def from_arrays(cls, names, centroids, bbox, edges, edge_offsets):
+        """Index over prepared arrays (e.g. memory-mapped by data_plane);
+        each feature's edges are views into `edges`, nothing is copied.
+        """
+        index = cls([])
+        index.names = list(names)
+        index.centroids = dict(centroids)
+        index.bbox = bbox
+        index._edges = [None if edge_offsets[i] == edge_offsets[i + 1]
+                        else tuple(edges[:, edge_offsets[i]:edge_offsets[i + 1]])
+                        for i in range(len(index.names))]
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _centroid(rings):
+        """Area-weighted centroid (lat, lon) of the rings; holes subtract."""
+        total_area = total_x = total_y = 0.0
+        for exterior, ring in rings:
+            x, y = ring[:, 0], ring[:, 1]
+            cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+            area = cross.sum() / 2.0
+            if area == 0:
+                continue
+            cx = ((x[:-1] + x[1:]) * cross).sum() / (6.0 * area)
+            cy = ((y[:-1] + y[1:]) * cross).sum() / (6.0 * area)
+            # Ring orientation isn't reliable across sources, so the ring's
+            # role (exterior or hole) decides the sign
+            weight = abs(area) if exterior else -abs(area)
+            total_area += weight
+            total_x += weight * cx
+            total_y += weight * cy
+        if total_area <= 0:
+            return None
+        return float(total_y / total_area), float(total_x / total_area)
+
+    def _contains(self, i, lon, lat):
+        x1, y1, dx, dy = self._edges[i]
+        # Edges straddling the horizontal through the point, crossed to its right
+        straddles = (y1 > lat) != (y1 + dy > lat)
+        if not straddles.any():
+            return False
+        x1, y1, dx, dy = x1[straddles], y1[straddles], dx[straddles], dy[straddles]
+        crossings = np.count_nonzero(lon < x1 + dx * (lat - y1) / dy)
+        return crossings % 2 == 1
+
+    def feature_at(self, lat, lon):
+        """Index of the feature containing (lat, lon), or None."""
+        bbox = self.bbox
+        candidates = np.flatnonzero((bbox[:, 0] <= lon) & (lon <= bbox[:, 2])
+                                    & (bbox[:, 1] <= lat) & (lat <= bbox[:, 3]))
+        for i in candidates.tolist():
+            if self._contains(i, lon, lat):
+                return i
+        return None
+
+    def county_at(self, lat, lon):
+        """County whose borders contain (lat, lon), or None outside all of them."""
+        i = self.feature_at(lat, lon)
+        return None if i is None else self.names[i]
+
+
+_installed = []
+_borders = {}
+# One parsed GeoJSON and polygon index shared by every session's map layers
+register_cache("map_layers", lambda: [_borders, _installed],
+               description="County border GeoJSON and polygon index")
+
+
+def read_county_borders(path):
+    """Parsed border GeoJSON at `path`, re-read only when the file changes, so
+    the same object (and prepared index) is reused across app reruns.
+    """
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _borders:
+        with open(path, encoding="utf-8") as f:
+            geojson = json.load(f)
+        _borders.clear()
+        _borders[key] = geojson
+    return _borders[key]
+
+
+def install_county_borders(geojson):
+    """Prepare (once per border GeoJSON object) and install the index used by
+    county_at() and spatial_index. Returns the CountyPolygonIndex.
+    """
+    if _installed and _installed[0] is geojson:
+        return _installed[1]
+    index = CountyPolygonIndex.from_geojson(geojson)
+    # Keep the GeoJSON referenced so the identity check stays valid
+    _installed[:] = [geojson, index]
+    return index
+
+
+def install_polygon_index(index):
+    """Install an already prepared CountyPolygonIndex (e.g. attached from
+    the data plane) for county_at() and spatial_index.
+    """
+    _installed[:] = [None, index]
+
+
+def get_county_polygon_index():
+    """The installed CountyPolygonIndex, or None if no borders are loaded."""
+    return _installed[1] if _installed else None
+
+
+def county_at(lat, lon):
+    """County containing (lat, lon) by the installed borders, or None."""
+    index = get_county_polygon_index()
+    return None if index is None else index.county_at(lat, lon)
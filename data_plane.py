@@ -0,0 +1,208 @@
+# data_plane.py
+# Read-only data plane for multi-process deployments (job pool workers, batch
+# jobs, several Streamlit server processes). The compiled artifact already
+# memory-maps the county graph, coordinates and time matrices; what every
+# process still builds privately are the derived structures: the city routing
+# graph (a CSR built from the city time matrix in Python loops) and the county
+# border geometry (the parsed GeoJSON and the prepared point-in-polygon index).
+#
+# publish() writes those as .npy files into a "plane-<digest>" directory inside
+# the artifact version (the digest covers the geometry, so new borders get a
+# new plane) and points CURRENT_PLANE at it; attach() memory-maps the files
+# read-only, so any number of processes share one copy of the pages, and
+# install() makes route_graph and county_polygons use them. Workers attach
+# without ever reading the GeoJSON or rebuilding the city CSR. The border
+# edges are used straight from the mapped pages; a RouteGraph still copies its
+# CSR into per-node Python lists for the search loops (road conditions update
+# them in place), so the city graph saves each process the build but not that
+# copy.
+#
+# Publish:  python data_plane.py publish [--borders wa_counties.geojson]
+# Info:     python data_plane.py info
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+import county_polygons
+import route_graph
+import wa_artifact
+
+ENABLED = os.environ.get("WA_DATA_PLANE", "1") != "0"
+PLANE_FORMAT_VERSION = 1
+
+
+class DataPlane:
+    """Memory-mapped derived structures of one artifact version: city_graph
+    (RouteGraph) and polygon_index (CountyPolygonIndex, None if the plane was
+    published without borders).
+    """
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.data_version = manifest["data_version"]
+        self.arrays = arrays
+        self.city_graph = route_graph.RouteGraph(manifest["city_names"], arrays["city_indptr"],
+                                                 arrays["city_indices"], arrays["city_weights"])
+        self.polygon_index = None
+        if manifest.get("county_names") is not None:
+            self.polygon_index = county_polygons.CountyPolygonIndex.from_arrays(
+                manifest["county_names"], {name: tuple(c) for name, c in manifest["centroids"].items()},
+                arrays["polygon_bbox"], arrays["polygon_edges"], arrays["polygon_edge_offsets"])
+
+    def __repr__(self):
+        return (f"DataPlane(data_version={self.data_version[:12]}, cities={len(self.city_graph)}, "
+                f"polygons={0 if self.polygon_index is None else len(self.polygon_index)})")
+
+
+def _plane_arrays(artifact, polygon_index):
+    if artifact is wa_artifact.get_artifact():
+        city_graph = route_graph.get_city_route_graph()
+    else:
+        city_graph = route_graph.RouteGraph.cities_from_artifact(artifact)
+    arrays = {"city_indptr": city_graph.indptr, "city_indices": city_graph.indices,
+              "city_weights": city_graph.weights}
+    manifest = {"format_version": PLANE_FORMAT_VERSION, "data_version": artifact.data_version,
+                "city_names": city_graph.names, "county_names": None, "centroids": None}
+    if polygon_index is not None:
+        polygon = polygon_index.to_arrays()
+        arrays.update(polygon_bbox=polygon['bbox'], polygon_edges=polygon['edges'],
+                      polygon_edge_offsets=polygon['edge_offsets'])
+        manifest.update(county_names=polygon_index.names, centroids=polygon_index.centroids)
+    return manifest, arrays
+
+
+def publish(artifact=None, polygon_index=None):
+    """Write the data plane for an artifact (default: the current one) and the
+    given CountyPolygonIndex (default: the installed one, if any) and point
+    CURRENT_PLANE at it. Returns its path; publishing an existing plane only
+    repoints CURRENT_PLANE.
+    """
+    artifact = artifact or wa_artifact.get_artifact()
+    if polygon_index is None:
+        polygon_index = county_polygons.get_county_polygon_index()
+    manifest, arrays = _plane_arrays(artifact, polygon_index)
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    for name in sorted(arrays):
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    plane_dir = os.path.join(artifact.path, f"plane-{digest.hexdigest()[:16]}")
+
+    if not os.path.exists(os.path.join(plane_dir, "manifest.json")):
+        # Same publishing scheme as wa_artifact: build aside, rename into place
+        tmp_dir = tempfile.mkdtemp(prefix=".plane-", dir=artifact.path)
+        try:
+            os.chmod(tmp_dir, 0o755)
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp_dir, name + ".npy"), np.ascontiguousarray(arr))
+            manifest["arrays"] = sorted(arrays)
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            try:
+                os.rename(tmp_dir, plane_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    pointer_tmp = os.path.join(artifact.path, f".CURRENT_PLANE.{os.getpid()}")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(plane_dir))
+    os.replace(pointer_tmp, os.path.join(artifact.path, "CURRENT_PLANE"))
+    return plane_dir
+
+
+_attached = {}
+
+
+def attach(path):
+    """The DataPlane published at `path`, memory-mapped read-only (cached per
+    path). Raises FileNotFoundError if there is none, ValueError on a format
+    mismatch.
+    """
+    plane = _attached.get(path)
+    if plane is None:
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != PLANE_FORMAT_VERSION:
+            raise ValueError(f"Data plane format {manifest.get('format_version')} in {path} does not match "
+                             f"{PLANE_FORMAT_VERSION}; publish it again")
+        arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+                  for name in manifest["arrays"]}
+        plane = DataPlane(path, manifest, arrays)
+        _attached.clear()
+        _attached[path] = plane
+    return plane
+
+
+def current_path(artifact=None):
+    """Path of the plane CURRENT_PLANE points at for an artifact (default: the
+    current one), or None if none was published.
+    """
+    artifact = artifact or wa_artifact.get_artifact()
+    try:
+        with open(os.path.join(artifact.path, "CURRENT_PLANE"), encoding="utf-8") as f:
+            return os.path.join(artifact.path, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def install(plane, artifact=None):
+    """Route city searches and county lookups of this process through an
+    attached plane of the current artifact.
+    """
+    artifact = artifact or wa_artifact.get_artifact()
+    if plane.data_version != artifact.data_version:
+        raise ValueError(f"Data plane {plane.path} is for another data version")
+    route_graph.install_artifact_graph("city", artifact, plane.city_graph)
+    if plane.polygon_index is not None:
+        county_polygons.install_polygon_index(plane.polygon_index)
+
+
+def attach_current():
+    """Attach and install the current artifact's published plane; returns it,
+    or None if nothing is published or the data plane is disabled.
+    """
+    path = current_path() if ENABLED else None
+    if path is None:
+        return None
+    plane = attach(path)
+    install(plane)
+    return plane
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish or inspect the shared data plane.")
+    parser.add_argument("command", choices=["publish", "info"])
+    parser.add_argument("--borders", help="county borders GeoJSON to include")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        polygon_index = None
+        if args.borders:
+            polygon_index = county_polygons.CountyPolygonIndex.from_geojson(
+                county_polygons.read_county_borders(args.borders))
+        print(f"Published {publish(polygon_index=polygon_index)}")
+        return 0
+
+    path = current_path()
+    if path is None:
+        print("No data plane published; run `python data_plane.py publish`")
+        return 1
+    plane = attach(path)
+    print(plane)
+    print(f"  path: {plane.path}")
+    for name, arr in plane.arrays.items():
+        print(f"  {name}: {arr.dtype} {arr.shape}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# data_reload.py
+# Hot reload of the reference data files in wa_data/. A watcher notices changed
+# files (by mtime and size), loads them into a new ReferenceData snapshot and,
+# if its content hash differs, builds everything derived from it in a
+# background thread: the compiled artifact, the county and city route graphs
+# and the time matrices. Only then is the snapshot swapped in, so the first
+# request after a reload finds warm structures instead of a cold start.
+#
+# Caches are keyed on the data version: entries for the old version are
+# dropped after the swap, anything that doesn't depend on the reference data
+# (e.g. the routing API response cache) is kept.
+
+import os
+import threading
+import time
+
+import wa_counties
+
+
+class ReferenceDataWatcher:
+    """Polls the reference data files and hot-swaps new versions.
+
+    poll() is cheap (one stat per file) and safe to call on every request;
+    start() polls from a daemon thread instead. last_reload describes the most
+    recent swap and last_error the most recent failed rebuild (the old data
+    stays live on failure).
+    """
+
+    def __init__(self, data_dir=wa_counties.DATA_DIR, artifact_dir=None):
+        self.data_dir = data_dir
+        self.artifact_dir = artifact_dir
+        self.last_reload = None
+        self.last_error = None
+        self._signature = self._file_signature()
+        self._lock = threading.Lock()
+        self._rebuild_thread = None
+        self._poll_thread = None
+
+    def _file_signature(self):
+        signature = []
+        for filename in sorted(wa_counties.DATA_FILES.values()):
+            try:
+                st = os.stat(os.path.join(self.data_dir, filename))
+                signature.append((filename, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append((filename, None, None))
+        return tuple(signature)
+
+    def poll(self):
+        """Start a background rebuild if the files changed since the last poll.
+        Returns True if a rebuild was started.
+        """
+        signature = self._file_signature()
+        with self._lock:
+            if signature == self._signature or self.rebuilding():
+                return False
+            self._signature = signature
+            self._rebuild_thread = threading.Thread(target=self._rebuild, name="wa-data-reload", daemon=True)
+            self._rebuild_thread.start()
+        return True
+
+    def rebuilding(self):
+        return self._rebuild_thread is not None and self._rebuild_thread.is_alive()
+
+    def wait(self, timeout=None):
+        """Block until a running rebuild has finished."""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _rebuild(self):
+        import isochrones
+        import route_graph
+        import time_matrix
+        import wa_artifact
+
+        started = time.perf_counter()
+        try:
+            data = wa_counties.ReferenceData.load(self.data_dir)
+            if data.data_version == wa_counties.data_version:
+                return
+            old_version = wa_artifact.compute_data_version()
+
+            # Build everything for the new version while the old one serves
+            artifact = wa_artifact.get_artifact(self.artifact_dir, data)
+            route_graph.prepare_graphs(artifact)
+            time_matrix.prepare_matrices(artifact)
+
+            wa_counties.install_reference_data(data)
+
+            for module in (wa_artifact, route_graph, time_matrix, isochrones):
+                module.forget_data_version(old_version)
+        except Exception as e:
+            self.last_error = e
+            return
+        self.last_error = None
+        self.last_reload = {
+            'data_version': data.data_version,
+            'counties': len(data.wa_county_graph),
+            'cities': len(data.city_to_county),
+            'elapsed_ms': (time.perf_counter() - started) * 1000.0,
+        }
+
+    def start(self, interval=2.0):
+        """Poll every `interval` seconds from a daemon thread (idempotent)."""
+        if self._poll_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.poll()
+
+        self._poll_thread = threading.Thread(target=loop, name="wa-data-watch", daemon=True)
+        self._poll_thread.start()
+
+
+_watcher = None
+
+
+def get_reference_data_watcher():
+    """The process-wide watcher for the default data directory."""
+    global _watcher
+    if _watcher is None:
+        _watcher = ReferenceDataWatcher()
+    return _watcher
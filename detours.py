@@ -0,0 +1,107 @@
+# detours.py
+# Detour service: scores adding extra stops to an existing county route.
+# Fastest-path costs come from the RouteGraph's cached Dijkstra trees, so every
+# insertion position for every candidate is evaluated in one numpy pass instead
+# of one search and one full route re-sum per position.
+
+import numpy as np
+
+from wa_counties import city_to_county
+
+
+class DetourService:
+    """Ranks candidate stops by the extra drive time needed to visit them.
+
+    Drive times in the county graph are symmetric, so a single search tree
+    from each candidate gives both the cost of reaching it and of returning
+    to the route.
+    """
+
+    def __init__(self, route_graph):
+        self.route_graph = route_graph
+
+    def _leg_times(self, route_ids):
+        """Drive time of each leg of the existing route."""
+        legs = []
+        for u, v in zip(route_ids[:-1], route_ids[1:]):
+            w = self.route_graph.edge_weight(u, v)
+            if w is None:
+                w = self.route_graph.dijkstra(u)[0][v]
+            legs.append(w)
+        return np.asarray(legs, dtype=np.float64)
+
+    def insertion_deltas(self, route_ids, target_ids):
+        """Extra drive time (seconds) of visiting each target at each position.
+
+        Returns a (len(target_ids), positions) array where column i means leaving
+        the route after route[i] and rejoining it at route[i + 1]. A single-stop
+        route has one position: out and back. Unreachable targets are inf.
+        """
+        route = np.asarray(route_ids, dtype=np.intp)
+        dist = self.route_graph.distance_rows(target_ids)
+        if len(route) == 1:
+            return 2 * dist[:, route]
+        return dist[:, route[:-1]] + dist[:, route[1:]] - self._leg_times(route_ids)
+
+    def _splice(self, route_ids, index, target):
+        """Route with a fastest-path detour to `target` after route[index]."""
+        rg = self.route_graph
+        # Both paths are read off the target's search tree
+        path_out = rg.shortest_path(target, route_ids[index])[0][::-1]
+        if index + 1 < len(route_ids):
+            path_back = rg.shortest_path(target, route_ids[index + 1])[0]
+            return route_ids[:index + 1] + path_out[1:] + path_back[1:-1] + route_ids[index + 1:]
+        # Single-stop route: out and back
+        path_back = rg.shortest_path(target, route_ids[index])[0]
+        return route_ids + path_out[1:] + path_back[1:]
+
+    def rank_cities(self, route, cities, top=None):
+        """Rank candidate cities by the cheapest detour to visit them.
+
+        route:  list of county names
+        cities: iterable of city names (unknown cities are skipped)
+        Returns a list of dicts sorted by detour time, each with 'city', 'county',
+        'detour_time' (seconds), 'insertion_index' (the detour leaves the route
+        after route[insertion_index]) and 'route' (county names with the detour).
+        Cities whose county is already on the route cost nothing.
+        """
+        rg = self.route_graph
+        route_ids = rg.ids_of(route)
+
+        results = []
+        off_route = []
+        for city in cities:
+            county = city_to_county.get(city)
+            if county is None or county not in rg:
+                continue
+            if county in route:
+                results.append({'city': city, 'county': county, 'detour_time': 0,
+                                'insertion_index': route.index(county), 'route': list(route)})
+            else:
+                off_route.append((city, county))
+
+        if off_route:
+            target_ids = sorted({rg.id_of(county) for _, county in off_route})
+            deltas = self.insertion_deltas(route_ids, target_ids)
+            best_index = deltas.argmin(axis=1)
+            best_delta = deltas[np.arange(len(target_ids)), best_index]
+            best = {t: (int(best_index[k]), best_delta[k]) for k, t in enumerate(target_ids)}
+
+            spliced = {}
+            for city, county in off_route:
+                target = rg.id_of(county)
+                index, delta = best[target]
+                if not np.isfinite(delta):
+                    continue
+                if target not in spliced:
+                    spliced[target] = rg.names_of(self._splice(route_ids, index, target))
+                results.append({'city': city, 'county': county, 'detour_time': int(delta),
+                                'insertion_index': index, 'route': spliced[target]})
+
+        results.sort(key=lambda r: r['detour_time'])
+        return results[:top] if top is not None else results
+
+    def best_detour(self, route, city):
+        """Cheapest way to add one city to the route (dict as in rank_cities), or None."""
+        ranked = self.rank_cities(route, [city], top=1)
+        return ranked[0] if ranked else None
@@ -0,0 +1,153 @@
+# export_matrices.py
+# Export the full city x city and county x county drive-time matrices computed by
+# the routing engine (fastest paths over the route graphs, not straight-line
+# estimates) for downstream tools.
+#
+# Rows are computed and written in chunks, so memory stays flat and the output
+# streams to disk even for thousands of places.
+#
+# Usage:
+#   python export_matrices.py --out exports                      # both, .npy
+#   python export_matrices.py --kind city --format csv --out exports
+#   python export_matrices.py --format parquet --chunk-size 500  # needs pyarrow
+#
+# Outputs (seconds, -1 where unreachable):
+#   npy:     <kind>_drive_times.npy (int32 n x n) + <kind>_names.json
+#   csv:     <kind>_drive_times.csv, wide: one row per origin, one column per destination
+#   parquet: <kind>_drive_times.parquet, long: origin, destination, seconds
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from route_graph import get_route_graph, get_city_route_graph
+from wa_counties import wa_county_graph
+
+FORMATS = ("npy", "csv", "parquet")
+
+
+def iter_matrix_rows(route_graph, chunk_size=256):
+    """Yield (start_index, rows) chunks of the all-pairs drive-time matrix as
+    int32 seconds with -1 for unreachable pairs. Search trees are not cached.
+    """
+    n = len(route_graph)
+    for start in range(0, n, chunk_size):
+        sources = list(range(start, min(start + chunk_size, n)))
+        rows = route_graph.distance_rows(sources, cache=False)
+        out = np.where(np.isfinite(rows), rows, -1).astype(np.int32)
+        yield start, out
+
+
+class _Progress:
+    """Minimal progress line on stderr."""
+
+    def __init__(self, label, total, enabled=True):
+        self.label = label
+        self.total = total
+        self.enabled = enabled
+        self.started = time.perf_counter()
+
+    def update(self, done):
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - self.started
+        pct = 100.0 * done / self.total if self.total else 100.0
+        sys.stderr.write(f"\r{self.label}: {done}/{self.total} rows ({pct:5.1f}%) {elapsed:6.1f}s")
+        if done >= self.total:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+
+def _write_npy(route_graph, path, chunk_size, progress):
+    names_path = path[:-len("_drive_times.npy")] + "_names.json"
+    with open(names_path, "w", encoding="utf-8") as f:
+        json.dump(route_graph.names, f)
+    n = len(route_graph)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=(n, n))
+    for start, rows in iter_matrix_rows(route_graph, chunk_size):
+        out[start:start + len(rows)] = rows
+        progress.update(start + len(rows))
+    out.flush()
+    del out
+    return [path, names_path]
+
+
+def _write_csv(route_graph, path, chunk_size, progress):
+    names = route_graph.names
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["origin"] + names)
+        for start, rows in iter_matrix_rows(route_graph, chunk_size):
+            for k, row in enumerate(rows.tolist()):
+                writer.writerow([names[start + k]] + row)
+            progress.update(start + len(rows))
+    return [path]
+
+
+def _write_parquet(route_graph, path, chunk_size, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+
+    names = route_graph.names
+    n = len(names)
+    # Names are dictionary-encoded, so the long layout stays compact
+    name_dictionary = pa.array(names)
+    schema = pa.schema([
+        ("origin", pa.dictionary(pa.int32(), pa.string())),
+        ("destination", pa.dictionary(pa.int32(), pa.string())),
+        ("seconds", pa.int32()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for start, rows in iter_matrix_rows(route_graph, chunk_size):
+            origin_ids = np.repeat(np.arange(start, start + len(rows), dtype=np.int32), n)
+            destination_ids = np.tile(np.arange(n, dtype=np.int32), len(rows))
+            table = pa.table({
+                "origin": pa.DictionaryArray.from_arrays(origin_ids, name_dictionary),
+                "destination": pa.DictionaryArray.from_arrays(destination_ids, name_dictionary),
+                "seconds": rows.ravel(),
+            }, schema=schema)
+            writer.write_table(table)
+            progress.update(start + len(rows))
+    return [path]
+
+
+_WRITERS = {"npy": _write_npy, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def export_matrix(kind, out_dir, fmt="npy", chunk_size=256, show_progress=True):
+    """Export the 'city' or 'county' drive-time matrix. Returns the written paths."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}, got {fmt!r}")
+    route_graph = get_city_route_graph() if kind == "city" else get_route_graph(wa_county_graph)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{kind}_drive_times.{fmt}")
+    progress = _Progress(kind, len(route_graph), enabled=show_progress)
+    return _WRITERS[fmt](route_graph, path, chunk_size, progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export all-pairs drive-time matrices.")
+    parser.add_argument("--kind", choices=["city", "county", "both"], default="both")
+    parser.add_argument("--format", choices=FORMATS, default="npy")
+    parser.add_argument("--out", default="exports", help="output directory")
+    parser.add_argument("--chunk-size", type=int, default=256, help="origin rows per chunk")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    kinds = ["county", "city"] if args.kind == "both" else [args.kind]
+    for kind in kinds:
+        for path in export_matrix(kind, args.out, args.format, args.chunk_size, not args.quiet):
+            print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# ferries.py
+# Ferry-aware earliest-arrival routing. Scheduled crossings (Anacortes-San Juan,
+# Mukilteo-Clinton, Port Townsend-Coupeville, Seattle-Bainbridge/Bremerton) are
+# loaded from ferry_timetable.csv and combined with the road edges of the county
+# graph in one earliest-arrival search, so waiting for the next sailing is
+# counted exactly instead of folded into a fixed edge time.
+#
+# Each directed crossing keeps its departures as a sorted list of seconds since
+# midnight; the next sailing from any clock time is one binary search. Labels
+# are absolute clock times and are settled in time order, connection-scan style:
+# a sailing can only be boarded from a label settled before it departs.
+
+import bisect
+import csv
+import heapq
+import os
+
+from route_graph import get_route_graph
+from tracing import traced
+from traffic import SECONDS_PER_DAY, seconds_of_day
+from wa_counties import wa_county_graph
+
+DEFAULT_TIMETABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ferry_timetable.csv")
+
+
+def _parse_clock(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 3600 + int(minutes) * 60
+
+
+class FerryTimetable:
+    """Scheduled crossings over a county RouteGraph.
+
+    links[u] lists the crossings leaving node u as dicts with 'to', 'route',
+    'from_terminal', 'to_terminal', 'access' and 'crossing' (seconds) and
+    'departures' (sorted seconds since midnight). Road edges duplicated by a
+    crossing are dropped from the search.
+    """
+
+    def __init__(self, route_graph, links):
+        self.route_graph = route_graph
+        self.links = [[] for _ in range(len(route_graph))]
+        replaced = set()
+        for u, link in links:
+            self.links[u].append(link)
+            replaced.add((u, link['to']))
+            replaced.add((link['to'], u))
+        # Remaining road edges as (neighbor, slot in u's CSR row); their drive
+        # times are read from the graph at search time, so edge updates apply
+        self._road = [[(v, k) for k, v in enumerate(route_graph.neighbors(u)) if (u, v) not in replaced]
+                      for u in range(len(route_graph))]
+
+    @classmethod
+    def load(cls, route_graph, path=DEFAULT_TIMETABLE_PATH):
+        """Read a timetable CSV (see ferry_timetable.csv). Raises ValueError for
+        unknown counties or a crossing without sailings.
+        """
+        links = []
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(line for line in f if not line.startswith("#"))
+            for line_no, row in enumerate(reader, start=2):
+                source, target = row['from_county'].strip(), row['to_county'].strip()
+                if source not in route_graph or target not in route_graph:
+                    raise ValueError(f"{path}:{line_no}: unknown county in {source} -> {target}")
+                departures = sorted(_parse_clock(t) for t in row['departures'].split())
+                if not departures:
+                    raise ValueError(f"{path}:{line_no}: {row['route']} has no departures")
+                links.append((route_graph.id_of(source), {
+                    'to': route_graph.id_of(target),
+                    'route': row['route'],
+                    'from_terminal': row['from_terminal'],
+                    'to_terminal': row['to_terminal'],
+                    'access': int(row['access_minutes']) * 60,
+                    'crossing': int(row['crossing_minutes']) * 60,
+                    'departures': departures,
+                }))
+        return cls(route_graph, links)
+
+    @staticmethod
+    def next_sailing(link, clock):
+        """First sailing of `link` leaving at or after absolute clock time
+        `clock` (seconds from midnight of the trip's first day), rolling over to
+        the next day after the last sailing. Returns (depart, arrive).
+        """
+        day, time_of_day = divmod(clock, SECONDS_PER_DAY)
+        departures = link['departures']
+        i = bisect.bisect_left(departures, time_of_day)
+        if i == len(departures):
+            day += 1
+            i = 0
+        depart = day * SECONDS_PER_DAY + departures[i]
+        return depart, depart + link['crossing']
+
+    def earliest_arrival(self, source, departure, traffic=None):
+        """Earliest arrival at every node leaving `source` at `departure`
+        (seconds since midnight or a datetime/time). Road legs use `traffic`
+        (a TrafficProfiles) when given, free-flow times otherwise.
+
+        Returns (arrival, parent, via): absolute clock times (inf if
+        unreachable), parent IDs (-1 if unreachable) and, per node, the
+        crossing dict used to reach it or None for a road leg.
+        """
+        start = seconds_of_day(departure)
+        n = len(self.route_graph)
+        arrival = [float('inf')] * n
+        parent = [-1] * n
+        via = [None] * n
+        arrival[source] = start
+        parent[source] = source
+        heap = [(start, source)]
+        road = self._road
+        weights = self.route_graph._neighbor_weights
+        links = self.links
+        multiplier = traffic.multiplier if traffic is not None else None
+        profiled = traffic._profiled if traffic is not None else None
+        while heap:
+            t, u = heapq.heappop(heap)
+            if t > arrival[u]:
+                continue
+            for v, k in road[u]:
+                w = weights[u][k]
+                if profiled is not None:
+                    row = profiled[u][k]
+                    if row is not None:
+                        w = w * multiplier(row, t)
+                nt = t + w
+                if nt < arrival[v]:
+                    arrival[v] = nt
+                    parent[v] = u
+                    via[v] = None
+                    heapq.heappush(heap, (nt, v))
+            for link in links[u]:
+                _, nt = self.next_sailing(link, t + link['access'])
+                v = link['to']
+                if nt < arrival[v]:
+                    arrival[v] = nt
+                    parent[v] = u
+                    via[v] = link
+                    heapq.heappush(heap, (nt, v))
+        return arrival, parent, via
+
+    def journey(self, source, target, departure, traffic=None):
+        """Earliest-arrival itinerary from source to target as a list of legs,
+        or None if unreachable. Each leg is a dict with 'from', 'to' (IDs),
+        'mode' ('road' or 'ferry'), 'depart' and 'arrive' (absolute clock
+        seconds); ferry legs add 'route', 'from_terminal', 'to_terminal',
+        'sailing' (departure clock time) and 'wait' (seconds at the terminal).
+        """
+        arrival, parent, via = self.earliest_arrival(source, departure, traffic)
+        path = self.route_graph._walk_back(parent, source, target)
+        if path is None:
+            return None
+        legs = []
+        for u, v in zip(path[:-1], path[1:]):
+            leg = {'from': u, 'to': v, 'mode': 'road', 'depart': arrival[u], 'arrive': arrival[v]}
+            link = via[v]
+            if link is not None:
+                at_terminal = arrival[u] + link['access']
+                sailing, _ = self.next_sailing(link, at_terminal)
+                leg.update(mode='ferry', route=link['route'], from_terminal=link['from_terminal'],
+                           to_terminal=link['to_terminal'], sailing=sailing, wait=sailing - at_terminal)
+            legs.append(leg)
+        return legs
+
+    def route_journey(self, path, departure, traffic=None):
+        """Itinerary along a fixed path of IDs leaving at `departure`, each leg
+        starting when the previous one arrives: legs as in journey(), or None
+        if two consecutive nodes aren't connected. Nodes linked by a crossing
+        are crossed by ferry, as in the search.
+        """
+        clock = seconds_of_day(departure)
+        legs = []
+        for u, v in zip(path[:-1], path[1:]):
+            leg = {'from': u, 'to': v, 'mode': 'road', 'depart': clock}
+            crossings = [link for link in self.links[u] if link['to'] == v]
+            if crossings:
+                # The first to arrive, if several routes link the two counties
+                link = min(crossings, key=lambda link: self.next_sailing(link, clock + link['access'])[1])
+                at_terminal = clock + link['access']
+                sailing, arrive = self.next_sailing(link, at_terminal)
+                leg.update(mode='ferry', route=link['route'], from_terminal=link['from_terminal'],
+                           to_terminal=link['to_terminal'], sailing=sailing, wait=sailing - at_terminal)
+            else:
+                slots = [k for v2, k in self._road[u] if v2 == v]
+                if not slots:
+                    return None
+                w = self.route_graph.neighbor_weights(u)[slots[0]]
+                if traffic is not None and traffic._profiled[u][slots[0]] is not None:
+                    w = w * traffic.multiplier(traffic._profiled[u][slots[0]], clock)
+                arrive = clock + w
+            leg['arrive'] = arrive
+            legs.append(leg)
+            clock = arrive
+        return legs
+
+_timetables = {}
+
+
+def get_ferry_timetable(path=DEFAULT_TIMETABLE_PATH):
+    """FerryTimetable for the county graph, loaded once per file and data version."""
+    route_graph = get_route_graph(wa_county_graph)
+    timetable = _timetables.get(path)
+    # Reloaded when the reference data (and so the county graph) changes
+    if timetable is None or timetable.route_graph is not route_graph:
+        timetable = FerryTimetable.load(route_graph, path)
+        _timetables[path] = timetable
+    return timetable
+
+
+def _named(route_graph, legs):
+    if legs is None:
+        return None
+    for leg in legs:
+        leg['from'] = route_graph.names[leg['from']]
+        leg['to'] = route_graph.names[leg['to']]
+    return legs
+
+
+@traced("ferries")
+def plan_journey(start, end, departure, traffic=None, path=DEFAULT_TIMETABLE_PATH):
+    """Earliest-arrival county itinerary from start to end leaving at `departure`.
+    Returns legs as in FerryTimetable.journey with county names, or None.
+    """
+    timetable = get_ferry_timetable(path)
+    route_graph = timetable.route_graph
+    return _named(route_graph, timetable.journey(route_graph.id_of(start), route_graph.id_of(end),
+                                                 departure, traffic))
+
+
+@traced("ferries.route")
+def plan_route_journey(route, departure, traffic=None, path=DEFAULT_TIMETABLE_PATH):
+    """Timed itinerary along a given county route (list of names) leaving at
+    `departure`, waiting for sailings where it crosses by ferry. Returns legs
+    as in FerryTimetable.journey with county names, or None if the route
+    leaves the graph.
+    """
+    timetable = get_ferry_timetable(path)
+    route_graph = timetable.route_graph
+    if any(county not in route_graph for county in route):
+        return None
+    return _named(route_graph, timetable.route_journey(route_graph.ids_of(route), departure, traffic))
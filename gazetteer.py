@@ -0,0 +1,235 @@
+# gazetteer.py
+# Place search for the location pickers. Counties, cities and (optionally) every
+# other named Washington place from wa_data/places.csv are kept as typed Place
+# records with a typeahead index, so the pickers show a short list of matches
+# instead of one selectbox of every formatted place name.
+#
+# Prefix search works like a trie flattened into sorted arrays: every word of
+# every name sits in one sorted list, so all words starting with a prefix are a
+# contiguous slice found with two binary searches. Names that start with the
+# whole query rank first (a second sorted list of full names), then other word
+# matches; ties go to counties, then cities, then shorter names. Queries with
+# no prefix match (typos) fall back to trigram similarity. Lookups stay well
+# under a millisecond with tens of thousands of places.
+
+import bisect
+import collections
+import csv
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+import wa_counties
+from memory_accounting import register_cache
+
+DEFAULT_PLACES_PATH = os.path.join(wa_counties.DATA_DIR, "places.csv")
+
+# kind is 'county' (route through the county's fastest city), 'city' (a city
+# of the routing graph) or 'place' (any other named place, routed from the
+# nearest city in its county)
+Place = collections.namedtuple("Place", ["kind", "name", "county", "lat", "lon"])
+
+_KIND_ORDER = {'county': 0, 'city': 1, 'place': 2}
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase words of `text` with accents and punctuation removed."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def place_label(place):
+    """Display string for a Place in the pickers."""
+    if place.kind == 'county':
+        return f"Fastest route through {place.name}"
+    if place.kind == 'city':
+        return f"{place.name} ({place.county})"
+    return f"{place.name}, {place.county} County"
+
+
+class Gazetteer:
+    """Typeahead index over a list of Place records.
+
+    Each place has a static rank (kind, then name length, then name); _words
+    and _word_place are the sorted (word, place) pairs for prefix search and
+    _names/_name_place the sorted full names. Trigram postings for the fuzzy
+    fallback are built on first use.
+    """
+
+    def __init__(self, places):
+        self.places = list(places)
+        keys = [" ".join(normalize(place.name)) for place in self.places]
+        self._keys = keys
+        order = sorted(range(len(self.places)), key=lambda i: (
+            _KIND_ORDER[self.places[i].kind], len(keys[i]), keys[i]))
+        self._rank = np.empty(len(self.places), dtype=np.int64)
+        self._rank[order] = np.arange(len(self.places))
+
+        pairs = sorted((word, i) for i, key in enumerate(keys) for word in set(key.split()))
+        self._words = [word for word, _ in pairs]
+        self._word_place = np.asarray([i for _, i in pairs], dtype=np.int64)
+        names = sorted((key, i) for i, key in enumerate(keys))
+        self._names = [key for key, _ in names]
+        self._name_place = np.asarray([i for _, i in names], dtype=np.int64)
+        self._trigram_postings = None
+        self._trigram_counts = None
+        self._browse = None
+
+    def __len__(self):
+        return len(self.places)
+
+    @staticmethod
+    def _prefix_range(sorted_keys, prefix):
+        lo = bisect.bisect_left(sorted_keys, prefix)
+        hi = bisect.bisect_left(sorted_keys, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _top(self, ids, limit):
+        """Up to `limit` of the place IDs in `ids`, best static rank first."""
+        if len(ids) > limit:
+            ids = ids[np.argpartition(self._rank[ids], limit - 1)[:limit]]
+        return ids[np.argsort(self._rank[ids], kind="stable")]
+
+    def search(self, query, limit=20):
+        """Places matching `query`, best first: every query word must start a
+        word of the name. Falls back to fuzzy() when nothing matches.
+        """
+        words = normalize(query)
+        if not words or limit < 1:
+            return []
+        # Places with a word starting with each query word, as a mask (linear
+        # in the number of places, whatever the size of the prefix slices)
+        matches = None
+        for word in sorted(set(words), key=len, reverse=True):
+            lo, hi = self._prefix_range(self._words, word)
+            hit = np.zeros(len(self.places), dtype=bool)
+            hit[self._word_place[lo:hi]] = True
+            matches = hit if matches is None else matches & hit
+            if not matches.any():
+                return self.fuzzy(query, limit)
+
+        # Names starting with the whole query first, then other word matches
+        lo, hi = self._prefix_range(self._names, " ".join(words))
+        leading = self._name_place[lo:hi]
+        ranked = self._top(leading, limit)
+        if len(ranked) < limit:
+            matches[leading] = False
+            ranked = np.concatenate([ranked, self._top(np.flatnonzero(matches), limit - len(ranked))])
+        return [self.places[i] for i in ranked.tolist()]
+
+    def fuzzy(self, query, limit=20, min_similarity=0.3):
+        """Places whose names share enough trigrams with `query` (Jaccard
+        similarity of at least min_similarity), most similar first.
+        """
+        key = " ".join(normalize(query))
+        if not key or limit < 1:
+            return []
+        if self._trigram_postings is None:
+            postings = collections.defaultdict(list)
+            self._trigram_counts = np.empty(len(self.places), dtype=np.int64)
+            for i, name_key in enumerate(self._keys):
+                grams = _trigrams(name_key)
+                self._trigram_counts[i] = len(grams)
+                for gram in grams:
+                    postings[gram].append(i)
+            self._trigram_postings = {gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()}
+        grams = _trigrams(key)
+        hits = [self._trigram_postings[gram] for gram in grams if gram in self._trigram_postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.places))
+        candidates = np.flatnonzero(shared)
+        similarity = shared[candidates] / (len(grams) + self._trigram_counts[candidates] - shared[candidates])
+        keep = similarity >= min_similarity
+        candidates, similarity = candidates[keep], similarity[keep]
+        best = np.lexsort((self._rank[candidates], -similarity))[:limit]
+        return [self.places[i] for i in candidates[best].tolist()]
+
+    def browse(self):
+        """Counties and cities grouped by county (each county, then its
+        cities), for the pickers before anything is typed.
+        """
+        if self._browse is None:
+            by_county = collections.defaultdict(list)
+            counties = []
+            for place in self.places:
+                if place.kind == 'county':
+                    counties.append(place)
+                elif place.kind == 'city':
+                    by_county[place.county].append(place)
+            self._browse = []
+            for county in sorted(counties, key=lambda place: place.name):
+                self._browse.append(county)
+                self._browse.extend(by_county.get(county.name, []))
+        return list(self._browse)
+
+
+def resolve_place(place):
+    """(county, city, wants_fastest) for a picked Place; a county means the
+    fastest city of the county for the route, a named place routes from the
+    nearest city in its county. (None, None, False) for no selection.
+    """
+    if place is None:
+        return None, None, False
+    if place.kind == 'county':
+        return place.name, None, True
+    if place.kind == 'city':
+        return place.county, place.name, False
+    from spatial_index import get_city_index
+
+    cities = wa_counties.get_cities_by_county().get(place.county, [])
+    nearest = get_city_index().nearest_of(place.lat, place.lon, cities)
+    return place.county, nearest[0] if nearest else None, False
+
+
+def load_places(path=DEFAULT_PLACES_PATH):
+    """Extra named places from a CSV with name, county, lat and lon columns
+    (e.g. a GNIS extract). Raises ValueError for unknown counties.
+    """
+    places = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            county = row['county'].strip()
+            if county not in wa_counties.wa_county_graph:
+                raise ValueError(f"{path}:{line_no}: unknown county {county}")
+            places.append(Place('place', row['name'].strip(), county, float(row['lat']), float(row['lon'])))
+    return places
+
+
+def build_places(places_path=DEFAULT_PLACES_PATH):
+    """Place records for every county and city, plus load_places() if the file exists."""
+    places = []
+    for county in sorted(wa_counties.wa_county_graph):
+        lat, lon = wa_counties.county_coords.get(county, (None, None))
+        places.append(Place('county', county, county, lat, lon))
+    for county, cities in wa_counties.get_cities_by_county().items():
+        for city in cities:
+            lat, lon = wa_counties.city_coords.get(city, (None, None))
+            places.append(Place('city', city, county, lat, lon))
+    if places_path and os.path.exists(places_path):
+        known = {(place.name, place.county) for place in places}
+        places.extend(place for place in load_places(places_path) if (place.name, place.county) not in known)
+    return places
+
+
+_gazetteers = {}
+register_cache("gazetteer", lambda: [_gazetteers], description="Place search index")
+
+
+def get_gazetteer():
+    """Gazetteer over build_places() (cached per reference data version)."""
+    key = wa_counties.data_version
+    gazetteer = _gazetteers.get(key)
+    if gazetteer is None:
+        gazetteer = Gazetteer(build_places())
+        _gazetteers.clear()
+        _gazetteers[key] = gazetteer
+    return gazetteer
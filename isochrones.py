@@ -0,0 +1,91 @@
+# isochrones.py
+# "Where can I get within N hours?" One-to-all fastest drive times from a start
+# city or county, cut off at a time budget. The one-to-all search runs once per
+# origin and is cached, so changing the budget is only a numpy comparison.
+
+import numpy as np
+
+from memory_accounting import drop_oldest, register_cache
+from route_graph import get_route_graph, get_city_route_graph
+from tracing import traced
+from wa_counties import wa_county_graph
+
+_arrival_cache = {}
+register_cache("isochrones", lambda: [_arrival_cache],
+               evict=lambda fraction: drop_oldest(_arrival_cache, fraction),
+               budget_mb=32, description="One-to-all arrival times per origin")
+
+
+def arrival_times(origin, origin_is_city):
+    """Fastest drive time (seconds, inf if unreachable) from origin to every
+    county and city, as (county_times, city_times) arrays indexed like the
+    county and city route graphs. Cached per origin and data version.
+
+    City origins are searched on the city graph; counties get the time of their
+    first city reached. County origins are searched on the county graph and
+    cities inherit their county's arrival time.
+    """
+    from wa_artifact import get_artifact
+
+    artifact = get_artifact()
+    key = (artifact.data_version, "city" if origin_is_city else "county", origin)
+    cached = _arrival_cache.get(key)
+    if cached is not None:
+        return cached
+
+    county_graph = get_route_graph(wa_county_graph)
+    city_graph = get_city_route_graph()
+    city_county = np.asarray(artifact.city_county)
+    if origin_is_city:
+        city_times = city_graph.distance_rows([city_graph.id_of(origin)])[0]
+        county_times = np.full(len(county_graph), np.inf)
+        np.minimum.at(county_times, city_county, city_times)
+    else:
+        county_times = county_graph.distance_rows([county_graph.id_of(origin)])[0]
+        city_times = county_times[city_county]
+
+    cached = (county_times, city_times)
+    _arrival_cache[key] = cached
+    return cached
+
+
+@traced("isochrone")
+def reachable_within(origin, budget_seconds, origin_is_city=False):
+    """Counties and cities reachable from origin within the budget.
+    Returns {'counties': {name: seconds}, 'cities': {name: seconds}}, each
+    ordered by arrival time.
+    """
+    county_times, city_times = arrival_times(origin, origin_is_city)
+    county_graph = get_route_graph(wa_county_graph)
+    city_graph = get_city_route_graph()
+
+    result = {}
+    for kind, times, names in (("counties", county_times, county_graph.names),
+                               ("cities", city_times, city_graph.names)):
+        reachable = np.flatnonzero(times <= budget_seconds)
+        reachable = reachable[np.argsort(times[reachable], kind="stable")]
+        result[kind] = {names[i]: int(times[i]) for i in reachable}
+    return result
+
+
+def invalidate(county_changes, city_changes):
+    """Drop cached origins whose arrival times the (u, v, old, new) edge
+    changes of the county and city graphs can affect; others stay warm.
+    """
+    from route_graph import row_affected
+
+    for key, (county_times, city_times) in list(_arrival_cache.items()):
+        # City origins are searched on the city graph only
+        if row_affected(city_times if key[1] == "city" else county_times,
+                        city_changes if key[1] == "city" else county_changes):
+            del _arrival_cache[key]
+
+
+def forget_data_version(data_version):
+    """Drop origins cached for an old artifact data version."""
+    for key in [key for key in _arrival_cache if key[0] == data_version]:
+        del _arrival_cache[key]
+
+
+def clear_cache():
+    _arrival_cache.clear()
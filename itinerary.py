@@ -0,0 +1,66 @@
+# itinerary.py
+# Splitting a long route into driving days. Overnight stops can be any route
+# city with known coordinates (city_coords); the split uses the fewest days
+# that keep each day's driving under the daily limit.
+#
+# Days are found with a DP over the cumulative drive time at each stop, from
+# the destination back: days[a] is the fewest days from stop a to the end,
+# driving on to the furthest stop within one day's drive of a. days never
+# increases along the route, so that furthest stop is always the best one,
+# and it only moves back as a does: one pass over the stops, instead of trying
+# every split. Every split of a route drives the same total time, so the
+# fewest days is the whole objective; driving as far as possible each day
+# leaves the last day the short one.
+
+from tracing import traced
+from wa_counties import city_coords
+
+
+@traced("itinerary")
+def plan_itinerary(segments, max_day_seconds):
+    """Split a route into days of at most max_day_seconds of driving.
+
+    segments: the route's legs in order, dicts with 'from_county',
+    'to_county', 'from_city', 'to_city' (or None) and 'time' (seconds).
+    Returns one dict per day with 'from' and 'to' (city, or county without
+    one), 'time' (seconds), 'legs' (number of segments) and 'over_limit'
+    (True when the stretch between two consecutive possible stops is longer
+    than the limit, so that day can't be kept under it). Empty for an empty
+    route.
+    """
+    if not segments:
+        return []
+
+    # Stop k sits after segments[:k]; cum[k] is the drive time to it
+    cum = [0]
+    for segment in segments:
+        cum.append(cum[-1] + segment['time'])
+    stops = [0] + [k for k in range(1, len(segments))
+                   if segments[k - 1]['to_city'] in city_coords] + [len(segments)]
+
+    days = [0] * len(stops)
+    nxt = [0] * len(stops)
+    b = len(stops) - 1
+    for a in range(len(stops) - 2, -1, -1):
+        # Furthest stop within a day's drive; if even the next one isn't,
+        # that stretch becomes a day of its own
+        while b > a + 1 and cum[stops[b]] - cum[stops[a]] > max_day_seconds:
+            b -= 1
+        days[a] = days[b] + 1
+        nxt[a] = b
+
+    plan = []
+    a = 0
+    while a < len(stops) - 1:
+        b = nxt[a]
+        first, last = segments[stops[a]], segments[stops[b] - 1]
+        seconds = cum[stops[b]] - cum[stops[a]]
+        plan.append({
+            'from': first['from_city'] or first['from_county'],
+            'to': last['to_city'] or last['to_county'],
+            'time': seconds,
+            'legs': stops[b] - stops[a],
+            'over_limit': seconds > max_day_seconds,
+        })
+        a = b
+    return plan
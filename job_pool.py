@@ -0,0 +1,383 @@
+# job_pool.py
+# Shared, bounded process pool for CPU-heavy planner jobs (route
+# optimization), so one user's big search runs on another core instead of
+# holding the GIL the Streamlit session threads share.
+#
+# The UI submits a job by name and polls it on later reruns (or in a short
+# sleep loop) with submit()/poll(). Fairness: each user may have at most
+# max_jobs_per_user jobs queued or running, and at most max_workers jobs are
+# handed to the executor at a time; the rest wait in per-user queues served
+# round-robin, so a user with many jobs can't starve the others. Identical
+# jobs share one run, and finished results are kept in an LRU cache keyed by
+# the job and the reference data version and road conditions it ran on.
+# Cancelling the last job of a running run raises that run's flag in a small
+# shared array (one slot per worker, handed to workers when they start), and
+# the job stops at its next step.
+#
+# Workers are spawned (forking the threaded Streamlit server is unsafe), and
+# before each job a worker brings its reference data and road conditions in
+# line with the ones the job was submitted under. The submitting process
+# publishes the data plane (see data_plane.py) and workers attach it, so the
+# county geometry and the city graph's CSR arrays exist once in memory however
+# many workers run; each worker still keeps its own neighbor lists for searches.
+
+import collections
+import concurrent.futures
+import contextlib
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+
+from memory_accounting import drop_oldest, register_cache
+
+MAX_WORKERS = int(os.environ.get("WA_JOB_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+MAX_JOBS_PER_USER = int(os.environ.get("WA_JOB_USER_LIMIT", "2"))
+MAX_QUEUED = 64
+RESULT_CACHE_SIZE = 256
+# Finished jobs are forgotten this long after they were submitted
+JOB_TTL = 600.0
+
+
+class JobRejected(Exception):
+    """Raised by submit() when the user or the pool has too many jobs queued."""
+
+
+# In a worker: the pool's cancel flags and the slot of the job running now
+_worker_cancel = [None, None]
+
+
+def cancel_requested():
+    """True in a worker whose current job was cancelled; long jobs check it
+    between steps and return early.
+    """
+    flags, slot = _worker_cancel
+    return flags is not None and slot is not None and bool(flags[slot])
+
+
+def _optimize_route(start, end, must_visit, budget):
+    from route_planner import iter_optimal_routes
+    from wa_counties import wa_county_graph
+
+    deadline = time.perf_counter() + budget
+    best = None
+    for step in iter_optimal_routes(wa_county_graph, start, end, must_visit):
+        if step['route'] is not None:
+            best = step
+        if time.perf_counter() >= deadline or cancel_requested():
+            break
+    if best is None:
+        return None
+    return {key: best[key] for key in ('route', 'time', 'lower_bound', 'optimal', 'explored', 'elapsed')}
+
+
+# Job functions by name; arguments must be picklable and hashable
+JOBS = {
+    'optimize_route': _optimize_route,
+}
+
+
+_worker_plane = [None]
+
+
+def _sync_worker_state(data_version, conditions, plane_path):
+    import data_plane
+    import road_conditions
+    import wa_counties
+
+    if wa_counties.data_version != data_version:
+        data = wa_counties.ReferenceData.load(wa_counties.DATA_DIR)
+        if data.data_version != wa_counties.data_version:
+            wa_counties.install_reference_data(data)
+    new_plane = False
+    if plane_path is not None and _worker_plane[0] != plane_path:
+        try:
+            data_plane.install(data_plane.attach(plane_path))
+            _worker_plane[0] = plane_path
+            new_plane = True
+        except (OSError, ValueError):
+            # Not readable here, or for another data version: build our own
+            pass
+    # A newly installed city graph starts from base drive times
+    if new_plane or road_conditions.active_conditions() != conditions:
+        road_conditions.apply_conditions(conditions)
+    return wa_counties.data_version
+
+
+def _run_job(name, args, slot, data_version, conditions, plane_path=None):
+    """Worker entry point: run JOBS[name](*args) on the submitter's data,
+    with cancel flag `slot`. Returns (result, data version it ran on).
+    """
+    _worker_cancel[1] = slot
+    try:
+        version = _sync_worker_state(data_version, conditions, plane_path)
+        return JOBS[name](*args), version
+    finally:
+        _worker_cancel[1] = None
+
+
+def _warm_up(cancel_flags):
+    from route_graph import get_route_graph
+    from wa_counties import wa_county_graph
+
+    _worker_cancel[0] = cancel_flags
+    # Build the county routing graph the jobs search before the first job
+    # arrives; the city graph comes with the data plane the job attaches
+    get_route_graph(wa_county_graph)
+
+
+@contextlib.contextmanager
+def _plain_main():
+    # Streamlit installs the running script as __main__, and spawned workers
+    # re-run __main__ on start; launch them with an empty one instead
+    main = sys.modules.get('__main__')
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+_published_planes = {}
+_publish_lock = threading.Lock()
+
+
+def _plane_path():
+    """Data plane for the current data and borders, published on first use
+    (None if disabled or it can't be written).
+    """
+    import county_polygons
+    import data_plane
+    import wa_artifact
+
+    if not data_plane.ENABLED:
+        return None
+    key = (wa_artifact.get_artifact().data_version, id(county_polygons.get_county_polygon_index()))
+    with _publish_lock:
+        if key not in _published_planes:
+            try:
+                path = data_plane.publish()
+            except OSError:
+                path = None
+            _published_planes.clear()
+            _published_planes[key] = path
+        return _published_planes[key]
+
+
+def _current_state():
+    import road_conditions
+    import wa_counties
+
+    return wa_counties.data_version, road_conditions.active_conditions()
+
+
+class JobPool:
+    """Bounded process pool with per-user fair queueing and a result cache.
+
+    A job is one user's request; identical jobs share a run (a dict with
+    'state' of 'queued', 'running', 'done', 'failed' or 'cancelled',
+    'result' and 'error'). Per-user queues hold the keys of queued runs, and
+    each running run holds one of max_workers cancel flag slots.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_jobs_per_user=MAX_JOBS_PER_USER,
+                 max_queued=MAX_QUEUED, cache_size=RESULT_CACHE_SIZE):
+        self.max_workers = max_workers
+        self.max_jobs_per_user = max_jobs_per_user
+        self.max_queued = max_queued
+        self.cache_size = cache_size
+        self.results = collections.OrderedDict()
+        self._jobs = {}
+        self._runs = {}  # key -> run still queued or running
+        self._queues = collections.OrderedDict()  # user -> deque of run keys
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._executor = None
+        context = multiprocessing.get_context("spawn")
+        self._cancel_flags = context.RawArray('b', max_workers)
+        self._free_slots = list(range(max_workers))
+
+    def _executor_or_start(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up, initargs=(self._cancel_flags,))
+        return self._executor
+
+    @staticmethod
+    def _state(job):
+        return 'cancelled' if job['cancelled'] else job['run']['state']
+
+    def submit(self, user, name, *args):
+        """Queue JOBS[name](*args) for `user`; returns the job ID. A cached
+        result finishes the job at once, and a job identical to one queued or
+        running shares its run. Raises JobRejected when the user already has
+        max_jobs_per_user jobs pending or the pool max_queued.
+        """
+        if name not in JOBS:
+            raise ValueError(f"Unknown job {name}")
+        data_version, conditions = _current_state()
+        key = (name, args, data_version, tuple((c['from'], c['to'], c['factor']) for c in conditions))
+        # Publishing can take a while the first time; other sessions keep
+        # using the pool meanwhile
+        plane_path = _plane_path()
+        with self._lock:
+            self._forget_finished()
+            job = {'id': next(self._ids), 'user': user, 'run': None, 'cancelled': False,
+                   'submitted': time.time()}
+            if key in self.results:
+                self.results.move_to_end(key)
+                job['run'] = {'key': key, 'state': 'done', 'result': self.results[key], 'error': None,
+                              'jobs': set()}
+            elif key in self._runs and not self._runs[key]['cancelled']:
+                job['run'] = self._runs[key]
+            else:
+                pending = sum(1 for other in self._jobs.values()
+                              if other['user'] == user and self._state(other) in ('queued', 'running'))
+                if pending >= self.max_jobs_per_user:
+                    raise JobRejected(f"{user} already has {pending} jobs pending")
+                if sum(len(queue) for queue in self._queues.values()) >= self.max_queued:
+                    raise JobRejected("The job queue is full")
+                job['run'] = self._runs[key] = {
+                    'key': key, 'name': name, 'args': args, 'sync': (data_version, conditions, plane_path),
+                    'state': 'queued', 'result': None, 'error': None, 'jobs': set(), 'finished': None,
+                    'slot': None, 'cancelled': False}
+                self._queues.setdefault(user, collections.deque()).append(key)
+            job['run']['jobs'].add(job['id'])
+            self._jobs[job['id']] = job
+            self._dispatch()
+            return job['id']
+
+    def _dispatch(self):
+        """Hand queued runs to the executor, one user at a time in turn."""
+        while self._free_slots and self._queues:
+            user, queue = next(iter(self._queues.items()))
+            run = self._runs[queue.popleft()]
+            # Served users go to the back of the line
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+            run['state'] = 'running'
+            run['slot'] = slot = self._free_slots.pop()
+            self._cancel_flags[slot] = 0
+            with _plain_main():
+                try:
+                    future = self._executor_or_start().submit(_run_job, run['name'], run['args'], slot, *run['sync'])
+                except concurrent.futures.process.BrokenProcessPool:
+                    # A worker died; start a fresh pool for this and later runs
+                    self._executor = None
+                    future = self._executor_or_start().submit(_run_job, run['name'], run['args'], slot, *run['sync'])
+            future.add_done_callback(lambda future, run=run: self._done(run, future))
+
+    def _done(self, run, future):
+        with self._lock:
+            # A cancelled run may already have been replaced by a new one
+            if self._runs.get(run['key']) is run:
+                del self._runs[run['key']]
+            self._free_slots.append(run['slot'])
+            run['finished'] = time.time()
+            if future.cancelled() or run['cancelled']:
+                run['state'] = 'cancelled'
+            elif future.exception() is not None:
+                run['state'], run['error'] = 'failed', repr(future.exception())
+            else:
+                result, version = future.result()
+                run['state'], run['result'] = 'done', result
+                # A worker that couldn't load the submitter's data version
+                # still answers, but the result isn't cached under that version
+                if version == run['key'][2]:
+                    self.results[run['key']] = result
+                    if len(self.results) > self.cache_size:
+                        self.results.popitem(last=False)
+            self._dispatch()
+
+    def _forget_finished(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['submitted'] < cutoff and self._state(job) not in ('queued', 'running')]:
+            del self._jobs[job_id]
+
+    def poll(self, job_id):
+        """State of a job: dict with 'id', 'state', 'result', 'error',
+        'position' (runs ahead of it in the queue, for queued jobs) and
+        'elapsed' seconds since submission. None for unknown or expired jobs.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            state = self._state(job)
+            run = job['run']
+            return {'id': job_id, 'state': state,
+                    'result': run['result'] if state == 'done' else None,
+                    'error': run['error'] if state == 'failed' else None,
+                    'position': self._queue_position(run['key']) if state == 'queued' else None,
+                    'elapsed': time.time() - job['submitted']}
+
+    def _queue_position(self, key):
+        # Runs served before this one under round-robin: every user's queue
+        # contributes up to this run's depth in its own queue
+        for queue in self._queues.values():
+            if key in queue:
+                depth = list(queue).index(key)
+                return sum(min(len(other), depth + 1) for other in self._queues.values()) - 1
+        return 0
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. Once no other job shares its run,
+        a queued run is dropped and a running one is told to stop at its next
+        step. Returns True if the job was cancelled.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or self._state(job) not in ('queued', 'running'):
+                return False
+            job['cancelled'] = True
+            run = job['run']
+            run['jobs'].discard(job_id)
+            if not any(not self._jobs[other]['cancelled'] for other in run['jobs'] if other in self._jobs):
+                run['cancelled'] = True
+                if run['state'] == 'running':
+                    # Its slot is freed when the worker returns
+                    self._cancel_flags[run['slot']] = 1
+                    return True
+                for user, queue in list(self._queues.items()):
+                    if run['key'] in queue:
+                        queue.remove(run['key'])
+                        if not queue:
+                            del self._queues[user]
+                run['state'] = 'cancelled'
+                self._runs.pop(run['key'], None)
+            return True
+
+    def stats(self):
+        """Counts of jobs by state, plus 'workers' and 'cached_results'."""
+        with self._lock:
+            counts = collections.Counter(self._state(job) for job in self._jobs.values())
+            return {**counts, 'workers': self.max_workers, 'cached_results': len(self.results)}
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool = []
+_pool_lock = threading.Lock()
+
+
+def get_job_pool():
+    """The process-wide JobPool, created on first use."""
+    with _pool_lock:
+        if not _pool:
+            _pool.append(JobPool())
+    return _pool[0]
+
+
+register_cache("job_results", lambda: [_pool[0].results] if _pool else [],
+               evict=lambda fraction: _pool and drop_oldest(_pool[0].results, fraction),
+               description="Finished optimization job results")
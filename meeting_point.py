@@ -0,0 +1,72 @@
+# meeting_point.py
+# Group meeting-point finder: given several travellers' starting cities, rank
+# candidate meeting cities by the longest or the total drive time. The whole
+# origins x candidates drive-time matrix is computed in one batched pass and
+# ranked with a vectorized reduction.
+
+import os
+
+import numpy as np
+
+from route_graph import get_city_route_graph
+from tracing import traced
+from wa_counties import city_coords, city_to_county, query_ors_duration_matrix
+
+OBJECTIVES = ("max", "total")
+
+
+def travel_time_matrix(origins, candidates=None, use_apis=True):
+    """Drive times (seconds) from each origin city to each candidate city.
+    Returns (matrix, candidate_names) where matrix has shape
+    (len(origins), len(candidates)) and inf marks unreachable pairs.
+
+    With ORS_API_KEY set this is one provider matrix request; otherwise (or if
+    the request fails) rows come from the city graph's cached search trees.
+    """
+    city_graph = get_city_route_graph()
+    if candidates is None:
+        candidates = city_graph.names
+
+    ors_key = os.environ.get('ORS_API_KEY') if use_apis else None
+    if ors_key and all(c in city_coords for c in list(origins) + list(candidates)):
+        rows = query_ors_duration_matrix([city_coords[c] for c in origins],
+                                         [city_coords[c] for c in candidates], ors_key)
+        if rows is not None:
+            matrix = np.array([[np.inf if t is None else t for t in row] for row in rows], dtype=np.float64)
+            return matrix, list(candidates)
+
+    rows = city_graph.distance_rows(city_graph.ids_of(origins))
+    return rows[:, city_graph.ids_of(candidates)], list(candidates)
+
+
+@traced("meeting_point")
+def find_meeting_points(origins, objective="max", candidates=None, top=10, use_apis=True):
+    """Rank meeting cities for a group starting in `origins` (city names).
+
+    objective: "max" minimizes the longest anyone drives, "total" minimizes the
+    sum of everyone's driving; the other measure breaks ties.
+    Returns up to `top` dicts with 'city', 'county', 'max_time', 'total_time'
+    and 'times' (origin -> seconds), best first.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, got {objective!r}")
+    if not origins:
+        return []
+
+    matrix, names = travel_time_matrix(origins, candidates, use_apis=use_apis)
+    max_time = matrix.max(axis=0)
+    total_time = matrix.sum(axis=0)
+    primary, secondary = (max_time, total_time) if objective == "max" else (total_time, max_time)
+
+    order = np.lexsort((secondary, primary))
+    order = order[np.isfinite(primary[order])]
+    if top is not None:
+        order = order[:top]
+
+    return [{
+        'city': names[j],
+        'county': city_to_county.get(names[j]),
+        'max_time': int(max_time[j]),
+        'total_time': int(total_time[j]),
+        'times': {origin: int(matrix[i, j]) for i, origin in enumerate(origins)},
+    } for j in order]
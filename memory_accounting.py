@@ -0,0 +1,278 @@
+# memory_accounting.py
+# Where the server's memory goes. Long-lived caches register here (the module
+# that owns a cache registers it next to its definition) with a function
+# returning their containers and, if they can shrink, an evict function. Sizes
+# are approximate deep sizes: containers are walked, large ones through a
+# sample scaled up to their length, and numpy arrays count the buffers they own
+# (memory-mapped artifact arrays count only their headers).
+#
+# Each app rerun records its session's state with record_session() and calls
+# maybe_enforce(), which at most every ENFORCE_INTERVAL seconds checks the
+# caches that have a budget and evicts their oldest entries down to
+# LOW_WATER of the budget, so the footprint stays flat on a long-running
+# server. Budgets are in MB, set with WA_MEMORY_BUDGETS="drive_time=16,
+# isochrones=8" or set_budget(). take_snapshot() gives the top allocation
+# sites from tracemalloc on demand; tracing every allocation slows the whole
+# server, so tracemalloc started that way is stopped by stop_tracemalloc() or
+# by maybe_enforce() once no snapshot was taken for TRACEMALLOC_TTL seconds.
+
+import collections
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+from tracing import traced
+
+# Evict down to this fraction of the budget, so a cache doesn't hover at it
+LOW_WATER = 0.8
+ENFORCE_INTERVAL = 30.0
+# Sessions not seen for this long are dropped from the session report
+SESSION_TTL = 3600.0
+# Containers longer than this are sized from a sample of their items
+SAMPLE_SIZE = 256
+# tracemalloc started by take_snapshot() is stopped after this long without a snapshot
+TRACEMALLOC_TTL = 300.0
+
+_OPAQUE = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType,
+           types.MethodType, threading.Thread)
+
+_caches = {}
+_budgets = {}
+_sessions = {}
+_lock = threading.Lock()
+_last_enforced = 0.0
+_last_snapshot = None
+_last_snapshot_at = None  # monotonic time, while tracemalloc runs because of take_snapshot()
+
+
+def approx_size(obj, sample=SAMPLE_SIZE):
+    """Approximate deep size of obj in bytes. Modules, classes and functions
+    it references are not counted.
+    """
+    seen = set()
+    total = 0.0
+    stack = [(obj, 1.0)]
+    while stack:
+        item, weight = stack.pop()
+        if id(item) in seen or isinstance(item, _OPAQUE):
+            continue
+        seen.add(id(item))
+        total += weight * sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, complex, bool)) or item is None:
+            continue
+        if isinstance(item, dict):
+            children = item.items()
+        elif isinstance(item, (list, tuple, set, frozenset, collections.deque)):
+            children = item
+        elif hasattr(item, "__array_interface__"):
+            # sys.getsizeof of an ndarray includes the buffer it owns
+            continue
+        else:
+            children = [getattr(item, "__dict__", None)]
+            for cls in type(item).__mro__:
+                slots = cls.__dict__.get("__slots__", ())
+                children += [getattr(item, slot, None) for slot in ([slots] if isinstance(slots, str) else slots)]
+            children = [child for child in children if child is not None]
+        n = len(children)
+        child_weight = weight * n / sample if n > sample else weight
+        for child in itertools.islice(children, sample):
+            if isinstance(item, dict):
+                stack.append((child[0], child_weight))
+                stack.append((child[1], child_weight))
+            else:
+                stack.append((child, child_weight))
+    return int(total)
+
+
+def drop_oldest(mapping, fraction, keep=0):
+    """Delete about `fraction` of a dict's entries, oldest inserted first,
+    always leaving the newest `keep`. Returns the number deleted.
+    """
+    count = max(min(int(len(mapping) * fraction + 0.999), len(mapping) - keep), 0)
+    if not count:
+        return 0
+    for key in list(itertools.islice(mapping, count)):
+        mapping.pop(key, None)
+    # A dict's table never shrinks on deletion; rebuilding it in place does
+    remaining = dict(mapping)
+    mapping.clear()
+    mapping.update(remaining)
+    return count
+
+
+def register_cache(name, containers, evict=None, budget_mb=None, description=""):
+    """Register a cache for reports and budgets.
+
+    containers: zero-argument callable returning the cache's containers (a
+    list; its entries are the sum of their lengths). evict: callable taking
+    the fraction of the cache to drop, oldest first. budget_mb: default
+    budget, overridden by WA_MEMORY_BUDGETS.
+    """
+    _caches[name] = {'containers': containers, 'evict': evict, 'description': description}
+    if budget_mb is not None:
+        _budgets.setdefault(name, budget_mb)
+
+
+def set_budget(name, budget_mb):
+    """Set a cache's budget in MB (None removes it)."""
+    if budget_mb is None:
+        _budgets.pop(name, None)
+    else:
+        _budgets[name] = float(budget_mb)
+
+
+def budgets():
+    return dict(_budgets)
+
+
+def _parse_budgets(text):
+    parsed = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, sep, value = item.partition("=")
+        try:
+            parsed[name.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"WA_MEMORY_BUDGETS: expected name=MB, got {item!r}") from None
+        if not sep:
+            raise ValueError(f"WA_MEMORY_BUDGETS: expected name=MB, got {item!r}")
+    return parsed
+
+
+# Explicit settings win over the defaults passed to register_cache
+_budgets.update(_parse_budgets(os.environ.get("WA_MEMORY_BUDGETS", "")))
+
+
+def cache_size(name):
+    """(approximate bytes, entries) of a registered cache."""
+    containers = _caches[name]['containers']()
+    return approx_size(containers), sum(len(container) for container in containers)
+
+
+def cache_report():
+    """One dict per registered cache, largest first: name, description,
+    bytes, entries, budget_bytes (None without a budget) and over_budget.
+    """
+    rows = []
+    for name, cache in list(_caches.items()):
+        size, entries = cache_size(name)
+        budget = _budgets.get(name)
+        budget_bytes = None if budget is None else int(budget * 2**20)
+        rows.append({
+            'name': name,
+            'description': cache['description'],
+            'bytes': size,
+            'entries': entries,
+            'budget_bytes': budget_bytes,
+            'over_budget': budget_bytes is not None and size > budget_bytes,
+        })
+    return sorted(rows, key=lambda row: row['bytes'], reverse=True)
+
+
+@traced("memory.enforce")
+def enforce_budgets():
+    """Evict from every cache over its budget down to LOW_WATER of it.
+    Returns (name, bytes before, bytes after) for each cache evicted from.
+    """
+    global _last_enforced
+    evicted = []
+    with _lock:
+        _last_enforced = time.monotonic()
+        for name, budget in list(_budgets.items()):
+            cache = _caches.get(name)
+            if cache is None or cache['evict'] is None:
+                continue
+            before, _ = cache_size(name)
+            limit = budget * 2**20
+            if before <= limit:
+                continue
+            cache['evict'](1.0 - LOW_WATER * limit / before)
+            evicted.append((name, before, cache_size(name)[0]))
+    return evicted
+
+
+def maybe_enforce(interval=ENFORCE_INTERVAL):
+    """enforce_budgets() if it last ran more than `interval` seconds ago.
+    Also stops tracemalloc left running by take_snapshot().
+    """
+    if _last_snapshot_at is not None and time.monotonic() - _last_snapshot_at > TRACEMALLOC_TTL:
+        stop_tracemalloc()
+    if time.monotonic() - _last_enforced < interval:
+        return []
+    return enforce_budgets()
+
+
+def record_session(session_id, state):
+    """Record the approximate size of one session's state (a mapping) for
+    session_report(); forgets sessions idle for SESSION_TTL. Returns bytes.
+    """
+    size = approx_size(dict(state))
+    now = time.time()
+    with _lock:
+        _sessions[session_id] = {'session': session_id, 'bytes': size, 'keys': len(state), 'seen': now}
+        for stale in [sid for sid, entry in _sessions.items() if now - entry['seen'] > SESSION_TTL]:
+            del _sessions[stale]
+    return size
+
+
+def session_report():
+    """Recorded sessions, largest state first."""
+    with _lock:
+        rows = [dict(entry) for entry in _sessions.values()]
+    return sorted(rows, key=lambda row: row['bytes'], reverse=True)
+
+
+def process_rss():
+    """Resident set size of the process in bytes, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def take_snapshot(limit=15, frames=1):
+    """Top allocation sites from tracemalloc, largest first, as dicts with
+    'where', 'bytes', 'count' and 'growth' (bytes since the previous snapshot,
+    or None for the first). Starts tracemalloc if it isn't running; only
+    allocations made after that are seen, so the first call returns [].
+    """
+    global _last_snapshot, _last_snapshot_at
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        _last_snapshot = None
+        _last_snapshot_at = time.monotonic()
+        return []
+    if _last_snapshot_at is not None:
+        _last_snapshot_at = time.monotonic()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    if _last_snapshot is None:
+        stats = [(stat, None) for stat in snapshot.statistics("lineno")]
+    else:
+        stats = [(stat, stat.size_diff) for stat in snapshot.compare_to(_last_snapshot, "lineno")]
+        stats.sort(key=lambda pair: pair[0].size, reverse=True)
+    _last_snapshot = snapshot
+    rows = []
+    for stat, growth in stats[:limit]:
+        frame = stat.traceback[0]
+        rows.append({'where': f"{frame.filename}:{frame.lineno}", 'bytes': stat.size,
+                     'count': stat.count, 'growth': growth})
+    return rows
+
+
+def tracemalloc_running():
+    return tracemalloc.is_tracing()
+
+
+def stop_tracemalloc():
+    """Stop tracemalloc and drop the kept snapshot."""
+    global _last_snapshot, _last_snapshot_at
+    _last_snapshot = None
+    _last_snapshot_at = None
+    tracemalloc.stop()
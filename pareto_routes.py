@@ -0,0 +1,121 @@
+# pareto_routes.py
+# Multi-criteria routing over the county RouteGraph: every route that is
+# Pareto-optimal over (drive time, road distance, counties visited), so users
+# can trade a faster trip against fewer miles or a more scenic one that passes
+# through more counties.
+#
+# A label-setting search (Martins' algorithm) extends partial routes in
+# increasing drive time. Each node keeps the labels settled at it, and a new
+# label is dropped when a settled one is no worse on all three criteria
+# (faster or equal, shorter or equal, at least as many counties) and can still
+# finish every way the new one can. Routes are loopless, so that last check
+# matters: a settled label that visited a county the new one didn't only
+# dominates it if no continuation within the time cap could pass through that
+# county. Routes slower than max_time_factor times the fastest are not
+# considered, which bounds how many counties a route can collect.
+
+import bisect
+import heapq
+
+from tracing import traced
+from wa_counties import get_road_distance
+
+# Give up after settling this many labels and return what has been found
+MAX_LABELS = 50000
+
+
+def _dominated(labels, dist, count, visited, reach):
+    # Settled labels were popped no later, so they are never slower; `reach`
+    # is the mask of nodes a continuation of the new label could still use
+    for other_dist, other_count, other_visited in labels:
+        if other_dist <= dist and other_count >= count and not other_visited & ~visited & reach:
+            return True
+    return False
+
+
+def _reach_tables(route_graph, nodes, to_target):
+    """Per node u: (sorted slacks, masks) where masks[k] holds the nodes x with
+    time(u, x) + time(x, target) <= slacks[k], i.e. the nodes a route at u with
+    that much time left before the cap could still pass through.
+    """
+    tables = {}
+    for u in nodes:
+        dist = route_graph.dijkstra(u)[0]
+        slacks, masks, mask = [], [], 0
+        for need, x in sorted((dist[x] + to_target[x], x) for x in nodes):
+            mask |= 1 << x
+            slacks.append(need)
+            masks.append(mask)
+        tables[u] = (slacks, masks)
+    return tables
+
+
+def _reach(tables, u, slack, target):
+    if u == target:
+        # Routes end at the target
+        return 0
+    slacks, masks = tables[u]
+    k = bisect.bisect_right(slacks, slack)
+    return masks[k - 1] if k else 0
+
+
+@traced("pareto")
+def pareto_routes(route_graph, start, end, max_time_factor=1.5, max_labels=MAX_LABELS):
+    """Pareto-optimal routes between two counties, fastest first.
+    Returns a list of dicts with 'route' (names), 'time' (seconds),
+    'distance_km' and 'counties' (number of counties on the route).
+    """
+    if start not in route_graph or end not in route_graph:
+        return []
+    source, target = route_graph.id_of(start), route_graph.id_of(end)
+    # Drive times are symmetric: the tree rooted at the target gives every
+    # node's fastest time to it, a lower bound for the time cap
+    to_target, _ = route_graph.dijkstra(target)
+    if to_target[source] == float('inf'):
+        return []
+    time_cap = to_target[source] * max_time_factor
+    from_source, _ = route_graph.dijkstra(source)
+    nodes = [u for u in range(len(route_graph)) if from_source[u] + to_target[u] <= time_cap]
+    tables = _reach_tables(route_graph, nodes, to_target)
+
+    names = route_graph.names
+    distances = [[get_road_distance(names[u], names[v]) or 0.0 for v in route_graph.neighbors(u)]
+                 for u in range(len(names))]
+
+    settled = [[] for _ in names]  # node -> [(distance, counties, visited)] of settled labels
+    found = []
+    # Heap entries: (time, distance, -counties, tie-break, node, visited mask, parent entry)
+    start_entry = (0, 0.0, -1, 0, source, 1 << source, None)
+    heap = [start_entry]
+    pushed = 1
+    popped = 0
+    while heap and popped < max_labels:
+        entry = heapq.heappop(heap)
+        time, dist, neg_count, _, u, visited, _ = entry
+        if _dominated(settled[u], dist, -neg_count, visited, _reach(tables, u, time_cap - time, target)):
+            continue
+        settled[u].append((dist, -neg_count, visited))
+        popped += 1
+        if u == target:
+            found.append(entry)
+            continue
+        for v, w, d in zip(route_graph.neighbors(u), route_graph.neighbor_weights(u), distances[u]):
+            if visited >> v & 1 or time + w + to_target[v] > time_cap:
+                continue
+            reach = _reach(tables, v, time_cap - time - w, target)
+            if _dominated(settled[v], dist + d, 1 - neg_count, visited | 1 << v, reach):
+                continue
+            heapq.heappush(heap, (time + w, dist + d, neg_count - 1, pushed, v, visited | 1 << v, entry))
+            pushed += 1
+
+    routes = []
+    for entry in found:
+        path = []
+        node = entry
+        while node is not None:
+            path.append(node[4])
+            node = node[6]
+        path.reverse()
+        routes.append({'route': route_graph.names_of(path), 'time': int(entry[0]),
+                       'distance_km': entry[1], 'counties': -entry[2]})
+    return routes
@@ -0,0 +1,178 @@
+# road_conditions.py
+# Live road conditions: closures and slowdowns (e.g. Stevens Pass on US-2 or
+# Snoqualmie on I-90) read from a local feed file and applied to the routing
+# graphs in place. Nothing is rebuilt: edge weights change in the county and
+# city RouteGraphs, only the cached search trees those edges can affect are
+# recomputed, the matching time-matrix entries are patched and stale isochrone
+# origins are dropped. An update takes milliseconds while the app keeps serving.
+#
+# Feed format (road_conditions.json); each read replaces the previous set, and
+# pairs not listed are back to normal:
+#   {"conditions": [
+#       {"from": "King", "to": "Kittitas", "status": "closed", "note": "I-90 Snoqualmie Pass"},
+#       {"from": "Chelan", "to": "King", "factor": 1.5, "note": "US-2 chains required"}
+#   ]}
+# Conditions apply to both directions between two adjacent counties; "factor"
+# multiplies the normal drive time.
+
+import json
+import os
+import threading
+import time
+
+from wa_counties import wa_county_graph
+
+DEFAULT_FEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "road_conditions.json")
+
+CLOSED = float('inf')
+
+_active = {}
+_active_notes = {}
+_last_conditions = []
+_applied_graphs = [None, None]
+_feed_mtimes = {}
+_lock = threading.Lock()
+
+
+def _pair(a, b):
+    return (a, b) if a <= b else (b, a)
+
+
+def load_feed(path=DEFAULT_FEED_PATH):
+    """Parse a conditions feed into a list of dicts with 'from', 'to', 'factor'
+    (CLOSED for closures) and 'note'. Raises ValueError for unknown or
+    non-adjacent counties and non-positive factors.
+    """
+    with open(path, encoding="utf-8") as f:
+        feed = json.load(f)
+    conditions = []
+    for entry in feed.get("conditions", []):
+        a, b = entry["from"], entry["to"]
+        if a not in wa_county_graph or b not in wa_county_graph.get(a, []):
+            raise ValueError(f"{path}: {a} and {b} are not adjacent counties")
+        if entry.get("status") == "closed":
+            factor = CLOSED
+        else:
+            factor = float(entry.get("factor", 1.0))
+            if factor <= 0:
+                raise ValueError(f"{path}: factor for {a} - {b} must be positive")
+        conditions.append({'from': a, 'to': b, 'factor': factor, 'note': entry.get("note", "")})
+    return conditions
+
+
+def _scaled(seconds, factor):
+    if factor == CLOSED:
+        return CLOSED
+    return int(round(seconds * factor))
+
+
+def apply_conditions(conditions):
+    """Make `conditions` (as returned by load_feed) the active set, updating
+    only the pairs whose factor changed. Returns a summary dict with 'changed'
+    (county pairs), 'county_trees' and 'city_trees' (recomputed search trees)
+    and 'elapsed_ms'.
+    """
+    from isochrones import invalidate
+    from route_graph import get_city_route_graph, get_route_graph
+    from time_matrix import get_city_time_matrix, get_county_time_matrix
+    from wa_artifact import get_artifact
+
+    started = time.perf_counter()
+    wanted = {}
+    notes = {}
+    for condition in conditions:
+        pair = _pair(condition['from'], condition['to'])
+        wanted[pair] = condition['factor']
+        notes[pair] = condition['note']
+
+    with _lock:
+        artifact = get_artifact()
+        county_graph = get_route_graph(wa_county_graph)
+        city_graph = get_city_route_graph()
+        if _applied_graphs[0] is not county_graph or _applied_graphs[1] is not city_graph:
+            # Graphs rebuilt for new reference data start from base drive times
+            _active.clear()
+            _applied_graphs[:] = [county_graph, city_graph]
+
+        changed = sorted(pair for pair in set(wanted) | set(_active)
+                         if wanted.get(pair, 1.0) != _active.get(pair, 1.0)
+                         and pair[0] in county_graph and pair[1] in county_graph)
+        city_county = artifact.city_county.tolist()
+        cities_in_county = {}
+        for city, county in enumerate(city_county):
+            cities_in_county.setdefault(county, []).append(city)
+
+        county_updates, county_times = [], []
+        city_updates, city_times = [], []
+        for a, b in changed:
+            factor = wanted.get((a, b), 1.0)
+            u, v = county_graph.id_of(a), county_graph.id_of(b)
+            for x, y in ((u, v), (v, u)):
+                county_updates.append((x, y, _scaled(county_graph.base_edge_weight(x, y), factor)))
+            base = int(artifact.county_time_matrix[u, v])
+            county_times.append((u, v, None if factor == CLOSED else _scaled(base, factor)))
+
+            # City edges and pair times crossing the same county boundary
+            for x_county, y_county in ((u, v), (v, u)):
+                targets = set(cities_in_county.get(y_county, []))
+                for x in cities_in_county.get(x_county, []):
+                    for y in city_graph.neighbors(x):
+                        if y in targets:
+                            city_updates.append((x, y, _scaled(city_graph.base_edge_weight(x, y), factor)))
+            for x in cities_in_county.get(u, []):
+                for y in cities_in_county.get(v, []):
+                    base = int(artifact.city_time_matrix[x, y])
+                    if base >= 0:
+                        city_times.append((x, y, None if factor == CLOSED else _scaled(base, factor)))
+
+        county_changes, county_recomputed = county_graph.update_edge_weights(county_updates)
+        city_changes, city_recomputed = city_graph.update_edge_weights(city_updates)
+        get_county_time_matrix().set_times(county_times)
+        get_city_time_matrix().set_times(city_times)
+        invalidate(county_changes, city_changes)
+
+        _active.clear()
+        _active.update({pair: factor for pair, factor in wanted.items() if factor != 1.0})
+        _active_notes.clear()
+        _active_notes.update({pair: notes[pair] for pair in _active})
+        _last_conditions[:] = conditions
+
+    return {
+        'changed': changed,
+        'county_trees': len(county_recomputed),
+        'city_trees': len(city_recomputed),
+        'elapsed_ms': (time.perf_counter() - started) * 1000.0,
+    }
+
+
+def refresh_from_feed(path=DEFAULT_FEED_PATH):
+    """Apply the feed if the file changed since the last call (a missing file
+    means no conditions), and re-apply the current conditions if the routing
+    graphs were rebuilt for new reference data. Returns the apply_conditions()
+    summary, or None if nothing changed. A malformed feed raises load_feed()'s
+    errors on every call until it is fixed.
+    """
+    from route_graph import get_city_route_graph, get_route_graph
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if path not in _feed_mtimes or _feed_mtimes[path] != mtime:
+        conditions = load_feed(path) if mtime is not None else []
+        # Not before the load: a malformed feed keeps raising until it's fixed
+        _feed_mtimes[path] = mtime
+    elif _last_conditions and (_applied_graphs[0] is not get_route_graph(wa_county_graph)
+                               or _applied_graphs[1] is not get_city_route_graph()):
+        conditions = list(_last_conditions)
+    else:
+        return None
+    if not conditions and not _active:
+        return None
+    return apply_conditions(conditions)
+
+
+def active_conditions():
+    """Currently applied conditions as a list of dicts like load_feed()'s."""
+    return [{'from': a, 'to': b, 'factor': factor, 'note': _active_notes.get((a, b), "")}
+            for (a, b), factor in sorted(_active.items())]
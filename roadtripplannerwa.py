@@ -2,833 +2,40 @@
 # USE A VIRTUAL ENVIRONMENT TO INSTALL AND RUN THE CODE
 # NEED THE OTHER PYTHON FILE (wa_counties.py) TO USE ITS DICTIONARIES
 import streamlit as st
-from collections import deque
 from wa_counties import (wa_highway_connections, county_coords, wa_county_graph, 
-                         get_drive_time, city_coords, city_to_county, 
-                         get_cities_by_county, get_city_drive_time)
-import math
-import requests
+                         city_coords, city_to_county, get_cities_by_county)
+from route_graph import get_route_graph, get_city_route_graph
+from time_matrix import get_county_time_matrix, city_drive_time
+from alternatives import alternative_routes
+from pareto_routes import pareto_routes
+from itinerary import plan_itinerary
+from isochrones import reachable_within
+from meeting_point import find_meeting_points
+from traffic import get_traffic_profiles
+from ferries import plan_route_journey
+from road_conditions import refresh_from_feed, active_conditions
+from data_reload import get_reference_data_watcher
+from spatial_index import snap_to_place, parse_coordinates
+from county_polygons import install_county_borders
+from gazetteer import get_gazetteer, place_label, resolve_place
+from route_planner import (calculate_route_with_fastest_cities, find_ordered_route, iter_optimal_routes,
+                           format_drive_time, format_clock)
+from route_maps import load_county_borders, plot_map, show_interactive_map
+from memory_accounting import (cache_report, enforce_budgets, maybe_enforce, process_rss, record_session,
+                               session_report, stop_tracemalloc, take_snapshot, tracemalloc_running)
+from job_pool import get_job_pool, JobRejected
+from tracing import span, begin_trace, end_trace, record_duration, summarize, export_jsonl, prometheus_text
+import datetime
+import io
 
 import shelve
 import time
-import matplotlib
-# Use a non-interactive backend suitable for headless servers (Streamlit hosting)
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import json
 import os
 
-# Try to import interactive map libraries; if unavailable we'll fall back to matplotlib
-try:
-    import pandas as pd
-    import pydeck as pdk
-    _HAS_PYDECK = True
-except Exception:
-    _HAS_PYDECK = False
-
-# Try to import shapely and geopandas for county borders
-try:
-    import geopandas as gpd
-    from shapely.geometry import Point, Polygon
-    _HAS_GEOPANDAS = True
-except Exception:
-    _HAS_GEOPANDAS = False
-
 # Use the graph from wa_counties module
 wa_graph = wa_county_graph
 
 
-def create_simple_county_borders():
-    """Create simplified rectangular county borders as a fallback."""
-    features = []
-    
-    # Create approximate rectangular boundaries for each county
-    for county, (lat, lon) in county_coords.items():
-        # Create a small box around each county center
-        size = 0.3  # degrees
-        features.append({
-            "type": "Feature",
-            "properties": {"name": county},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [lon - size, lat - size],
-                    [lon + size, lat - size],
-                    [lon + size, lat + size],
-                    [lon - size, lat + size],
-                    [lon - size, lat - size]
-                ]]
-            }
-        })
-    
-    return {
-        "type": "FeatureCollection",
-        "features": features
-    }
-
-
-def download_county_borders():
-    """Download Washington state county borders from online source."""
-    
-    urls = [
-        "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json",
-        "https://raw.githubusercontent.com/deldersveld/topojson/master/countries/us-states/WA-53-washington-counties.json"
-    ]
-    
-    for url in urls:
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Filter for Washington state if needed
-                if 'features' in data:
-                    # Check if it's US-wide and filter for WA (FIPS code 53)
-                    wa_features = [f for f in data['features'] 
-                                 if f.get('properties', {}).get('STATE', '')[:2] == '53' or
-                                    f.get('id', '')[:2] == '53']
-                    if wa_features:
-                        data['features'] = wa_features
-                        return data
-                return data
-        except:
-            continue
-    
-    # If all downloads fail, return simplified borders
-    return create_simple_county_borders()
-
-
-def load_county_borders():
-    """Load Washington state county borders from a GeoJSON file or download if not available."""
-    geojson_path = os.path.join(os.path.dirname(__file__), 'wa_counties.geojson')
-    
-    # Try to load existing file
-    if os.path.exists(geojson_path):
-        try:
-            with open(geojson_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            st.warning(f"Failed to load existing county borders: {e}")
-    
-    # Try to download if file doesn't exist
-    try:
-        data = download_county_borders()
-        if data:
-            # Save for future use
-            try:
-                with open(geojson_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f)
-            except:
-                pass  # Continue even if we can't save
-            return data
-    except Exception as e:
-        # Last resort: return simplified borders
-        return create_simple_county_borders()
-    
-    return create_simple_county_borders()
-
-
-def plot_map(graph, coords, route=None, show_edges=True, show_labels=True, geojson=None, route_cities=None):
-    """Create a matplotlib figure plotting counties and adjacency lines.
-    route: ordered list of county names to highlight as the route (drawn in red).
-    route_cities: dictionary mapping counties to their selected cities.
-    """
-    fig, ax = plt.subplots(figsize=(14, 10))
-
-    # Draw county borders from GeoJSON if available
-    if geojson and _HAS_GEOPANDAS:
-        try:
-            gdf = gpd.GeoDataFrame.from_features(geojson['features'])
-            gdf.plot(ax=ax, facecolor='lightgray', edgecolor='black', linewidth=0.8, alpha=0.3, zorder=0)
-        except Exception as e:
-            st.warning(f"Could not plot county borders: {e}")
-    elif geojson:
-        # Fallback to matplotlib patches if geopandas not available
-        try:
-            from matplotlib.patches import Polygon as MplPolygon
-            for feature in geojson.get("features", []):
-                geom = feature.get("geometry", {})
-                props = feature.get("properties", {})
-                coords_list = []
-                if geom.get("type") == "Polygon":
-                    coords_list = [geom.get("coordinates", [])]
-                elif geom.get("type") == "MultiPolygon":
-                    coords_list = geom.get("coordinates", [])
-
-                for poly in coords_list:
-                    if not poly:
-                        continue
-                    exterior = poly[0]
-                    xy = [(pt[0], pt[1]) for pt in exterior]
-                    patch = MplPolygon(xy, closed=True, facecolor='lightgray', 
-                                     edgecolor='black', linewidth=0.8, alpha=0.3, zorder=0)
-                    ax.add_patch(patch)
-        except Exception as e:
-            st.warning(f"Could not plot county borders with matplotlib: {e}")
-
-    # Draw adjacency edges (light blue)
-    edges_drawn = set()
-    for county, neighbors in graph.items():
-        if county not in coords:
-            continue
-        for neighbor in neighbors:
-            if neighbor not in coords:
-                continue
-            key = tuple(sorted((county, neighbor)))
-            if key in edges_drawn:
-                continue
-            edges_drawn.add(key)
-            if show_edges:
-                lat1, lon1 = coords[county]
-                lat2, lon2 = coords[neighbor]
-                ax.plot([lon1, lon2], [lat1, lat2], color='lightblue', linewidth=1.2, 
-                       alpha=0.6, zorder=1)
-
-    # Draw county center points
-    xs = []
-    ys = []
-    labels = []
-    for county, (lat, lon) in coords.items():
-        xs.append(lon)
-        ys.append(lat)
-        labels.append(county)
-
-    ax.scatter(xs, ys, s=60, c='navy', zorder=2, edgecolors='white', linewidths=1)
-
-    # County labels
-    if show_labels:
-        for label, x, y in zip(labels, xs, ys):
-            ax.text(x, y, label, fontsize=8, zorder=3, ha='center', va='center',
-                   weight='bold',
-                   bbox=dict(boxstyle='round,pad=0.4', facecolor='white', 
-                            edgecolor='gray', alpha=0.85, linewidth=0.5))
-
-    # If a route is provided, draw it with arrows showing direction
-    if route and route_cities:
-        from matplotlib.patches import FancyArrowPatch
-        
-        # Build list of city coordinates for the route
-        route_city_coords = []
-        for county in route:
-            if county in route_cities and route_cities[county]:
-                city = route_cities[county]
-                if city in city_coords:
-                    lat, lon = city_coords[city]
-                    route_city_coords.append((lat, lon, city, county))
-                elif county in coords:
-                    lat, lon = coords[county]
-                    route_city_coords.append((lat, lon, None, county))
-            elif county in coords:
-                lat, lon = coords[county]
-                route_city_coords.append((lat, lon, None, county))
-        
-        # Track which edges we've drawn to curve bidirectional ones
-        route_edges = {}
-        for i in range(len(route_city_coords) - 1):
-            edge = (i, i+1)
-            reverse_edge = (i+1, i)
-            
-            if reverse_edge in route_edges:
-                route_edges[edge] = 'curve'
-                route_edges[reverse_edge] = 'curve'
-            else:
-                route_edges[edge] = 'straight'
-        
-        # Draw route segments with arrows
-        for i in range(len(route_city_coords) - 1):
-            lat1, lon1, city1, county1 = route_city_coords[i]
-            lat2, lon2, city2, county2 = route_city_coords[i+1]
-            
-            edge = (i, i+1)
-            
-            # If this edge needs to curve (bidirectional)
-            if route_edges.get(edge) == 'curve':
-                dx = lon2 - lon1
-                dy = lat2 - lat1
-                length = math.sqrt(dx**2 + dy**2)
-                if length > 0:
-                    perp_x = -dy / length * 0.15
-                    perp_y = dx / length * 0.15
-                    
-                    arrow = FancyArrowPatch(
-                        (lon1, lat1), (lon2, lat2),
-                        connectionstyle=f"arc3,rad=0.3",
-                        arrowstyle='->,head_width=0.4,head_length=0.8',
-                        color='red',
-                        linewidth=3,
-                        alpha=0.8,
-                        zorder=4
-                    )
-                    ax.add_patch(arrow)
-            else:
-                arrow = FancyArrowPatch(
-                    (lon1, lat1), (lon2, lat2),
-                    arrowstyle='->,head_width=0.4,head_length=0.8',
-                    color='red',
-                    linewidth=3,
-                    alpha=0.8,
-                    zorder=4
-                )
-                ax.add_patch(arrow)
-        
-        # Draw city markers on the route
-        if len(route_city_coords) >= 1:
-            lats = [c[0] for c in route_city_coords]
-            lons = [c[1] for c in route_city_coords]
-            ax.scatter(lons, lats, s=120, c='red', zorder=5, edgecolors='darkred', linewidths=2, marker='D')
-            
-            # Add city labels and route step numbers
-            for i, (lat, lon, city, county) in enumerate(route_city_coords):
-                # Step number
-                ax.text(lon, lat, str(i+1), fontsize=9, zorder=6, ha='center', va='center',
-                       color='white', weight='bold')
-                
-                # City name if available
-                if city:
-                    ax.text(lon, lat - 0.12, city, fontsize=7, zorder=6, ha='center', va='top',
-                           style='italic', color='darkred', weight='bold',
-                           bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.8))
-
-    ax.set_xlabel('Longitude')
-    ax.set_ylabel('Latitude')
-    ax.set_title('Washington State Counties and Highway Connections', fontsize=14, weight='bold')
-    ax.set_aspect('equal', adjustable='datalim')
-    ax.grid(True, linestyle=':', linewidth=0.5, alpha=0.5)
-    
-    # Add legend
-    if route:
-        from matplotlib.lines import Line2D
-        from matplotlib.patches import FancyArrowPatch
-        legend_elements = [
-            Line2D([0], [0], color='lightblue', lw=2, label='County Connections'),
-            FancyArrowPatch((0, 0), (0.1, 0.1), arrowstyle='->', color='red', lw=3, label='Your Route'),
-            Line2D([0], [0], marker='D', color='w', markerfacecolor='red', 
-                   markersize=10, label='Route Cities', linestyle='None')
-        ]
-        ax.legend(handles=legend_elements, loc='upper right')
-    
-    return fig
-
-
-def show_interactive_map(graph, coords, route=None, show_edges=True, show_labels=True, geojson=None, route_cities=None):
-    """Use pydeck to show an interactive map with points, adjacency lines, and an optional route."""
-    if not _HAS_PYDECK:
-        return None
-
-    layers = []
-
-    # Add county borders from GeoJSON
-    if geojson:
-        try:
-            geo_layer = pdk.Layer(
-                "GeoJsonLayer",
-                data=geojson,
-                stroked=True,
-                filled=True,
-                get_fill_color=[200, 200, 200, 50],
-                get_line_color=[80, 80, 80],
-                line_width_min_pixels=2,
-                pickable=True,
-            )
-            layers.append(geo_layer)
-            
-            # Add county name labels at centroids
-            if geojson.get('features'):
-                label_data = []
-                for feature in geojson['features']:
-                    props = feature.get('properties', {})
-                    county_name = props.get('name', props.get('NAME', ''))
-                    
-                    # Get centroid from our coords if available
-                    if county_name in coords:
-                        lat, lon = coords[county_name]
-                        label_data.append({
-                            "name": county_name,
-                            "lat": lat,
-                            "lon": lon
-                        })
-                
-                if label_data:
-                    labels_df = pd.DataFrame(label_data)
-                    county_labels = pdk.Layer(
-                        "TextLayer",
-                        data=labels_df,
-                        get_position='[lon, lat]',
-                        get_text='name',
-                        get_size=13,
-                        get_color=[40, 40, 40, 200],
-                        get_alignment_baseline='center',
-                        get_background_color=[255, 255, 255, 180],
-                        background_padding=[4, 2, 4, 2],
-                        font_family='Arial, sans-serif',
-                        font_weight='bold',
-                        pickable=False,
-                    )
-                    layers.append(county_labels)
-        except Exception as e:
-            st.warning(f"Could not add GeoJSON layer: {e}")
-
-    # Prepare county points dataframe
-    rows = []
-    for name, (lat, lon) in coords.items():
-        rows.append({"name": name, "lat": lat, "lon": lon})
-    points = pd.DataFrame(rows)
-
-    # Edges
-    edges = []
-    edges_seen = set()
-    for county, neighbors in graph.items():
-        if county not in coords:
-            continue
-        for neighbor in neighbors:
-            if neighbor not in coords:
-                continue
-            key = tuple(sorted((county, neighbor)))
-            if key in edges_seen:
-                continue
-            edges_seen.add(key)
-            lat1, lon1 = coords[county]
-            lat2, lon2 = coords[neighbor]
-            edges.append({"start": [lon1, lat1], "end": [lon2, lat2]})
-
-    # Line layer for adjacencies
-    if show_edges and edges:
-        line_layer = pdk.Layer(
-            "LineLayer",
-            data=edges,
-            get_source_position="start",
-            get_target_position="end",
-            get_width=2,
-            get_color=[100, 150, 200, 150],
-            pickable=False,
-        )
-        layers.append(line_layer)
-
-    # Scatter layer for county centers
-    scatter = pdk.Layer(
-        "ScatterplotLayer",
-        data=points,
-        get_position='[lon, lat]',
-        get_fill_color=[10, 30, 160],
-        get_radius=8000,
-        pickable=True,
-        auto_highlight=True,
-    )
-    layers.append(scatter)
-
-    # Always show county labels (not optional anymore for better UX)
-    text_layer = pdk.Layer(
-        "TextLayer",
-        data=points,
-        get_position='[lon, lat]',
-        get_text='name',
-        get_size=14,
-        get_color=[0, 0, 0],
-        get_alignment_baseline='bottom',
-        get_background_color=[255, 255, 255, 200],
-        background_padding=[3, 2, 3, 2],
-        font_weight='600',
-        pickable=False,
-    )
-    layers.append(text_layer)
-
-    # Route overlay with arrows and city markers
-    if route and len(route) >= 2 and route_cities:
-        # Build city coordinates for the route
-        route_city_data = []
-        for i, county in enumerate(route):
-            if county in route_cities and route_cities[county]:
-                city = route_cities[county]
-                if city in city_coords:
-                    lat, lon = city_coords[city]
-                    route_city_data.append({
-                        "lat": lat, "lon": lon, "city": city, 
-                        "county": county, "step": i+1
-                    })
-                elif county in coords:
-                    lat, lon = coords[county]
-                    route_city_data.append({
-                        "lat": lat, "lon": lon, "city": None, 
-                        "county": county, "step": i+1
-                    })
-            elif county in coords:
-                lat, lon = coords[county]
-                route_city_data.append({
-                    "lat": lat, "lon": lon, "city": None, 
-                    "county": county, "step": i+1
-                })
-        
-        # Build path segments
-        path_segments = []
-        for i in range(len(route_city_data) - 1):
-            current = route_city_data[i]
-            next_stop = route_city_data[i+1]
-            
-            path_segments.append({
-                "path": [[current["lon"], current["lat"]], [next_stop["lon"], next_stop["lat"]]],
-                "color": [240, 50, 50, 200]
-            })
-        
-        if path_segments:
-            path_layer = pdk.Layer(
-                "PathLayer",
-                data=path_segments,
-                get_path="path",
-                get_color="color",
-                width_scale=20,
-                width_min_pixels=4,
-                get_width=1,
-            )
-            layers.append(path_layer)
-        
-        # Add city markers (diamond shaped)
-        if route_city_data:
-            cities_df = pd.DataFrame(route_city_data)
-            
-            # Route city markers
-            city_scatter = pdk.Layer(
-                "ScatterplotLayer",
-                data=cities_df,
-                get_position='[lon, lat]',
-                get_fill_color=[240, 50, 50],
-                get_radius=12000,
-                pickable=True,
-                auto_highlight=True,
-            )
-            layers.append(city_scatter)
-            
-            # Step numbers
-            step_text = pdk.Layer(
-                "TextLayer",
-                data=cities_df,
-                get_position='[lon, lat]',
-                get_text='step',
-                get_size=16,
-                get_color=[255, 255, 255],
-                get_alignment_baseline='center',
-                font_weight='bold',
-                pickable=False,
-            )
-            layers.append(step_text)
-            
-            # City name labels
-            cities_with_names = cities_df[cities_df['city'].notna()]
-            if len(cities_with_names) > 0:
-                city_labels = pdk.Layer(
-                    "TextLayer",
-                    data=cities_with_names,
-                    get_position='[lon, lat]',
-                    get_text='city',
-                    get_size=12,
-                    get_color=[139, 0, 0],
-                    get_alignment_baseline='top',
-                    get_background_color=[255, 255, 255, 220],
-                    background_padding=[2, 1, 2, 1],
-                    font_weight='bold',
-                    font_style='italic',
-                    pickable=False,
-                )
-                layers.append(city_labels)
-
-    # View centered on Washington State
-    view_state = pdk.ViewState(latitude=47.3, longitude=-120.5, zoom=6.5)
-
-    deck = pdk.Deck(layers=layers, initial_view_state=view_state, 
-                   tooltip={"text": "{name}\n{city}\n{county}"})
-    return deck
-
-
-def bfs_path(graph, start, goal):
-    """Find shortest path using BFS."""
-    queue = deque([start])
-    visited = set()
-    parent = {}
-
-    while queue:
-        current = queue.popleft()
-        visited.add(current)
-
-        if current == goal:
-            # reconstruct path
-            path = [current]
-            while current in parent:
-                current = parent[current]
-                path.append(current)
-            path.reverse()
-            return path
-
-        for neighbor in graph[current]:
-            if neighbor not in visited and neighbor not in queue:
-                queue.append(neighbor)
-                parent[neighbor] = current
-    return None
-
-
-def find_fastest_city_for_route(county, prev_county, next_county, prev_city, next_city, cities_by_county):
-    """
-    Find the fastest city to go through in a county based on the specific route.
-    Takes into account the actual cities in adjacent counties for precise calculation.
-    """
-    if county not in cities_by_county:
-        return None
-    
-    cities = cities_by_county[county]
-    if not cities:
-        return None
-    
-    # If only one city, return it
-    if len(cities) == 1:
-        return cities[0]
-    
-    best_city = None
-    best_time = float('inf')
-    
-    # For each candidate city, calculate the actual detour/path time
-    for city in cities:
-        if city not in city_coords:
-            continue
-        
-        city_lat, city_lon = city_coords[city]
-        total_distance = 0
-        
-        # Calculate distance from previous city/county
-        if prev_city and prev_city in city_coords:
-            prev_lat, prev_lon = city_coords[prev_city]
-            dist_from_prev = math.sqrt((city_lat - prev_lat)**2 + (city_lon - prev_lon)**2)
-            total_distance += dist_from_prev
-        elif prev_county and prev_county in county_coords:
-            prev_lat, prev_lon = county_coords[prev_county]
-            dist_from_prev = math.sqrt((city_lat - prev_lat)**2 + (city_lon - prev_lon)**2)
-            total_distance += dist_from_prev
-        
-        # Calculate distance to next city/county
-        if next_city and next_city in city_coords:
-            next_lat, next_lon = city_coords[next_city]
-            dist_to_next = math.sqrt((city_lat - next_lat)**2 + (city_lon - next_lon)**2)
-            total_distance += dist_to_next
-        elif next_county and next_county in county_coords:
-            next_lat, next_lon = county_coords[next_county]
-            dist_to_next = math.sqrt((city_lat - next_lat)**2 + (city_lon - next_lon)**2)
-            total_distance += dist_to_next
-        
-        if total_distance < best_time:
-            best_time = total_distance
-            best_city = city
-    
-    return best_city if best_city else cities[0]
-
-
-def calculate_route_with_fastest_cities(route, route_cities, cities_by_county):
-    """
-    For each county in the route, determine the fastest city to go through.
-    Takes into account the specific cities selected for adjacent counties.
-    Returns a dictionary mapping county -> fastest city for this route.
-    """
-    fastest_cities = {}
-    
-    for i, county in enumerate(route):
-        # Get previous and next counties and their cities
-        prev_county = route[i-1] if i > 0 else None
-        next_county = route[i+1] if i < len(route) - 1 else None
-        
-        prev_city = route_cities.get(prev_county) if prev_county else None
-        next_city = route_cities.get(next_county) if next_county else None
-        
-        # If this county already has a selected city, use it
-        if county in route_cities and route_cities[county]:
-            fastest_cities[county] = route_cities[county]
-        else:
-            # Calculate the fastest city for this position in the route
-            fastest_city = find_fastest_city_for_route(
-                county, prev_county, next_county, prev_city, next_city, cities_by_county
-            )
-            if fastest_city:
-                fastest_cities[county] = fastest_city
-    
-    return fastest_cities
-    
-
-def find_optimal_route(graph, start, end, must_visit):
-    """Find the most time-efficient route that visits all must-visit counties.
-    Uses a greedy nearest-neighbor approach with all permutations for small sets.
-    Returns a full path (list of counties) or None if no path found.
-    """
-    from itertools import permutations
-
-    if not must_visit:
-        return bfs_path(graph, start, end)
-
-    # For small sets (≤7), try all permutations to find truly optimal route
-    if len(must_visit) <= 7:
-        best_route = None
-        best_time = float('inf')
-
-        for perm in permutations(must_visit):
-            route_points = list(perm) + [end]
-            prev = start
-            full_path = []
-            total_time = 0
-            path_found = True
-
-            for target in route_points:
-                subpath = bfs_path(graph, prev, target)
-                if subpath is None:
-                    path_found = False
-                    break
-
-                for i in range(len(subpath) - 1):
-                    total_time += get_drive_time(subpath[i], subpath[i + 1])
-
-                if not full_path:
-                    full_path.extend(subpath)
-                else:
-                    full_path.extend(subpath[1:])
-                prev = target
-
-            if path_found and total_time < best_time:
-                best_time = total_time
-                best_route = full_path
-
-        return best_route
-
-    # For larger sets, use greedy nearest-neighbor approach
-    remaining = set(must_visit)
-    current = start
-    full_path = [start]
-
-    while remaining:
-        best_next = None
-        best_subpath = None
-        best_time = float('inf')
-
-        for county in remaining:
-            subpath = bfs_path(graph, current, county)
-            if subpath:
-                path_time = sum(get_drive_time(subpath[i], subpath[i + 1])
-                                for i in range(len(subpath) - 1))
-                if path_time < best_time:
-                    best_time = path_time
-                    best_next = county
-                    best_subpath = subpath
-
-        if best_next is None:
-            return None
-
-        full_path.extend(best_subpath[1:])
-        current = best_next
-        remaining.remove(best_next)
-
-    final_path = bfs_path(graph, current, end)
-    if final_path:
-        full_path.extend(final_path[1:])
-        return final_path if not full_path else full_path
-    return None
-
-
-def find_best_city_detour(graph, route, city_name):
-    """
-    Find the best place to insert a city visit into an existing route.
-    Returns the modified route and the detour time in seconds.
-    """
-    if city_name not in city_to_county:
-        return None, None, None
-    
-    target_county = city_to_county[city_name]
-    
-    # If county is already in route, no detour needed
-    if target_county in route:
-        detour_time = 0
-        insertion_index = route.index(target_county)
-        return route, detour_time, insertion_index
-    
-    # Try inserting the county at each position in the route
-    best_route = None
-    best_detour = float('inf')
-    best_index = -1
-    
-    original_time = sum(get_drive_time(route[i], route[i+1]) 
-                       for i in range(len(route)-1))
-    
-    for i in range(len(route)):
-        # Try inserting target_county after position i
-        if i == 0:
-            # Insert at beginning
-            new_segment = bfs_path(graph, route[0], target_county)
-            if new_segment:
-                test_route = new_segment + route[1:]
-        elif i == len(route) - 1:
-            # Insert at end
-            new_segment = bfs_path(graph, route[-1], target_county)
-            if new_segment:
-                test_route = route + new_segment[1:]
-        else:
-            # Insert in middle
-            path_to = bfs_path(graph, route[i], target_county)
-            path_from = bfs_path(graph, target_county, route[i+1])
-            
-            if path_to and path_from:
-                test_route = route[:i+1] + path_to[1:] + path_from[1:]
-            else:
-                continue
-        
-        # Calculate new total time
-        new_time = sum(get_drive_time(test_route[j], test_route[j+1]) 
-                      for j in range(len(test_route)-1))
-        detour = new_time - original_time
-        
-        if detour < best_detour:
-            best_detour = detour
-            best_route = test_route
-            best_index = i
-    
-    return best_route, best_detour, best_index
-
-
-def get_route_highways(route, highway_data):
-    """Extract the highways used between consecutive counties in the route."""
-    highways_used = []
-    for i in range(len(route) - 1):
-        current = route[i]
-        next_county = route[i + 1]
-        
-        # Get drive time between counties
-        drive_time = get_drive_time(current, next_county)
-        
-        # Find highways that connect these counties
-        if current in highway_data:
-            found_highways = set()
-            for city, highways in highway_data[current]['connections'].items():
-                for highway, destinations in highways.items():
-                    for dest in destinations:
-                        if f"({next_county} Co.)" in dest or f"({next_county})" in dest:
-                            found_highways.add(highway)
-            
-            if found_highways:
-                highways_used.append({
-                    'from': current,
-                    'to': next_county,
-                    'highways': sorted(list(found_highways)),
-                    'time': drive_time
-                })
-            else:
-                # No direct highway found in data, just note the connection
-                highways_used.append({
-                    'from': current,
-                    'to': next_county,
-                    'highways': ['Direct connection'],
-                    'time': drive_time
-                })
-        else:
-            highways_used.append({
-                'from': current,
-                'to': next_county,
-                'highways': ['Route available'],
-                'time': drive_time
-            })
-    
-    return highways_used
-
-
 # Streamlit App
 st.set_page_config(page_title="WA County Road Trip", page_icon="🚗", layout="wide")
 
@@ -836,12 +43,41 @@ st.set_page_config(page_title="WA County Road Trip", page_icon="🚗", layout="w
 if 'button_clicked' not in st.session_state:
     st.session_state.button_clicked = False
 
+# Identifies this browser session to the memory accounting and the job pool
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    script_ctx = get_script_run_ctx()
+except ImportError:
+    script_ctx = None
+session_id = script_ctx.session_id if script_ctx else "local"
+
+# Stage timings for the performance panel; spans cost nothing while it's closed
+rerun_started = time.perf_counter()
+if st.session_state.get("perf_panel"):
+    begin_trace()
+else:
+    end_trace()
+
+# Reference data hot reload: edited files under wa_data/ are rebuilt in the
+# background and swapped in without a restart
+data_watcher = get_reference_data_watcher()
+data_watcher.poll()
+if data_watcher.last_error is not None:
+    st.sidebar.warning(f"⚠️ Reference data reload failed, still using the previous version: {data_watcher.last_error}")
+
 st.title("Washington State County Road Trip Planner 🚗")
 st.write("Plan your road trip across Washington State counties using major highways!")
 
 # Try to load county borders
 geojson = load_county_borders()
 
+# Point-in-polygon index over the borders: snapped coordinates and map clicks
+# resolve to the county that contains them, and the maps place counties at
+# their geometric centroids
+county_polygons = install_county_borders(geojson)
+map_coords = dict(county_coords)
+map_coords.update({county: point for county, point in county_polygons.centroids.items() if county in map_coords})
+
 if geojson and geojson.get('features'):
     num_features = len(geojson['features'])
     st.success(f"✓ County borders loaded successfully! ({num_features} counties)")
@@ -851,85 +87,66 @@ else:
 col1, col2 = st.columns(2)
 
 with col1:
-    counties = sorted(list(wa_graph.keys()))
     cities_by_county = get_cities_by_county()
     
-    # Build dropdown options organized by county with route-specific fastest
-    def build_location_options(route_fastest=None):
-        options = []
-        for county in counties:
-            # Add "Fastest route through [County]" option - dynamically calculated
-            if route_fastest and county in route_fastest:
-                fastest_city = route_fastest[county]
-                options.append(f"Fastest for your route: {fastest_city} ({county})")
+    # Typeahead pickers over the gazetteer: the selectbox only lists the matches
+    # for what was typed (or counties and their cities before anything is typed)
+    gazetteer = get_gazetteer()
+
+    def location_picker(label, key):
+        query = st.text_input(f"Search {label.lower()}", key=f"{key}_query", 
+                              placeholder="Type a city, town or county…")
+        if query.strip():
+            options = gazetteer.search(query, limit=50)
+            if not options:
+                st.caption(f"No places match '{query}'.")
+        else:
+            options = gazetteer.browse()
+        return st.selectbox(label, options, format_func=place_label, key=key)
+
+    start_place = location_picker("Start Location", "start")
+    end_place = location_picker("End Location", "end")
+
+    start_county, start_city, start_wants_fastest = resolve_place(start_place)
+    end_county, end_city, end_wants_fastest = resolve_place(end_place)
+
+    # Raw coordinates (e.g. a GPS position) override the picker, snapped to the nearest city
+    coordinate_hint = "lat, lon (e.g. 47.61, -122.33)"
+    start_coords_text = st.text_input("…or start from coordinates", key="start_coords", placeholder=coordinate_hint)
+    end_coords_text = st.text_input("…or end at coordinates", key="end_coords", placeholder=coordinate_hint)
+    snapped = {}
+    for label, text in (("start", start_coords_text), ("end", end_coords_text)):
+        if text.strip():
+            coords = parse_coordinates(text)
+            if coords is None:
+                st.warning(f"⚠️ Couldn't read {label} coordinates '{text}'; use {coordinate_hint}")
             else:
-                # Placeholder - will be calculated after route is determined
-                options.append(f"Fastest route through {county}")
-            
-            # Add individual cities in this county
-            if county in cities_by_county:
-                for city in cities_by_county[county]:
-                    options.append(f"   {city} ({county})")
-            
-            # Add separator except for last county
-            if county != counties[-1]:
-                options.append("─" * 50)
-        
-        return options
-    
-    location_options = build_location_options()
-    
-    start_selection = st.selectbox("Start Location", location_options, key="start")
-    end_selection = st.selectbox("End Location", location_options, key="end")
-    
-    # Parse selection
-    def parse_selection(selection):
-        if not selection or "─" in selection:
-            return None, None, False
-        s = selection.strip()
-
-        # Check for explicit "Fastest for your route: City (County)"
-        if s.lower().startswith("fastest for your route:"):
-            parts = s.split(":", 1)[1].strip()
-            idx = parts.rfind(" (")
-            if idx != -1 and parts.endswith(")"):
-                city = parts[:idx].strip()
-                county = parts[idx+2:-1].strip()
-                return county, city, True
-            # Fallback: if only county provided
-            return parts, None, True
-
-        # Check for "Fastest route through CountyName"
-        if s.lower().startswith("fastest route through"):
-            county_part = s[len("fastest route through"):].strip()
-            return county_part, None, True
-
-        # Otherwise expect format like "CityName (CountyName)" (may have leading spaces)
-        idx = s.rfind(" (")
-        if idx != -1 and s.endswith(")"):
-            city = s[:idx].strip()
-            county = s[idx+2:-1].strip()
-            return county, city, False
-
-        # If the cleaned selection matches a county name, return it
-        if s in counties:
-            return s, None, False
-
-        return None, None, False
-    
-    start_county, start_city, start_wants_fastest = parse_selection(start_selection)
-    end_county, end_city, end_wants_fastest = parse_selection(end_selection)
+                snapped[label] = (coords, snap_to_place(*coords))
+    if "start" in snapped:
+        start_county, start_city = snapped["start"][1]['county'], snapped["start"][1]['city']
+        start_wants_fastest = False
+    if "end" in snapped:
+        end_county, end_city = snapped["end"][1]['county'], snapped["end"][1]['city']
+        end_wants_fastest = False
     
     # Show selection info
     if start_city and start_county:
         if start_wants_fastest:
             st.caption(f"Starting from fastest route: {start_city} in {start_county} County")
+        elif "start" in snapped:
+            (lat, lon), place = snapped["start"]
+            st.caption(f"📍 Starting near: {start_city} in {start_county} County "
+                       f"({place['distance_km']:.1f} km from {lat:.4f}, {lon:.4f})")
         else:
             st.caption(f"📍 Starting from: {start_city} in {start_county} County")
 
     if end_city and end_county:
         if end_wants_fastest:
             st.caption(f"Ending at fastest route: {end_city} in {end_county} County")
+        elif "end" in snapped:
+            (lat, lon), place = snapped["end"]
+            st.caption(f"📍 Ending near: {end_city} in {end_county} County "
+                       f"({place['distance_km']:.1f} km from {lat:.4f}, {lon:.4f})")
         else:
             st.caption(f"📍 Ending at: {end_city} in {end_county} County")
 
@@ -941,26 +158,41 @@ with col2:
                                      min_value=0, max_value=10, value=0, 
                                      key="num_must_visit")
     
-    must_visit_selections = []
+    must_visit_places = []
     must_visit_counties = []
     must_visit_cities = []
     
     if num_must_visit > 0:
         for i in range(num_must_visit):
-            selection = st.selectbox(
-                f"Must-visit #{i+1}", 
-                location_options, 
-                key=f"must_visit_{i}"
-            )
-            must_visit_selections.append(selection)
+            place = location_picker(f"Must-visit #{i+1}", f"must_visit_{i}")
+            must_visit_places.append(place)
             
-            county, city, want_fastest = parse_selection(selection)
+            county, city, want_fastest = resolve_place(place)
             if county:
                 must_visit_counties.append(county)
                 must_visit_cities.append(city)
     
     optimize_route = st.checkbox("Optimize route for fastest travel time", 
                                  help="Reorders must-visit counties to minimize total drive time")
+    optimize_budget = st.slider("Optimization time budget (seconds)", min_value=0.1, max_value=10.0, 
+                                value=2.0, step=0.1, key="optimize_budget", disabled=not optimize_route,
+                                help="The best route found within the budget is used")
+    num_alternatives = st.number_input("Alternative routes to compare", 
+                                       min_value=0, max_value=5, value=0, 
+                                       key="num_alternatives",
+                                       help="Fastest alternatives from start to end (trips without must-visits)")
+    show_tradeoffs = st.checkbox("Compare time, distance and counties visited", key="show_tradeoffs",
+                                 help="Routes from start to end county where none is faster, shorter "
+                                      "and through more counties than another (trips without must-visits)")
+    tradeoff_factor = st.slider("Slowest trade-off route (× fastest time)", min_value=1.1, max_value=2.0,
+                                value=1.5, step=0.1, key="tradeoff_factor", disabled=not show_tradeoffs)
+    departure_time = st.time_input("Departure time", value=datetime.time(9, 0), 
+                                   key="departure_time",
+                                   help="Used to estimate typical weekday traffic on congested corridors")
+    max_day_hours = st.number_input("Max driving hours per day", min_value=0.0, max_value=16.0,
+                                    value=0.0, step=0.5, key="max_day_hours",
+                                    help="Splits long trips into days with overnight stops in route "
+                                         "cities (0 for no limit)")
     
 # Map display controls
 st.sidebar.header("Map Settings")
@@ -968,8 +200,67 @@ show_map = st.sidebar.checkbox("Show map of Washington counties", value=True)
 show_edges = st.sidebar.checkbox("Show county connections", value=True)
 show_labels = st.sidebar.checkbox("Show county labels", value=True)
 
+# Isochrone controls: everything reachable from the start location within a budget
+st.sidebar.header("Reachability")
+show_isochrone = st.sidebar.checkbox("Show where I can get from the start location", value=False)
+isochrone_hours = st.sidebar.slider("Drive-time budget (hours)", min_value=0.5, max_value=8.0, 
+                                    value=3.0, step=0.5, disabled=not show_isochrone)
+
+# Live road conditions: re-applied in place whenever the feed file changes
+st.sidebar.header("Road Conditions")
+try:
+    refresh_from_feed()
+except (ValueError, KeyError) as e:
+    st.sidebar.warning(f"⚠️ Could not read the road conditions feed: {e}")
+conditions = active_conditions()
+for condition in conditions:
+    status = "closed" if condition['factor'] == float('inf') else f"{condition['factor']:g}x drive time"
+    note = f" ({condition['note']})" if condition['note'] else ""
+    st.sidebar.markdown(f"🚧 {condition['from']} ↔ {condition['to']}: {status}{note}")
+if not conditions:
+    st.sidebar.caption("No closures or slowdowns reported.")
+if data_watcher.last_reload is not None:
+    st.sidebar.caption(f"Reference data reloaded (version {data_watcher.last_reload['data_version'][:8]}).")
+
 BFS_path = None
 city_detour_info = None
+# Inputs the route optimization ran on, so a cancelled run's best route is
+# only reused for the same trip
+trip_key = (start_county, end_county, tuple(must_visit_counties))
+
+
+# Searches not finished after this long on the script thread move to the
+# job pool, so they don't hold the GIL other sessions' reruns need
+INLINE_OPTIMIZATION_SECONDS = 0.05
+
+
+def cancel_optimization():
+    # Runs at the start of the rerun the click triggers, which also stops
+    # the optimization still running in the previous one
+    st.session_state.optimization_cancelled = True
+    if st.session_state.get('optimization_job') is not None:
+        get_job_pool().cancel(st.session_state.optimization_job)
+
+
+@st.fragment
+def show_tradeoff_routes(routes):
+    # A fragment, so picking a route reruns only this list and the rest of the
+    # results stay on the page
+    fastest = min(route['time'] for route in routes)
+    shortest = min(route['distance_km'] for route in routes)
+    most = max(route['counties'] for route in routes)
+
+    def label(k):
+        route = routes[k]
+        tags = [tag for tag, best in (("fastest", route['time'] == fastest),
+                                      ("shortest", route['distance_km'] == shortest),
+                                      ("most counties", route['counties'] == most)) if best]
+        return (f"{format_drive_time(route['time'])} · {route['distance_km'] * 0.621371:.0f} mi · "
+                f"{route['counties']} counties" + (f" ({', '.join(tags)})" if tags else ""))
+
+    choice = st.radio("Pick a trade-off", range(len(routes)), format_func=label)
+    st.markdown(" ➡️ ".join(routes[choice]['route']))
+
 
 # Single button for finding path
 if st.button("Find Shortest Path", type="primary"):
@@ -982,28 +273,74 @@ if st.button("Find Shortest Path", type="primary"):
     else:
         with st.spinner("Finding the best route..."):
             if optimize_route and must_visit_counties:
-                # Use optimal route finding
+                # Anytime optimization: show the best route so far while the
+                # search improves it, until it is proven optimal, the time
+                # budget runs out or the user cancels
                 st.info(f"Optimizing route to visit {len(must_visit_counties)} locations in the fastest order...")
-                BFS_path = find_optimal_route(wa_graph, start_county, end_county, must_visit_counties)
+                st.button("Cancel optimization", on_click=cancel_optimization)
+                progress = st.empty()
+                started = time.perf_counter()
+                inline_deadline = started + min(optimize_budget, INLINE_OPTIMIZATION_SECONDS)
+                st.session_state.optimization_best = None
+                st.session_state.optimization_job = None
+
+                def show_best(step, note=""):
+                    bound = ("optimal" if step['optimal'] else
+                             f"no route under {format_drive_time(step['lower_bound'])}")
+                    progress.markdown(f"Best so far: **{format_drive_time(step['time'])}** ({bound}), "
+                                      f"{len(step['route'])} counties · {step['explored']} orders explored"
+                                      f"{note}")
+                    st.session_state.optimization_best = {'trip': trip_key, 'route': step['route']}
+
+                best_step = None
+                for step in iter_optimal_routes(wa_graph, start_county, end_county, must_visit_counties):
+                    if step['route'] is not None:
+                        best_step = step
+                    if step['optimal'] or time.perf_counter() >= inline_deadline:
+                        break
+                if best_step is not None:
+                    BFS_path = best_step['route']
+                    show_best(best_step)
+
+                remaining_budget = optimize_budget - (time.perf_counter() - started)
+                if (best_step is None or not best_step['optimal']) and remaining_budget > 0:
+                    # Refine in a worker process, polling without holding the GIL
+                    pool = get_job_pool()
+                    try:
+                        job_id = pool.submit(session_id, "optimize_route", start_county, end_county, 
+                                             tuple(must_visit_counties), remaining_budget)
+                    except JobRejected as e:
+                        st.caption(f"Using the quick route: {e}.")
+                        job_id = None
+                    st.session_state.optimization_job = job_id
+                    job = None
+                    while job_id is not None:
+                        job = pool.poll(job_id)
+                        if job is None or job['state'] in ('done', 'failed', 'cancelled'):
+                            break
+                        if best_step is None:
+                            queued = f", {job['position']} jobs ahead" if job['position'] else ""
+                            progress.markdown(f"Searching... {job['elapsed']:.1f} s{queued}")
+                        else:
+                            waiting = f", {job['position']} jobs ahead" if job['position'] else ", refining"
+                            show_best(best_step, f" · {job['elapsed']:.1f} s{waiting}")
+                        time.sleep(0.1)
+                    if job is not None and job['state'] == 'done' and job['result']:
+                        if best_step is None or job['result']['time'] <= best_step['time']:
+                            best_step = job['result']
+                            BFS_path = best_step['route']
+                            show_best(best_step)
+                    elif job is not None and job['state'] == 'failed':
+                        st.caption(f"Route refinement failed ({job['error']}); using the quick route.")
             else:
                 # Use traditional ordered route
-                route_points = list(must_visit_counties) + [end_county]
-                prev = start_county
-                full_path = []
-                path_not_found = False
+                BFS_path = find_ordered_route(wa_graph, start_county, end_county, must_visit_counties)
 
-                for target in route_points:
-                    subpath = bfs_path(wa_graph, prev, target)
-                    if subpath is None:
-                        path_not_found = True
-                        break
-                    if not full_path:
-                        full_path.extend(subpath)
-                    else:
-                        full_path.extend(subpath[1:])
-                    prev = target
-
-                BFS_path = None if path_not_found else full_path
+if st.session_state.pop('optimization_cancelled', False):
+    best = st.session_state.get('optimization_best')
+    if best is not None and best['trip'] == trip_key:
+        BFS_path = best['route']
+        st.warning("⏹️ Optimization cancelled; showing the best route found so far.")
 
 if BFS_path is None and st.session_state.get('button_clicked'):
     st.error("❌ Path not found! Counties may not be connected.")
@@ -1041,6 +378,9 @@ elif BFS_path is not None:
         # Calculate total drive time with city-specific times (seconds)
         total_drive_time = 0
         detailed_segments = []
+        # Base county-to-county times for every leg in one matrix lookup
+        county_times = get_county_time_matrix()
+        base_segment_times = county_times.leg_times(county_times.ids_of(visited_counties)).tolist()
         
         for i in range(len(visited_counties) - 1):
             current_county = visited_counties[i]
@@ -1050,11 +390,11 @@ elif BFS_path is not None:
             next_city = route_fastest_cities.get(next_county)
             
             # Base county-to-county time
-            segment_time = get_drive_time(current_county, next_county)
+            segment_time = base_segment_times[i]
             
             # Add intra-county time if we have specific cities
             if current_city and next_city:
-                city_time = get_city_drive_time(current_city, next_city)
+                city_time = city_drive_time(current_city, next_city)
                 if city_time is None:
                     # Different counties, use base time
                     total_drive_time += segment_time
@@ -1083,22 +423,38 @@ elif BFS_path is not None:
         with col3:
             st.metric("Must-Visit Included", len(must_in_route))
 
+        # Typical traffic at the chosen departure time on the county legs
+        traffic = get_traffic_profiles()
+        route_ids = traffic.route_graph.ids_of([c for i, c in enumerate(visited_counties)
+                                                if i == 0 or c != visited_counties[i - 1]])
+        traffic_time = traffic.path_time(route_ids, departure_time)
+        free_flow_time = traffic.route_graph.path_time(route_ids)
+        if traffic_time is not None and free_flow_time is not None and traffic_time - free_flow_time >= 60:
+            st.caption(f"🚦 Leaving at {departure_time.strftime('%H:%M')}, typical traffic adds about "
+                       f"{format_drive_time(int(traffic_time - free_flow_time))} to this route.")
+
+        # Scheduled ferry crossings along the route, with exact waits
+        journey = plan_route_journey([c for i, c in enumerate(visited_counties)
+                                      if i == 0 or c != visited_counties[i - 1]], departure_time, traffic)
+        if journey and any(leg['mode'] == 'ferry' for leg in journey):
+            st.subheader("⛴️ Ferry Crossings")
+            for leg in journey:
+                if leg['mode'] == 'ferry':
+                    st.markdown(f"**{leg['route']}**: {leg['from_terminal']} ➡️ {leg['to_terminal']}, "
+                                f"sails {format_clock(leg['sailing'])} "
+                                f"(wait {format_drive_time(int(leg['wait']))}), "
+                                f"arrives {format_clock(leg['arrive'])}")
+            st.caption(f"Following the sailing schedule, leaving {start_county} at "
+                       f"{departure_time.strftime('%H:%M')} gets you to {end_county} by "
+                       f"{format_clock(journey[-1]['arrive'])}.")
+
         # Show highways used with actual drive times
         if detailed_segments:
             st.subheader("🛣️ Route Segments")
             
             # Create a nice table for the route
             for idx, segment in enumerate(detailed_segments, 1):
-                t = int(segment['time']) if segment['time'] is not None else 0
-                h = t // 3600
-                m = (t % 3600) // 60
-                s = t % 60
-                if h > 0:
-                    time_str = f"{h}h {m}m {s}s"
-                elif m > 0:
-                    time_str = f"{m}m {s}s"
-                else:
-                    time_str = f"{s}s"
+                time_str = format_drive_time(segment['time'])
                 
                 # Build from/to strings with cities
                 from_str = f"{segment['from_city']} ({segment['from_county']} Co.)" if segment['from_city'] else segment['from_county']
@@ -1124,6 +480,59 @@ elif BFS_path is not None:
                 with col3:
                     st.markdown(f"⏱️ *{time_str}*")
 
+        # Multi-day itinerary: overnight stops in route cities under the daily limit
+        if max_day_hours > 0 and detailed_segments:
+            days = plan_itinerary(detailed_segments, int(max_day_hours * 3600))
+            if len(days) > 1:
+                st.subheader("🏨 Daily Itinerary")
+                for day_number, day in enumerate(days, 1):
+                    col1, col2, col3 = st.columns([1, 5, 2])
+                    with col1:
+                        st.markdown(f"**Day {day_number}**")
+                    with col2:
+                        st.markdown(f"{day['from']} ➡️ {day['to']}" +
+                                    (" (overnight)" if day_number < len(days) else ""))
+                    with col3:
+                        st.markdown(f"⏱️ *{format_drive_time(day['time'])}*" +
+                                    (" ⚠️" if day['over_limit'] else ""))
+                if any(day['over_limit'] for day in days):
+                    st.caption(f"⚠️ Some days exceed {max_day_hours:g} hours: there is no route city to "
+                               "stop in along that stretch.")
+            else:
+                st.caption(f"🏨 This trip fits in one day of at most {max_day_hours:g} hours of driving.")
+
+        # Show alternative routes side by side (e.g. when a pass is closed)
+        if num_alternatives > 0 and not must_visit_counties:
+            st.subheader("🔀 Alternative Routes")
+            if start_city and end_city:
+                alternatives = alternative_routes(get_city_route_graph(), start_city, end_city, 
+                                                  k=num_alternatives + 1)
+            else:
+                alternatives = alternative_routes(get_route_graph(wa_graph), start_county, end_county, 
+                                                  k=num_alternatives + 1)
+            if len(alternatives) < 2:
+                st.write("No alternative routes found.")
+            for rank, alt in enumerate(alternatives, 1):
+                col1, col2, col3 = st.columns([1, 5, 2])
+                with col1:
+                    st.markdown(f"**#{rank}**" + (" (fastest)" if rank == 1 else ""))
+                with col2:
+                    st.markdown(" ➡️ ".join(alt['route']))
+                with col3:
+                    delta_str = f" (+{format_drive_time(alt['delta'])})" if alt['delta'] else ""
+                    st.markdown(f"⏱️ *{format_drive_time(alt['time'])}*{delta_str}")
+
+        # Pareto-optimal county routes: time vs road distance vs counties visited
+        if show_tradeoffs and not must_visit_counties:
+            st.subheader("⚖️ Trade-offs")
+            tradeoffs = pareto_routes(get_route_graph(wa_graph), start_county, end_county,
+                                      max_time_factor=tradeoff_factor)
+            if tradeoffs:
+                show_tradeoff_routes(tradeoffs)
+                st.caption("Distances are estimated from county centers.")
+            else:
+                st.write("No trade-off routes found.")
+
         # Show county details
         st.subheader("📍 County Details")
         for county in visited_counties:
@@ -1152,33 +561,84 @@ elif BFS_path is not None:
         if show_map:
             st.subheader("Route Map")
             try:
-                deck = show_interactive_map(wa_graph, county_coords, route=visited_counties, 
+                deck = show_interactive_map(wa_graph, map_coords, route=visited_counties, 
                                           show_edges=show_edges, show_labels=show_labels, 
                                           geojson=geojson, route_cities=route_fastest_cities)
                 if deck is not None:
-                    st.pydeck_chart(deck)
+                    with span("map.render"):
+                        st.pydeck_chart(deck)
                 else:
-                    fig = plot_map(wa_graph, county_coords, route=visited_counties, 
+                    fig = plot_map(wa_graph, map_coords, route=visited_counties, 
                                  show_edges=show_edges, show_labels=show_labels,
                                  geojson=geojson, route_cities=route_fastest_cities)
-                    st.pyplot(fig)
+                    with span("map.render"):
+                        st.pyplot(fig)
             except Exception as e:
                 st.error(f"Error drawing map: {e}")
 
 # Preview map without route
+# Group meeting point: where should several travellers meet?
+with st.expander("👥 Find a meeting point for a group"):
+    group_origins = st.multiselect("Where is everyone starting from?", sorted(city_coords), 
+                                   key="group_origins")
+    group_objective = st.radio("Choose the meeting city that", 
+                               ["minimizes the longest drive", "minimizes total driving"], 
+                               key="group_objective", horizontal=True)
+    if len(group_origins) >= 2:
+        objective = "max" if group_objective == "minimizes the longest drive" else "total"
+        meeting_points = find_meeting_points(group_origins, objective=objective, top=5)
+        for rank, point in enumerate(meeting_points, 1):
+            col1, col2, col3 = st.columns([3, 2, 2])
+            with col1:
+                st.markdown(f"**{rank}. {point['city']}** ({point['county']} Co.)")
+            with col2:
+                st.markdown(f"Longest drive: *{format_drive_time(point['max_time'])}*")
+            with col3:
+                st.markdown(f"Total driving: *{format_drive_time(point['total_time'])}*")
+    else:
+        st.caption("Pick at least two starting cities.")
+
+isochrone = None
+if show_isochrone and BFS_path is None and start_county:
+    # One-to-all times are cached per origin, so moving the slider is instant
+    origin = start_city or start_county
+    isochrone = reachable_within(origin, isochrone_hours * 3600, origin_is_city=bool(start_city))
+    isochrone['budget'] = isochrone_hours * 3600
+    st.subheader(f"🕒 Reachable within {format_drive_time(isochrone['budget'])} of {origin}")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Counties", len(isochrone['counties']))
+    with col2:
+        st.metric("Cities", len(isochrone['cities']))
+    with st.expander("Arrival times"):
+        for city, seconds in isochrone['cities'].items():
+            st.write(f"{city} ({city_to_county[city]} Co.): {format_drive_time(seconds)}")
+
 if show_map and BFS_path is None:
     st.subheader("Washington State Counties")
     try:
-        deck = show_interactive_map(wa_graph, county_coords, route=None, 
+        deck = show_interactive_map(wa_graph, map_coords, route=None, 
                                    show_edges=show_edges, show_labels=show_labels,
-                                   geojson=geojson)
+                                   geojson=geojson, isochrone=isochrone)
         if deck is not None:
-            st.pydeck_chart(deck)
+            # Clicking a county picks its border feature, which the polygon
+            # index maps straight back to the county
+            with span("map.render"):
+                map_event = st.pydeck_chart(deck, on_select="rerun", selection_mode="single-object", 
+                                            key="county_map")
+            picked = map_event.selection.indices.get("county-borders") if map_event else None
+            clicked_county = county_polygons.names[picked[0]] if picked else None
+            if clicked_county in map_coords:
+                lat, lon = map_coords[clicked_county]
+                county_cities = cities_by_county.get(clicked_county, [])
+                st.info(f"🗺️ **{clicked_county} County** (center {lat:.4f}, {lon:.4f})"
+                        + (f": {', '.join(county_cities)}" if county_cities else ""))
         else:
-            fig = plot_map(wa_graph, county_coords, route=None, 
+            fig = plot_map(wa_graph, map_coords, route=None, 
                          show_edges=show_edges, show_labels=show_labels,
-                         geojson=geojson)
-            st.pyplot(fig)
+                         geojson=geojson, isochrone=isochrone)
+            with span("map.render"):
+                st.pyplot(fig)
     except Exception as e:
         st.error(f"Error drawing map preview: {e}")
 
@@ -1192,4 +652,56 @@ st.sidebar.info("""
 4. View your route with highway information
 
 **Tip:** Download 'wa_counties.geojson' for county borders!
-""")
\ No newline at end of file
+""")
+
+# Performance panel: where this rerun's time went, with exports for monitoring
+st.sidebar.header("Performance")
+if st.sidebar.checkbox("Show stage timings", key="perf_panel"):
+    record_duration("rerun", time.perf_counter() - rerun_started)
+    rerun_spans = end_trace()
+    if rerun_spans:
+        for stage in summarize(rerun_spans):
+            calls = f" ({stage['calls']} calls)" if stage['calls'] > 1 else ""
+            st.sidebar.markdown(f"`{stage['name']}` {stage['total_ms']:.1f} ms{calls}")
+        jsonl = io.StringIO()
+        export_jsonl(jsonl, rerun_spans)
+        st.sidebar.download_button("Download spans (JSON lines)", jsonl.getvalue(), 
+                                   file_name="wa_trace.jsonl", mime="application/x-ndjson")
+    else:
+        st.sidebar.caption("Timings appear from the next interaction.")
+    st.sidebar.download_button("Download metrics (Prometheus)", prometheus_text(), 
+                               file_name="wa_metrics.prom", mime="text/plain")
+
+# Memory accounting: this session's state is sized on every rerun, and caches
+# over their budget (WA_MEMORY_BUDGETS) are trimmed every so often
+session_bytes = record_session(session_id, st.session_state.to_dict())
+maybe_enforce()
+
+st.sidebar.header("Memory")
+if st.sidebar.checkbox("Show memory usage", key="memory_panel"):
+    rss = process_rss()
+    if rss is not None:
+        st.sidebar.markdown(f"Process RSS: **{rss / 2**20:.1f} MB**")
+    if st.sidebar.button("Evict over-budget caches now"):
+        for name, before, after in enforce_budgets():
+            st.sidebar.caption(f"{name}: {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB")
+    for row in cache_report():
+        budget = f" / {row['budget_bytes'] / 2**20:.0f} MB" if row['budget_bytes'] is not None else ""
+        flag = " ⚠️" if row['over_budget'] else ""
+        st.sidebar.markdown(f"`{row['name']}` {row['bytes'] / 2**20:.2f} MB{budget}, "
+                            f"{row['entries']} entries{flag}")
+    sessions = session_report()
+    st.sidebar.markdown(f"Sessions: {len(sessions)}, state {sum(row['bytes'] for row in sessions) / 1024:.1f} KB "
+                        f"(this session {session_bytes / 1024:.1f} KB)")
+    if st.sidebar.button("Take tracemalloc snapshot"):
+        top = take_snapshot()
+        if not top:
+            st.sidebar.caption("tracemalloc started; take another snapshot to see allocations since now.")
+        for row in top:
+            growth = f", {row['growth'] / 1024:+.1f} KB" if row['growth'] is not None else ""
+            st.sidebar.markdown(f"`{os.path.basename(row['where'])}` {row['bytes'] / 1024:.1f} KB{growth}")
+    # Tracing every allocation slows all sessions; it also stops by itself
+    # a few minutes after the last snapshot
+    if tracemalloc_running() and st.sidebar.button("Stop tracemalloc"):
+        stop_tracemalloc()
+        st.sidebar.caption("tracemalloc stopped.")
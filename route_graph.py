@@ -0,0 +1,398 @@
+# route_graph.py
+# Compact integer-ID graph for the routing core. Names are interned to dense IDs
+# once, adjacency is stored as compressed sparse row (CSR) arrays with a parallel
+# weight array, and the searches run on integers only. Translate names <-> IDs at
+# the API boundary with id_of()/ids_of()/names_of().
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+from memory_accounting import drop_oldest, register_cache
+from wa_counties import get_drive_time, wa_county_graph
+
+
+class RouteGraph:
+    """Interned-ID graph with CSR adjacency.
+
+    Neighbors of node u are indices[indptr[u]:indptr[u+1]] with matching
+    drive times (seconds) in weights. Neighbor order is preserved from the
+    source adjacency lists, so BFS breaks ties the same way the dict code does.
+
+    weights keeps the base drive times; closures and slowdowns applied with
+    update_edge_weights() live in neighbor_weights(), which the searches use.
+    """
+
+    def __init__(self, names, indptr, indices, weights):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.int32)
+
+        # Per-node Python lists for the search loops: indexing numpy scalars one
+        # at a time is slower than plain lists, and these are built only once
+        indptr_list = self.indptr.tolist()
+        indices_list = self.indices.tolist()
+        weights_list = self.weights.tolist()
+        self._neighbors = [indices_list[indptr_list[u]:indptr_list[u + 1]] for u in range(len(self.names))]
+        self._neighbor_weights = [weights_list[indptr_list[u]:indptr_list[u + 1]] for u in range(len(self.names))]
+
+        # Cached search trees keyed by source ID
+        self._bfs_parents = {}
+        self._dijkstra_trees = {}
+
+    @classmethod
+    def from_adjacency(cls, graph, weight_fn=get_drive_time):
+        """Build from a dict of name -> list of neighbor names (e.g. wa_county_graph)."""
+        names = list(graph)
+        for neighbors in graph.values():
+            for neighbor in neighbors:
+                if neighbor not in graph and neighbor not in names:
+                    names.append(neighbor)
+        ids = {name: i for i, name in enumerate(names)}
+
+        indptr = [0]
+        indices = []
+        weights = []
+        for name in names:
+            for neighbor in graph.get(name, []):
+                indices.append(ids[neighbor])
+                weights.append(weight_fn(name, neighbor))
+            indptr.append(len(indices))
+        return cls(names, indptr, indices, weights)
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Build the county graph from a compiled wa_artifact (memory-mapped arrays)."""
+        return cls(artifact.county_names, artifact.graph_indptr,
+                   artifact.graph_indices, artifact.graph_weights)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    # --- name <-> ID translation (API boundary) ---
+
+    def id_of(self, name):
+        return self.ids[name]
+
+    def ids_of(self, names):
+        return [self.ids[name] for name in names]
+
+    def names_of(self, ids):
+        return [self.names[i] for i in ids]
+
+    def neighbors(self, u):
+        """Neighbor IDs of node u."""
+        return self._neighbors[u]
+
+    def neighbor_weights(self, u):
+        """Edge drive times (seconds) parallel to neighbors(u)."""
+        return self._neighbor_weights[u]
+
+    def edge_weight(self, u, v):
+        """Drive time (seconds) of edge u -> v, or None if they aren't adjacent."""
+        neighbors = self._neighbors[u]
+        for k in range(len(neighbors)):
+            if neighbors[k] == v:
+                return self._neighbor_weights[u][k]
+        return None
+
+    def base_edge_weight(self, u, v):
+        """Drive time of edge u -> v before any update_edge_weights(), or None."""
+        neighbors = self._neighbors[u]
+        if v not in neighbors:
+            return None
+        return int(self.weights[self.indptr[u] + neighbors.index(v)])
+
+    def path_time(self, path_ids):
+        """Sum of edge drive times along a path of IDs (None if an edge is missing)."""
+        total = 0
+        for k in range(len(path_ids) - 1):
+            w = self.edge_weight(path_ids[k], path_ids[k + 1])
+            if w is None:
+                return None
+            total += w
+        return total
+
+    # --- searches ---
+
+    def bfs_parents(self, source):
+        """Fewest-hops search tree from `source` (cached). parent[source] == source,
+        parent[v] == -1 for unreachable nodes.
+        """
+        parent = self._bfs_parents.get(source)
+        if parent is not None:
+            return parent
+
+        parent = [-1] * len(self.names)
+        parent[source] = source
+        queue = deque([source])
+        neighbors = self._neighbors
+        neighbor_weights = self._neighbor_weights
+        while queue:
+            u = queue.popleft()
+            for v, w in zip(neighbors[u], neighbor_weights[u]):
+                if parent[v] == -1 and w != float('inf'):
+                    parent[v] = u
+                    queue.append(v)
+        self._bfs_parents[source] = parent
+        return parent
+
+    def bfs_path(self, source, target):
+        """Fewest-hops path as a list of IDs, or None if target is unreachable."""
+        return self._walk_back(self.bfs_parents(source), source, target)
+
+    def dijkstra(self, source, cache=True):
+        """Shortest drive-time tree from `source` (cached unless cache=False).
+        Returns (dist, parent) lists; unreachable nodes have dist inf and parent -1.
+        """
+        tree = self._dijkstra_trees.get(source)
+        if tree is not None:
+            return tree
+
+        n = len(self.names)
+        dist = [float('inf')] * n
+        parent = [-1] * n
+        dist[source] = 0
+        parent[source] = source
+        heap = [(0, source)]
+        neighbors = self._neighbors
+        neighbor_weights = self._neighbor_weights
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, w in zip(neighbors[u], neighbor_weights[u]):
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        tree = (dist, parent)
+        if cache:
+            self._dijkstra_trees[source] = tree
+        return tree
+
+    def shortest_path(self, source, target):
+        """Fastest path as (list of IDs, seconds), or (None, None) if unreachable."""
+        dist, parent = self.dijkstra(source)
+        path = self._walk_back(parent, source, target)
+        if path is None:
+            return None, None
+        return path, dist[target]
+
+    def distance_rows(self, sources, cache=True):
+        """Fastest drive times from each source to every node, as a
+        (len(sources), n) float array with inf where unreachable.
+        Rows come from the cached Dijkstra trees; pass cache=False for one-off
+        bulk work that shouldn't keep every tree in memory.
+        """
+        rows = np.empty((len(sources), len(self.names)), dtype=np.float64)
+        for k, source in enumerate(sources):
+            rows[k] = self.dijkstra(source, cache=cache)[0]
+        return rows
+
+    def update_edge_weights(self, updates):
+        """Change edge drive times in place and repair the cached search trees.
+
+        updates: iterable of (u, v, seconds) for existing edges; inf closes the
+        edge. Only cached trees the change can affect are recomputed: a slower
+        edge matters to trees that use it, a faster one to trees it shortens.
+        Returns (changes, recomputed): the applied (u, v, old, new) tuples and
+        the sorted IDs of sources whose trees were recomputed.
+        """
+        changes = []
+        for u, v, seconds in updates:
+            k = self._neighbors[u].index(v)
+            old = self._neighbor_weights[u][k]
+            if seconds != old:
+                self._neighbor_weights[u][k] = seconds
+                changes.append((u, v, old, seconds))
+        if not changes:
+            return changes, []
+
+        stale_trees = [source for source, (dist, parent) in self._dijkstra_trees.items()
+                       if _tree_affected(dist, parent, changes)]
+        stale_bfs = [source for source, parent in self._bfs_parents.items()
+                     if _bfs_tree_affected(parent, changes)]
+        for source in stale_trees:
+            del self._dijkstra_trees[source]
+            self.dijkstra(source)
+        for source in stale_bfs:
+            del self._bfs_parents[source]
+            self.bfs_parents(source)
+        return changes, sorted(set(stale_trees) | set(stale_bfs))
+
+    def clear_caches(self):
+        self._bfs_parents.clear()
+        self._dijkstra_trees.clear()
+
+    def trim_caches(self, fraction):
+        """Drop about `fraction` of the cached search trees, oldest first."""
+        drop_oldest(self._bfs_parents, fraction)
+        drop_oldest(self._dijkstra_trees, fraction)
+
+    @staticmethod
+    def _walk_back(parent, source, target):
+        if parent[target] == -1:
+            return None
+        path = [target]
+        while target != source:
+            target = parent[target]
+            path.append(target)
+        path.reverse()
+        return path
+
+    @classmethod
+    def cities_from_artifact(cls, artifact):
+        """City-level graph: each city connects to the other cities in its county
+        and in adjacent counties, weighted by the city drive-time matrix.
+        """
+        city_county = artifact.city_county.tolist()
+        county_indptr = artifact.graph_indptr.tolist()
+        county_indices = artifact.graph_indices.tolist()
+        cities_in_county = [[] for _ in artifact.county_names]
+        for city, county in enumerate(city_county):
+            cities_in_county[county].append(city)
+
+        times = artifact.city_time_matrix
+        indptr = [0]
+        indices = []
+        weights = []
+        for city, county in enumerate(city_county):
+            row = times[city].tolist()
+            reachable_counties = [county] + county_indices[county_indptr[county]:county_indptr[county + 1]]
+            for other_county in reachable_counties:
+                for other in cities_in_county[other_county]:
+                    if other != city and row[other] >= 0:
+                        indices.append(other)
+                        weights.append(row[other])
+            indptr.append(len(indices))
+        return cls(artifact.city_names, indptr, indices, weights)
+
+
+def _tree_affected(dist, parent, changes):
+    """Whether (u, v, old, new) edge changes can alter a fastest-path tree."""
+    for u, v, old, new in changes:
+        if new > old and parent[v] == u:
+            return True
+        if new < old and dist[u] + new < dist[v]:
+            return True
+    return False
+
+
+def _bfs_depth(parent, node):
+    depth = 0
+    while parent[node] != node:
+        node = parent[node]
+        depth += 1
+    return depth
+
+
+def _bfs_tree_affected(parent, changes):
+    """Whether edge changes can alter a fewest-hops tree (only opening or
+    closing an edge matters).
+    """
+    inf = float('inf')
+    for u, v, old, new in changes:
+        if new == inf and parent[v] == u:
+            return True
+        if old == inf and new != inf and parent[u] != -1:
+            if parent[v] == -1 or _bfs_depth(parent, u) + 1 < _bfs_depth(parent, v):
+                return True
+    return False
+
+
+def row_affected(dist, changes):
+    """Whether edge changes can alter a row of fastest drive times from one
+    source (for caches that keep distances but not the tree). Conservative:
+    ties count as affected.
+    """
+    for u, v, old, new in changes:
+        if dist[u] == float('inf'):
+            continue
+        if new > old and dist[v] != float('inf') and dist[u] + old == dist[v]:
+            return True
+        if new < old and dist[u] + new < dist[v]:
+            return True
+    return False
+
+
+_route_graphs = {}
+
+
+def get_route_graph(graph):
+    """Return the RouteGraph for a dict adjacency graph, building it on first use.
+    Cached per graph object, so the dict must not be mutated afterwards.
+    wa_county_graph is loaded from the compiled artifact (so its IDs match the
+    time_matrix county IDs) and cached per data version instead, as it is
+    updated in place when the reference data is reloaded.
+    """
+    if graph is wa_county_graph:
+        return _artifact_graph("county")
+    entry = _route_graphs.get(id(graph))
+    if entry is None or entry[0] is not graph:
+        entry = (graph, RouteGraph.from_adjacency(graph))
+        _route_graphs[id(graph)] = entry
+    return entry[1]
+
+
+def get_city_route_graph():
+    """The city-level RouteGraph built from the compiled artifact (cached per data version)."""
+    return _artifact_graph("city")
+
+
+_artifact_graphs = {}
+
+
+def _artifact_graph(kind, artifact=None):
+    if artifact is None:
+        from wa_artifact import get_artifact
+        artifact = get_artifact()
+    key = (kind, artifact.data_version)
+    route_graph = _artifact_graphs.get(key)
+    if route_graph is None:
+        if kind == "county":
+            route_graph = RouteGraph.from_artifact(artifact)
+        else:
+            route_graph = RouteGraph.cities_from_artifact(artifact)
+        _artifact_graphs[key] = route_graph
+    return route_graph
+
+
+def install_artifact_graph(kind, artifact, route_graph):
+    """Use a prebuilt graph (e.g. memory-mapped from data_plane) as the
+    county or city graph of an artifact.
+    """
+    _artifact_graphs[(kind, artifact.data_version)] = route_graph
+
+
+def prepare_graphs(artifact):
+    """Build the county and city graphs for an artifact ahead of its data
+    version going live, so the switch doesn't pay for them on a request.
+    """
+    _artifact_graph("county", artifact)
+    _artifact_graph("city", artifact)
+
+
+def _trim_route_graphs(fraction):
+    # Graphs of older data versions go first (the newest county and city
+    # graphs stay), then cached search trees of the rest
+    drop_oldest(_artifact_graphs, fraction, keep=2)
+    for route_graph in list(_artifact_graphs.values()) + [entry[1] for entry in list(_route_graphs.values())]:
+        route_graph.trim_caches(fraction)
+
+
+register_cache("route_graphs", lambda: [_artifact_graphs, _route_graphs], evict=_trim_route_graphs,
+               budget_mb=128, description="Route graphs and their cached search trees")
+
+
+def forget_data_version(data_version):
+    """Drop graphs built for an old artifact data version."""
+    for key in [key for key in _artifact_graphs if key[1] == data_version]:
+        del _artifact_graphs[key]
@@ -0,0 +1,635 @@
+# route_maps.py
+# County border loading and map drawing for the app: a matplotlib figure
+# (plot_map) and an interactive pydeck map (show_interactive_map). Kept out of
+# the Streamlit script so map construction can be benchmarked on its own.
+
+import importlib
+import json
+import math
+import os
+
+import streamlit as st
+
+from county_polygons import feature_county, read_county_borders
+from route_planner import format_drive_time
+from tracing import traced
+from wa_counties import city_coords, county_coords
+
+
+# Heavy optional libraries (matplotlib, pandas, pydeck, geopandas) are imported on
+# first use instead of at module load, so a cold start only pays for what it draws.
+_optional_modules = {}
+
+
+def _optional_import(name):
+    """Import a module on first use; returns None if it is not installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except Exception:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+def _has_pydeck():
+    """Interactive map libraries available? If not we fall back to matplotlib."""
+    return _optional_import("pandas") is not None and _optional_import("pydeck") is not None
+
+
+def _has_geopandas():
+    """geopandas available for drawing county borders?"""
+    return _optional_import("geopandas") is not None
+
+
+def _pyplot():
+    """Import matplotlib.pyplot on first use."""
+    if "matplotlib.pyplot" not in _optional_modules:
+        matplotlib = importlib.import_module("matplotlib")
+        # Use a non-interactive backend suitable for headless servers (Streamlit hosting)
+        matplotlib.use("Agg")
+        _optional_modules["matplotlib.pyplot"] = importlib.import_module("matplotlib.pyplot")
+    return _optional_modules["matplotlib.pyplot"]
+
+
+def create_simple_county_borders():
+    """Create simplified rectangular county borders as a fallback."""
+    features = []
+    
+    # Create approximate rectangular boundaries for each county
+    for county, (lat, lon) in county_coords.items():
+        # Create a small box around each county center
+        size = 0.3  # degrees
+        features.append({
+            "type": "Feature",
+            "properties": {"name": county},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[
+                    [lon - size, lat - size],
+                    [lon + size, lat - size],
+                    [lon + size, lat + size],
+                    [lon - size, lat + size],
+                    [lon - size, lat - size]
+                ]]
+            }
+        })
+    
+    return {
+        "type": "FeatureCollection",
+        "features": features
+    }
+
+
+def download_county_borders():
+    """Download Washington state county borders from online source."""
+    
+    urls = [
+        "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json",
+        "https://raw.githubusercontent.com/deldersveld/topojson/master/countries/us-states/WA-53-washington-counties.json"
+    ]
+    
+    import requests
+
+    for url in urls:
+        try:
+            response = requests.get(url, timeout=10)
+            if response.status_code == 200:
+                data = response.json()
+                
+                # Filter for Washington state if needed
+                if 'features' in data:
+                    # Check if it's US-wide and filter for WA (FIPS code 53)
+                    wa_features = [f for f in data['features'] 
+                                 if f.get('properties', {}).get('STATE', '')[:2] == '53' or
+                                    f.get('id', '')[:2] == '53']
+                    if wa_features:
+                        data['features'] = wa_features
+                        return data
+                return data
+        except:
+            continue
+    
+    # If all downloads fail, return simplified borders
+    return create_simple_county_borders()
+
+
+@traced("geojson.load")
+def load_county_borders():
+    """Load Washington state county borders from a GeoJSON file or download if not available."""
+    geojson_path = os.path.join(os.path.dirname(__file__), 'wa_counties.geojson')
+    
+    # Try to load existing file (parsed once per file version, so the prepared
+    # point-in-polygon index is reused across reruns)
+    if os.path.exists(geojson_path):
+        try:
+            return read_county_borders(geojson_path)
+        except Exception as e:
+            st.warning(f"Failed to load existing county borders: {e}")
+    
+    # Try to download if file doesn't exist
+    try:
+        data = download_county_borders()
+        if data:
+            # Save for future use
+            try:
+                with open(geojson_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+            except:
+                pass  # Continue even if we can't save
+            return data
+    except Exception:
+        # Last resort: return simplified borders
+        return create_simple_county_borders()
+    
+    return create_simple_county_borders()
+
+
+def _isochrone_alpha(seconds, budget):
+    """Overlay opacity (0-255) for an arrival time: places reached sooner are darker."""
+    return int(200 - 150 * min(seconds / max(budget, 1), 1.0))
+
+
+@traced("map.plot_map")
+def plot_map(graph, coords, route=None, show_edges=True, show_labels=True, geojson=None, route_cities=None,
+             isochrone=None):
+    """Create a matplotlib figure plotting counties and adjacency lines.
+    route: ordered list of county names to highlight as the route (drawn in red).
+    route_cities: dictionary mapping counties to their selected cities.
+    isochrone: optional result of isochrones.reachable_within() plus a 'budget'
+    key (seconds); reachable counties and cities are shaded by arrival time.
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(14, 10))
+
+    # Draw county borders from GeoJSON if available
+    if geojson and _has_geopandas():
+        try:
+            gpd = _optional_import("geopandas")
+            gdf = gpd.GeoDataFrame.from_features(geojson['features'])
+            gdf.plot(ax=ax, facecolor='lightgray', edgecolor='black', linewidth=0.8, alpha=0.3, zorder=0)
+        except Exception as e:
+            st.warning(f"Could not plot county borders: {e}")
+    elif geojson:
+        # Fallback to matplotlib patches if geopandas not available
+        try:
+            from matplotlib.patches import Polygon as MplPolygon
+            for feature in geojson.get("features", []):
+                geom = feature.get("geometry", {})
+                coords_list = []
+                if geom.get("type") == "Polygon":
+                    coords_list = [geom.get("coordinates", [])]
+                elif geom.get("type") == "MultiPolygon":
+                    coords_list = geom.get("coordinates", [])
+
+                for poly in coords_list:
+                    if not poly:
+                        continue
+                    exterior = poly[0]
+                    xy = [(pt[0], pt[1]) for pt in exterior]
+                    patch = MplPolygon(xy, closed=True, facecolor='lightgray', 
+                                     edgecolor='black', linewidth=0.8, alpha=0.3, zorder=0)
+                    ax.add_patch(patch)
+        except Exception as e:
+            st.warning(f"Could not plot county borders with matplotlib: {e}")
+
+    # Isochrone overlay: shade reachable counties and mark reachable cities
+    if isochrone:
+        from matplotlib.patches import Polygon as MplPolygon
+        budget = isochrone['budget']
+        for feature in (geojson or {}).get("features", []):
+            county_name = feature_county(feature)
+            if county_name not in isochrone['counties']:
+                continue
+            geom = feature.get("geometry", {})
+            polys = []
+            if geom.get("type") == "Polygon":
+                polys = [geom.get("coordinates", [])]
+            elif geom.get("type") == "MultiPolygon":
+                polys = geom.get("coordinates", [])
+            alpha = _isochrone_alpha(isochrone['counties'][county_name], budget) / 255.0
+            for poly in polys:
+                if poly:
+                    ax.add_patch(MplPolygon([(pt[0], pt[1]) for pt in poly[0]], closed=True,
+                                            facecolor='dodgerblue', edgecolor='none', alpha=alpha, zorder=0.5))
+        reachable = [(city_coords[c][1], city_coords[c][0]) for c in isochrone['cities'] if c in city_coords]
+        if reachable:
+            ax.scatter([x for x, _ in reachable], [y for _, y in reachable], s=25, c='dodgerblue',
+                       edgecolors='white', linewidths=0.5, zorder=2.5)
+
+    # Draw adjacency edges (light blue)
+    edges_drawn = set()
+    for county, neighbors in graph.items():
+        if county not in coords:
+            continue
+        for neighbor in neighbors:
+            if neighbor not in coords:
+                continue
+            key = tuple(sorted((county, neighbor)))
+            if key in edges_drawn:
+                continue
+            edges_drawn.add(key)
+            if show_edges:
+                lat1, lon1 = coords[county]
+                lat2, lon2 = coords[neighbor]
+                ax.plot([lon1, lon2], [lat1, lat2], color='lightblue', linewidth=1.2, 
+                       alpha=0.6, zorder=1)
+
+    # Draw county center points
+    xs = []
+    ys = []
+    labels = []
+    for county, (lat, lon) in coords.items():
+        xs.append(lon)
+        ys.append(lat)
+        labels.append(county)
+
+    ax.scatter(xs, ys, s=60, c='navy', zorder=2, edgecolors='white', linewidths=1)
+
+    # County labels
+    if show_labels:
+        for label, x, y in zip(labels, xs, ys):
+            ax.text(x, y, label, fontsize=8, zorder=3, ha='center', va='center',
+                   weight='bold',
+                   bbox=dict(boxstyle='round,pad=0.4', facecolor='white', 
+                            edgecolor='gray', alpha=0.85, linewidth=0.5))
+
+    # If a route is provided, draw it with arrows showing direction
+    if route and route_cities:
+        from matplotlib.patches import FancyArrowPatch
+        
+        # Build list of city coordinates for the route
+        route_city_coords = []
+        for county in route:
+            if county in route_cities and route_cities[county]:
+                city = route_cities[county]
+                if city in city_coords:
+                    lat, lon = city_coords[city]
+                    route_city_coords.append((lat, lon, city, county))
+                elif county in coords:
+                    lat, lon = coords[county]
+                    route_city_coords.append((lat, lon, None, county))
+            elif county in coords:
+                lat, lon = coords[county]
+                route_city_coords.append((lat, lon, None, county))
+        
+        # Track which edges we've drawn to curve bidirectional ones
+        route_edges = {}
+        for i in range(len(route_city_coords) - 1):
+            edge = (i, i+1)
+            reverse_edge = (i+1, i)
+            
+            if reverse_edge in route_edges:
+                route_edges[edge] = 'curve'
+                route_edges[reverse_edge] = 'curve'
+            else:
+                route_edges[edge] = 'straight'
+        
+        # Draw route segments with arrows
+        for i in range(len(route_city_coords) - 1):
+            lat1, lon1, city1, county1 = route_city_coords[i]
+            lat2, lon2, city2, county2 = route_city_coords[i+1]
+            
+            edge = (i, i+1)
+            
+            # If this edge needs to curve (bidirectional)
+            if route_edges.get(edge) == 'curve':
+                dx = lon2 - lon1
+                dy = lat2 - lat1
+                length = math.sqrt(dx**2 + dy**2)
+                if length > 0:
+                    arrow = FancyArrowPatch(
+                        (lon1, lat1), (lon2, lat2),
+                        connectionstyle="arc3,rad=0.3",
+                        arrowstyle='->,head_width=0.4,head_length=0.8',
+                        color='red',
+                        linewidth=3,
+                        alpha=0.8,
+                        zorder=4
+                    )
+                    ax.add_patch(arrow)
+            else:
+                arrow = FancyArrowPatch(
+                    (lon1, lat1), (lon2, lat2),
+                    arrowstyle='->,head_width=0.4,head_length=0.8',
+                    color='red',
+                    linewidth=3,
+                    alpha=0.8,
+                    zorder=4
+                )
+                ax.add_patch(arrow)
+        
+        # Draw city markers on the route
+        if len(route_city_coords) >= 1:
+            lats = [c[0] for c in route_city_coords]
+            lons = [c[1] for c in route_city_coords]
+            ax.scatter(lons, lats, s=120, c='red', zorder=5, edgecolors='darkred', linewidths=2, marker='D')
+            
+            # Add city labels and route step numbers
+            for i, (lat, lon, city, county) in enumerate(route_city_coords):
+                # Step number
+                ax.text(lon, lat, str(i+1), fontsize=9, zorder=6, ha='center', va='center',
+                       color='white', weight='bold')
+                
+                # City name if available
+                if city:
+                    ax.text(lon, lat - 0.12, city, fontsize=7, zorder=6, ha='center', va='top',
+                           style='italic', color='darkred', weight='bold',
+                           bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.8))
+
+    ax.set_xlabel('Longitude')
+    ax.set_ylabel('Latitude')
+    ax.set_title('Washington State Counties and Highway Connections', fontsize=14, weight='bold')
+    ax.set_aspect('equal', adjustable='datalim')
+    ax.grid(True, linestyle=':', linewidth=0.5, alpha=0.5)
+    
+    # Add legend
+    if route:
+        from matplotlib.lines import Line2D
+        from matplotlib.patches import FancyArrowPatch
+        legend_elements = [
+            Line2D([0], [0], color='lightblue', lw=2, label='County Connections'),
+            FancyArrowPatch((0, 0), (0.1, 0.1), arrowstyle='->', color='red', lw=3, label='Your Route'),
+            Line2D([0], [0], marker='D', color='w', markerfacecolor='red', 
+                   markersize=10, label='Route Cities', linestyle='None')
+        ]
+        ax.legend(handles=legend_elements, loc='upper right')
+    
+    return fig
+
+
+@traced("map.interactive")
+def show_interactive_map(graph, coords, route=None, show_edges=True, show_labels=True, geojson=None, route_cities=None,
+                         isochrone=None):
+    """Use pydeck to show an interactive map with points, adjacency lines, and an optional route.
+    isochrone: as in plot_map, drawn as a shaded overlay.
+    """
+    if not _has_pydeck():
+        return None
+    pd = _optional_import("pandas")
+    pdk = _optional_import("pydeck")
+
+    layers = []
+
+    # Add county borders from GeoJSON
+    if geojson:
+        try:
+            geo_layer = pdk.Layer(
+                "GeoJsonLayer",
+                id="county-borders",
+                data=geojson,
+                stroked=True,
+                filled=True,
+                get_fill_color=[200, 200, 200, 50],
+                get_line_color=[80, 80, 80],
+                line_width_min_pixels=2,
+                pickable=True,
+            )
+            layers.append(geo_layer)
+            
+            # Add county name labels at centroids
+            if geojson.get('features'):
+                label_data = []
+                for feature in geojson['features']:
+                    county_name = feature_county(feature)
+                    
+                    # Get centroid from our coords if available
+                    if county_name in coords:
+                        lat, lon = coords[county_name]
+                        label_data.append({
+                            "name": county_name,
+                            "lat": lat,
+                            "lon": lon
+                        })
+                
+                if label_data:
+                    labels_df = pd.DataFrame(label_data)
+                    county_labels = pdk.Layer(
+                        "TextLayer",
+                        data=labels_df,
+                        get_position='[lon, lat]',
+                        get_text='name',
+                        get_size=13,
+                        get_color=[40, 40, 40, 200],
+                        get_alignment_baseline='center',
+                        get_background_color=[255, 255, 255, 180],
+                        background_padding=[4, 2, 4, 2],
+                        font_family='Arial, sans-serif',
+                        font_weight='bold',
+                        pickable=False,
+                    )
+                    layers.append(county_labels)
+        except Exception as e:
+            st.warning(f"Could not add GeoJSON layer: {e}")
+
+    # Isochrone overlay: reachable counties shaded by arrival time, reachable cities as dots
+    if isochrone:
+        budget = isochrone['budget']
+        shaded = []
+        for feature in (geojson or {}).get('features', []):
+            county_name = feature_county(feature)
+            if county_name in isochrone['counties']:
+                seconds = isochrone['counties'][county_name]
+                shaded.append({
+                    "type": "Feature",
+                    "geometry": feature.get("geometry"),
+                    "properties": {
+                        "name": county_name,
+                        "fill_color": [30, 144, 255, _isochrone_alpha(seconds, budget)],
+                    },
+                })
+        if shaded:
+            layers.append(pdk.Layer(
+                "GeoJsonLayer",
+                data={"type": "FeatureCollection", "features": shaded},
+                stroked=False,
+                filled=True,
+                get_fill_color="properties.fill_color",
+                pickable=False,
+            ))
+
+        reachable_cities = [
+            {"name": city, "lat": city_coords[city][0], "lon": city_coords[city][1],
+             "arrival": f"Arrive in {format_drive_time(seconds)}"}
+            for city, seconds in isochrone['cities'].items() if city in city_coords
+        ]
+        if reachable_cities:
+            layers.append(pdk.Layer(
+                "ScatterplotLayer",
+                data=pd.DataFrame(reachable_cities),
+                get_position='[lon, lat]',
+                get_fill_color=[30, 144, 255, 220],
+                get_radius=5000,
+                pickable=True,
+            ))
+
+    # Prepare county points dataframe
+    rows = []
+    for name, (lat, lon) in coords.items():
+        rows.append({"name": name, "lat": lat, "lon": lon})
+    points = pd.DataFrame(rows)
+
+    # Edges
+    edges = []
+    edges_seen = set()
+    for county, neighbors in graph.items():
+        if county not in coords:
+            continue
+        for neighbor in neighbors:
+            if neighbor not in coords:
+                continue
+            key = tuple(sorted((county, neighbor)))
+            if key in edges_seen:
+                continue
+            edges_seen.add(key)
+            lat1, lon1 = coords[county]
+            lat2, lon2 = coords[neighbor]
+            edges.append({"start": [lon1, lat1], "end": [lon2, lat2]})
+
+    # Line layer for adjacencies
+    if show_edges and edges:
+        line_layer = pdk.Layer(
+            "LineLayer",
+            data=edges,
+            get_source_position="start",
+            get_target_position="end",
+            get_width=2,
+            get_color=[100, 150, 200, 150],
+            pickable=False,
+        )
+        layers.append(line_layer)
+
+    # Scatter layer for county centers
+    scatter = pdk.Layer(
+        "ScatterplotLayer",
+        data=points,
+        get_position='[lon, lat]',
+        get_fill_color=[10, 30, 160],
+        get_radius=8000,
+        pickable=True,
+        auto_highlight=True,
+    )
+    layers.append(scatter)
+
+    # Always show county labels (not optional anymore for better UX)
+    text_layer = pdk.Layer(
+        "TextLayer",
+        data=points,
+        get_position='[lon, lat]',
+        get_text='name',
+        get_size=14,
+        get_color=[0, 0, 0],
+        get_alignment_baseline='bottom',
+        get_background_color=[255, 255, 255, 200],
+        background_padding=[3, 2, 3, 2],
+        font_weight='600',
+        pickable=False,
+    )
+    layers.append(text_layer)
+
+    # Route overlay with arrows and city markers
+    if route and len(route) >= 2 and route_cities:
+        # Build city coordinates for the route
+        route_city_data = []
+        for i, county in enumerate(route):
+            if county in route_cities and route_cities[county]:
+                city = route_cities[county]
+                if city in city_coords:
+                    lat, lon = city_coords[city]
+                    route_city_data.append({
+                        "lat": lat, "lon": lon, "city": city, 
+                        "county": county, "step": i+1
+                    })
+                elif county in coords:
+                    lat, lon = coords[county]
+                    route_city_data.append({
+                        "lat": lat, "lon": lon, "city": None, 
+                        "county": county, "step": i+1
+                    })
+            elif county in coords:
+                lat, lon = coords[county]
+                route_city_data.append({
+                    "lat": lat, "lon": lon, "city": None, 
+                    "county": county, "step": i+1
+                })
+        
+        # Build path segments
+        path_segments = []
+        for i in range(len(route_city_data) - 1):
+            current = route_city_data[i]
+            next_stop = route_city_data[i+1]
+            
+            path_segments.append({
+                "path": [[current["lon"], current["lat"]], [next_stop["lon"], next_stop["lat"]]],
+                "color": [240, 50, 50, 200]
+            })
+        
+        if path_segments:
+            path_layer = pdk.Layer(
+                "PathLayer",
+                data=path_segments,
+                get_path="path",
+                get_color="color",
+                width_scale=20,
+                width_min_pixels=4,
+                get_width=1,
+            )
+            layers.append(path_layer)
+        
+        # Add city markers (diamond shaped)
+        if route_city_data:
+            cities_df = pd.DataFrame(route_city_data)
+            
+            # Route city markers
+            city_scatter = pdk.Layer(
+                "ScatterplotLayer",
+                data=cities_df,
+                get_position='[lon, lat]',
+                get_fill_color=[240, 50, 50],
+                get_radius=12000,
+                pickable=True,
+                auto_highlight=True,
+            )
+            layers.append(city_scatter)
+            
+            # Step numbers
+            step_text = pdk.Layer(
+                "TextLayer",
+                data=cities_df,
+                get_position='[lon, lat]',
+                get_text='step',
+                get_size=16,
+                get_color=[255, 255, 255],
+                get_alignment_baseline='center',
+                font_weight='bold',
+                pickable=False,
+            )
+            layers.append(step_text)
+            
+            # City name labels
+            cities_with_names = cities_df[cities_df['city'].notna()]
+            if len(cities_with_names) > 0:
+                city_labels = pdk.Layer(
+                    "TextLayer",
+                    data=cities_with_names,
+                    get_position='[lon, lat]',
+                    get_text='city',
+                    get_size=12,
+                    get_color=[139, 0, 0],
+                    get_alignment_baseline='top',
+                    get_background_color=[255, 255, 255, 220],
+                    background_padding=[2, 1, 2, 1],
+                    font_weight='bold',
+                    font_style='italic',
+                    pickable=False,
+                )
+                layers.append(city_labels)
+
+    # View centered on Washington State
+    view_state = pdk.ViewState(latitude=47.3, longitude=-120.5, zoom=6.5)
+
+    tooltip_text = "{name}\n{city}\n{county}"
+    if isochrone:
+        tooltip_text += "\n{arrival}"
+    deck = pdk.Deck(layers=layers, initial_view_state=view_state, 
+                   tooltip={"text": tooltip_text})
+    return deck
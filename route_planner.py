@@ -0,0 +1,437 @@
+# route_planner.py
+# Route planning helpers behind the app: county paths, must-visit ordering,
+# fastest pass-through cities, detours and highway summaries. They live outside
+# the Streamlit script (which runs top to bottom on import) so they can be
+# imported and benchmarked on their own; see benchmarks/hot_paths.py.
+
+import math
+import time
+
+import numpy as np
+
+from detours import DetourService
+from route_graph import get_route_graph
+from spatial_index import resolve_county
+from time_matrix import county_drive_time, route_cost
+from tracing import traced
+from wa_counties import city_coords, county_coords
+
+
+@traced("routing.bfs_path")
+def bfs_path(graph, start, goal):
+    """Find shortest path using BFS."""
+    # Runs on the interned-ID graph; names are only translated at this boundary
+    route_graph = get_route_graph(graph)
+    if start not in route_graph or goal not in route_graph:
+        return None
+    path = route_graph.bfs_path(route_graph.id_of(start), route_graph.id_of(goal))
+    return route_graph.names_of(path) if path is not None else None
+
+
+def find_fastest_city_for_route(county, prev_county, next_county, prev_city, next_city, cities_by_county):
+    """
+    Find the fastest city to go through in a county based on the specific route.
+    Takes into account the actual cities in adjacent counties for precise calculation.
+    """
+    if county not in cities_by_county:
+        return None
+    
+    cities = cities_by_county[county]
+    if not cities:
+        return None
+    
+    # If only one city, return it
+    if len(cities) == 1:
+        return cities[0]
+    
+    best_city = None
+    best_time = float('inf')
+    
+    # For each candidate city, calculate the actual detour/path time
+    for city in cities:
+        if city not in city_coords:
+            continue
+        
+        city_lat, city_lon = city_coords[city]
+        total_distance = 0
+        
+        # Calculate distance from previous city/county
+        if prev_city and prev_city in city_coords:
+            prev_lat, prev_lon = city_coords[prev_city]
+            dist_from_prev = math.sqrt((city_lat - prev_lat)**2 + (city_lon - prev_lon)**2)
+            total_distance += dist_from_prev
+        elif prev_county and prev_county in county_coords:
+            prev_lat, prev_lon = county_coords[prev_county]
+            dist_from_prev = math.sqrt((city_lat - prev_lat)**2 + (city_lon - prev_lon)**2)
+            total_distance += dist_from_prev
+        
+        # Calculate distance to next city/county
+        if next_city and next_city in city_coords:
+            next_lat, next_lon = city_coords[next_city]
+            dist_to_next = math.sqrt((city_lat - next_lat)**2 + (city_lon - next_lon)**2)
+            total_distance += dist_to_next
+        elif next_county and next_county in county_coords:
+            next_lat, next_lon = county_coords[next_county]
+            dist_to_next = math.sqrt((city_lat - next_lat)**2 + (city_lon - next_lon)**2)
+            total_distance += dist_to_next
+        
+        if total_distance < best_time:
+            best_time = total_distance
+            best_city = city
+    
+    return best_city if best_city else cities[0]
+
+
+@traced("city_selection")
+def calculate_route_with_fastest_cities(route, route_cities, cities_by_county):
+    """
+    For each county in the route, determine the fastest city to go through.
+    Takes into account the specific cities selected for adjacent counties.
+    Returns a dictionary mapping county -> fastest city for this route.
+    """
+    fastest_cities = {}
+    
+    for i, county in enumerate(route):
+        # Get previous and next counties and their cities
+        prev_county = route[i-1] if i > 0 else None
+        next_county = route[i+1] if i < len(route) - 1 else None
+        
+        prev_city = route_cities.get(prev_county) if prev_county else None
+        next_city = route_cities.get(next_county) if next_county else None
+        
+        # If this county already has a selected city, use it
+        if county in route_cities and route_cities[county]:
+            fastest_cities[county] = route_cities[county]
+        else:
+            # Calculate the fastest city for this position in the route
+            fastest_city = find_fastest_city_for_route(
+                county, prev_county, next_county, prev_city, next_city, cities_by_county
+            )
+            if fastest_city:
+                fastest_cities[county] = fastest_city
+    
+    return fastest_cities
+    
+
+@traced("routing.ordered")
+def find_ordered_route(graph, start, end, must_visit):
+    """Route from start to end through the must-visit counties in the given
+    order, joining the BFS path of each leg. Returns the full path (list of
+    counties) or None if a leg has no path.
+    """
+    full_path = []
+    prev = start
+    for target in list(must_visit) + [end]:
+        subpath = bfs_path(graph, prev, target)
+        if subpath is None:
+            return None
+        full_path.extend(subpath if not full_path else subpath[1:])
+        prev = target
+    return full_path
+
+
+def _route_legs(route_graph, points):
+    """BFS path and drive time of the leg between every pair of route
+    points (IDs); None where a leg has no path.
+    """
+    leg_path = [[route_graph.bfs_path(a, b) for b in points] for a in points]
+    leg_time = [[route_graph.path_time(path) if path is not None else None for path in row]
+                for row in leg_path]
+    return leg_path, leg_time
+
+
+def _join_legs(route_graph, leg_path, order):
+    full_path = list(leg_path[order[0]][order[1]])
+    for a, b in zip(order[1:], order[2:]):
+        full_path.extend(leg_path[a][b][1:])
+    return route_graph.names_of(full_path)
+
+
+@traced("routing.optimal")
+def find_optimal_route(graph, start, end, must_visit):
+    """Find the most time-efficient route that visits all must-visit counties.
+    Uses a greedy nearest-neighbor approach with all permutations for small sets.
+    Start, end and must-visit stops are county names or (lat, lon) coordinates,
+    which are snapped to the nearest city's county.
+    Returns a full path (list of counties) or None if no path found.
+    """
+    from itertools import permutations
+
+    start, end = resolve_county(start), resolve_county(end)
+    must_visit = [resolve_county(stop) for stop in must_visit]
+
+    if not must_visit:
+        return bfs_path(graph, start, end)
+
+    route_graph = get_route_graph(graph)
+    if (start not in route_graph or end not in route_graph
+            or any(county not in route_graph for county in must_visit)):
+        return None
+
+    # Route points by local index: 0 = start, 1..k = must-visit, k+1 = end.
+    # Each leg's BFS path and drive time is computed once up front, so the
+    # search below only adds up integers.
+    points = route_graph.ids_of([start] + list(must_visit) + [end])
+    leg_path, leg_time = _route_legs(route_graph, points)
+    end_index = len(points) - 1
+
+    def join_legs(order):
+        return _join_legs(route_graph, leg_path, order)
+
+    # For small sets (≤7), try all permutations to find truly optimal route.
+    # All candidate orders are scored in one vectorized route_cost call over
+    # the leg-time matrix (unreachable legs cost inf).
+    if len(must_visit) <= 7:
+        leg_matrix = np.array([[t if t is not None else np.inf for t in row] for row in leg_time])
+        orders = np.array(list(permutations(range(1, end_index))), dtype=np.intp)
+        orders = np.hstack([np.zeros((len(orders), 1), dtype=np.intp), orders,
+                            np.full((len(orders), 1), end_index, dtype=np.intp)])
+        totals = route_cost(orders, leg_matrix)
+        best = int(np.argmin(totals))
+        if not np.isfinite(totals[best]):
+            return None
+        return join_legs(orders[best].tolist())
+
+    # For larger sets, use greedy nearest-neighbor approach (repeated
+    # must-visit counties only need visiting once)
+    remaining = []
+    for i in range(1, end_index):
+        if all(points[i] != points[j] for j in remaining):
+            remaining.append(i)
+    current = 0
+    order = [0]
+
+    while remaining:
+        best_next = None
+        best_time = float('inf')
+
+        for candidate in remaining:
+            path_time = leg_time[current][candidate]
+            if path_time is not None and path_time < best_time:
+                best_time = path_time
+                best_next = candidate
+
+        if best_next is None:
+            return None
+
+        order.append(best_next)
+        current = best_next
+        remaining.remove(best_next)
+
+    if leg_path[current][end_index] is None:
+        return None
+    order.append(end_index)
+    return join_legs(order)
+
+
+def iter_optimal_routes(graph, start, end, must_visit, heartbeat=0.05):
+    """Anytime find_optimal_route: a generator of successively better routes
+    through all must-visit counties, so a caller can show the best so far and
+    stop whenever its time budget runs out.
+
+    Yields dicts with 'route' (list of counties), 'time' (seconds of the best
+    order's legs), 'lower_bound' (no order is faster), 'optimal', 'improved'
+    (False for progress updates), 'explored' (search nodes so far) and
+    'elapsed' (seconds). The greedy nearest-neighbor route comes first, then
+    local-search improvements (moving one stop, reversing a stretch), then an
+    exact branch-and-bound search whose last yield has optimal=True. While no
+    better route turns up, a progress update is yielded every `heartbeat`
+    seconds. Yields nothing if no route exists.
+    """
+    started = time.perf_counter()
+    start, end = resolve_county(start), resolve_county(end)
+    must_visit = [resolve_county(stop) for stop in must_visit]
+    route_graph = get_route_graph(graph)
+    if (start not in route_graph or end not in route_graph
+            or any(county not in route_graph for county in must_visit)):
+        return
+    if not must_visit:
+        path = route_graph.bfs_path(route_graph.id_of(start), route_graph.id_of(end))
+        if path is not None:
+            seconds = route_graph.path_time(path)
+            yield {'route': route_graph.names_of(path), 'time': seconds, 'lower_bound': seconds,
+                   'optimal': True, 'improved': True, 'explored': 1,
+                   'elapsed': time.perf_counter() - started}
+        return
+
+    points = route_graph.ids_of([start] + list(must_visit) + [end])
+    leg_path, leg_time = _route_legs(route_graph, points)
+    cost = [[t if t is not None else math.inf for t in row] for row in leg_time]
+    end_index = len(points) - 1
+    # Repeated must-visit counties only need visiting once
+    stops = []
+    for i in range(1, end_index):
+        if all(points[i] != points[j] for j in stops):
+            stops.append(i)
+
+    # Every stop and the end is entered exactly once, over at least its
+    # cheapest incoming leg
+    min_in = {t: min(cost[s][t] for s in [0] + stops if s != t) for t in stops + [end_index]}
+    lower_bound = sum(min_in.values())
+    if math.isinf(lower_bound):
+        return
+
+    def order_time(order):
+        return sum(cost[a][b] for a, b in zip(order, order[1:]))
+
+    best = {'order': None, 'time': math.inf}
+    explored = 0
+    last_yield = started
+
+    def step(improved, optimal=False):
+        nonlocal last_yield
+        last_yield = time.perf_counter()
+        return {'route': _join_legs(route_graph, leg_path, best['order']), 'time': int(best['time']),
+                'lower_bound': int(best['time'] if optimal else lower_bound), 'optimal': optimal,
+                'improved': improved, 'explored': explored, 'elapsed': last_yield - started}
+
+    def offer(order):
+        seconds = order_time(order)
+        if seconds < best['time']:
+            best['order'], best['time'] = list(order), seconds
+            return True
+        return False
+
+    # Greedy nearest neighbor: a usable route right away
+    order, remaining = [0], list(stops)
+    while remaining:
+        nearest = min(remaining, key=lambda candidate: cost[order[-1]][candidate])
+        if math.isinf(cost[order[-1]][nearest]):
+            break
+        order.append(nearest)
+        remaining.remove(nearest)
+    if not remaining and offer(order + [end_index]):
+        yield step(True)
+
+    # Local search on the stop order: move one stop elsewhere or reverse a
+    # stretch, taking the first improvement until none is left
+    improving = best['order'] is not None
+    while improving:
+        improving = False
+        current = best['order']
+        inner = len(current) - 2
+        candidates = []
+        for i in range(1, inner + 1):
+            for j in range(1, inner + 1):
+                if i != j:
+                    moved = current[:i] + current[i + 1:]
+                    candidates.append(moved[:j] + [current[i]] + moved[j:])
+                if i < j:
+                    candidates.append(current[:i] + current[i:j + 1][::-1] + current[j + 1:])
+        for candidate in candidates:
+            explored += 1
+            if offer(candidate):
+                improving = True
+                yield step(True)
+                break
+
+    # Exact branch and bound, nearest stops first; a partial order is
+    # dropped once its time plus the cheapest way into every stop it still
+    # has to visit can't beat the best route
+    def search(order, seconds, remaining, bound):
+        nonlocal explored
+        explored += 1
+        if not remaining:
+            if offer(order + [end_index]):
+                yield step(True)
+            return
+        if explored % 256 == 0 and time.perf_counter() - last_yield >= heartbeat:
+            yield step(False) if best['order'] is not None else {
+                'route': None, 'time': None, 'lower_bound': int(lower_bound), 'optimal': False,
+                'improved': False, 'explored': explored, 'elapsed': time.perf_counter() - started}
+        here = order[-1]
+        for stop in sorted(remaining, key=lambda candidate: cost[here][candidate]):
+            leg = cost[here][stop]
+            child_bound = bound - min_in[stop] + leg
+            if child_bound >= best['time']:
+                continue
+            order.append(stop)
+            yield from search(order, seconds + leg, remaining - {stop}, child_bound)
+            order.pop()
+
+    yield from search([0], 0, frozenset(stops), lower_bound)
+    if best['order'] is not None:
+        yield step(False, optimal=True)
+
+
+@traced("routing.detour")
+def find_best_city_detour(graph, route, city_name):
+    """
+    Find the best place to insert a city visit into an existing route.
+    Returns the modified route, the detour time in seconds and the index of the
+    route stop the detour leaves from. See detours.DetourService to rank many cities.
+    """
+    detour = DetourService(get_route_graph(graph)).best_detour(route, city_name)
+    if detour is None:
+        return None, None, None
+    return detour['route'], detour['detour_time'], detour['insertion_index']
+
+
+def format_drive_time(seconds):
+    """Format seconds as e.g. '1h 5m 0s', '5m 0s' or '30s'."""
+    t = int(seconds) if seconds is not None else 0
+    h = t // 3600
+    m = (t % 3600) // 60
+    s = t % 60
+    if h > 0:
+        return f"{h}h {m}m {s}s"
+    elif m > 0:
+        return f"{m}m {s}s"
+    return f"{s}s"
+
+
+def format_clock(seconds):
+    """Format an absolute clock time (seconds from midnight of the trip's
+    first day) as e.g. '14:05' or '06:15 (+1 day)'.
+    """
+    day, t = divmod(int(seconds), 24 * 3600)
+    clock = f"{t // 3600:02d}:{(t % 3600) // 60:02d}"
+    if day:
+        clock += f" (+{day} day{'s' if day > 1 else ''})"
+    return clock
+
+
+@traced("highways")
+def get_route_highways(route, highway_data):
+    """Extract the highways used between consecutive counties in the route."""
+    highways_used = []
+    for i in range(len(route) - 1):
+        current = route[i]
+        next_county = route[i + 1]
+        
+        # Get drive time between counties
+        drive_time = county_drive_time(current, next_county)
+        
+        # Find highways that connect these counties
+        if current in highway_data:
+            found_highways = set()
+            for city, highways in highway_data[current]['connections'].items():
+                for highway, destinations in highways.items():
+                    for dest in destinations:
+                        if f"({next_county} Co.)" in dest or f"({next_county})" in dest:
+                            found_highways.add(highway)
+            
+            if found_highways:
+                highways_used.append({
+                    'from': current,
+                    'to': next_county,
+                    'highways': sorted(list(found_highways)),
+                    'time': drive_time
+                })
+            else:
+                # No direct highway found in data, just note the connection
+                highways_used.append({
+                    'from': current,
+                    'to': next_county,
+                    'highways': ['Direct connection'],
+                    'time': drive_time
+                })
+        else:
+            highways_used.append({
+                'from': current,
+                'to': next_county,
+                'highways': ['Route available'],
+                'time': drive_time
+            })
+    
+    return highways_used
@@ -0,0 +1,240 @@
+# spatial_index.py
+# Snap raw coordinates (e.g. a vehicle's GPS position) to the nearest known city
+# and county. Places are bucketed in a uniform grid over an equirectangular
+# projection (km), stored as CSR arrays: a query only looks at the few cells
+# around the point, so nearest-k and radius lookups stay well under a
+# millisecond with tens of thousands of indexed places.
+#
+# The projection is centered on the indexed points; within Washington its
+# distance error is well under 1%.
+
+import math
+
+import numpy as np
+
+import county_polygons
+import wa_counties
+from memory_accounting import register_cache
+
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LON_EQUATOR = 111.32
+
+
+class PlaceIndex:
+    """Uniform-grid index over named (lat, lon) points.
+
+    Points are projected to km around their mean latitude and bucketed into
+    square cells of cell_km; order holds point indices sorted by cell and
+    cell_start[c]:cell_start[c + 1] is the slice for cell c (row-major).
+    """
+
+    def __init__(self, names, coords, cell_km=None):
+        self.names = list(names)
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if len(self.names) != len(coords) or not len(coords):
+            raise ValueError("need one (lat, lon) per name and at least one point")
+        self.lat0 = float(coords[:, 0].mean())
+        self.kx = KM_PER_DEGREE_LON_EQUATOR * math.cos(math.radians(self.lat0))
+        self.ky = KM_PER_DEGREE_LAT
+        self.xy = np.column_stack([coords[:, 1] * self.kx, coords[:, 0] * self.ky])
+        self.origin = self.xy.min(axis=0)
+        extent = self.xy.max(axis=0) - self.origin
+
+        if cell_km is None:
+            # About four points per cell on average
+            cell_km = math.sqrt(max(extent[0] * extent[1], 1.0) * 4.0 / len(coords))
+        self.cell_km = max(float(cell_km), 0.1)
+        self.nx = int(extent[0] // self.cell_km) + 1
+        self.ny = int(extent[1] // self.cell_km) + 1
+
+        cells = self._cells_of(self.xy)
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+        # Python lists for the per-cell loops in queries
+        self._order = self.order.tolist()
+        self._cell_start = self.cell_start.tolist()
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _project(self, lat, lon):
+        return lon * self.kx, lat * self.ky
+
+    def _cells_of(self, xy):
+        ix = np.clip(((xy[:, 0] - self.origin[0]) // self.cell_km).astype(np.intp), 0, self.nx - 1)
+        iy = np.clip(((xy[:, 1] - self.origin[1]) // self.cell_km).astype(np.intp), 0, self.ny - 1)
+        return iy * self.nx + ix
+
+    def _gather(self, x0, x1, y0, y1):
+        """Point indices in the cell block [x0, x1] x [y0, y1] (clipped to the grid)."""
+        x0, x1 = max(x0, 0), min(x1, self.nx - 1)
+        y0, y1 = max(y0, 0), min(y1, self.ny - 1)
+        if x0 > x1 or y0 > y1:
+            return []
+        found = []
+        start, order = self._cell_start, self._order
+        for iy in range(y0, y1 + 1):
+            row = iy * self.nx
+            found.extend(order[start[row + x0]:start[row + x1 + 1]])
+        return found
+
+    def _ring(self, cx, cy, r):
+        """Point indices in the cells at Chebyshev distance exactly r from (cx, cy)."""
+        if r == 0:
+            return self._gather(cx, cx, cy, cy)
+        return (self._gather(cx - r, cx + r, cy - r, cy - r)
+                + self._gather(cx - r, cx + r, cy + r, cy + r)
+                + self._gather(cx - r, cx - r, cy - r + 1, cy + r - 1)
+                + self._gather(cx + r, cx + r, cy - r + 1, cy + r - 1))
+
+    def _unexplored_bound(self, x, y, cx, cy, r):
+        """Distance from (x, y) to the part of the grid outside the cell square
+        of radius r around (cx, cy), or None if the square covers the grid.
+        """
+        cell = self.cell_km
+        gx0, gy0 = self.origin
+        gx1, gy1 = gx0 + self.nx * cell, gy0 + self.ny * cell
+        sx0, sx1 = gx0 + max(cx - r, 0) * cell, gx0 + min(cx + r + 1, self.nx) * cell
+        sy0, sy1 = gy0 + max(cy - r, 0) * cell, gy0 + min(cy + r + 1, self.ny) * cell
+        # The rest of the grid is up to four strips around the square
+        strips = []
+        if sx0 > gx0:
+            strips.append((gx0, sx0, gy0, gy1))
+        if sx1 < gx1:
+            strips.append((sx1, gx1, gy0, gy1))
+        if sy0 > gy0:
+            strips.append((sx0, sx1, gy0, sy0))
+        if sy1 < gy1:
+            strips.append((sx0, sx1, sy1, gy1))
+        if not strips:
+            return None
+        return min(math.hypot(max(x0 - x, 0.0, x - x1), max(y0 - y, 0.0, y - y1))
+                   for x0, x1, y0, y1 in strips)
+
+    def _distances(self, x, y, ids):
+        return np.hypot(self.xy[ids, 0] - x, self.xy[ids, 1] - y)
+
+    def nearest(self, lat, lon, k=1):
+        """The k places nearest to (lat, lon), closest first, as (name, km) pairs."""
+        k = min(k, len(self.names))
+        if k < 1:
+            return []
+        x, y = self._project(lat, lon)
+        cx = min(max(int((x - self.origin[0]) // self.cell_km), 0), self.nx - 1)
+        cy = min(max(int((y - self.origin[1]) // self.cell_km), 0), self.ny - 1)
+
+        # Grow rings of cells around the query cell, keeping the k best so far,
+        # until nothing unexplored can be closer than the k-th best
+        best_ids = np.empty(0, dtype=np.intp)
+        best_d = np.empty(0, dtype=np.float64)
+        r = 0
+        while True:
+            new = self._ring(cx, cy, r)
+            if new:
+                new_ids = np.asarray(new, dtype=np.intp)
+                best_ids = np.concatenate([best_ids, new_ids])
+                best_d = np.concatenate([best_d, self._distances(x, y, new_ids)])
+                if len(best_ids) > k:
+                    keep = np.argpartition(best_d, k - 1)[:k]
+                    best_ids, best_d = best_ids[keep], best_d[keep]
+            bound = self._unexplored_bound(x, y, cx, cy, r)
+            if bound is None or (len(best_ids) >= k and best_d.max() <= bound):
+                break
+            r += 1
+        rank = np.argsort(best_d, kind="stable")
+        return [(self.names[i], float(dist)) for i, dist in zip(best_ids[rank].tolist(), best_d[rank])]
+
+    def nearest_of(self, lat, lon, names):
+        """The closest of `names` to (lat, lon) as a (name, km) pair, or None."""
+        ids = np.asarray([self._ids[name] for name in names if name in self._ids], dtype=np.intp)
+        if not len(ids):
+            return None
+        x, y = self._project(lat, lon)
+        d = self._distances(x, y, ids)
+        best = int(np.argmin(d))
+        return self.names[ids[best]], float(d[best])
+
+    def within(self, lat, lon, radius_km):
+        """All places within radius_km of (lat, lon), closest first, as (name, km) pairs."""
+        x, y = self._project(lat, lon)
+        x0 = int((x - radius_km - self.origin[0]) // self.cell_km)
+        x1 = int((x + radius_km - self.origin[0]) // self.cell_km)
+        y0 = int((y - radius_km - self.origin[1]) // self.cell_km)
+        y1 = int((y + radius_km - self.origin[1]) // self.cell_km)
+        if x1 < 0 or y1 < 0 or x0 >= self.nx or y0 >= self.ny:
+            return []
+        ids = np.asarray(self._gather(x0, x1, y0, y1), dtype=np.intp)
+        if not len(ids):
+            return []
+        d = self._distances(x, y, ids)
+        keep = np.flatnonzero(d <= radius_km)
+        keep = keep[np.argsort(d[keep], kind="stable")]
+        return [(self.names[i], float(dist)) for i, dist in zip(ids[keep].tolist(), d[keep])]
+
+
+_indexes = {}
+register_cache("place_index", lambda: [_indexes], description="Nearest-place spatial indexes")
+
+
+def _get_index(kind):
+    key = (kind, wa_counties.data_version)
+    index = _indexes.get(key)
+    if index is None:
+        coords = wa_counties.city_coords if kind == "city" else wa_counties.county_coords
+        names = list(coords)
+        index = PlaceIndex(names, [coords[name] for name in names])
+        for stale in [k for k in _indexes if k[1] != key[1]]:
+            del _indexes[stale]
+        _indexes[key] = index
+    return index
+
+
+def get_city_index():
+    """PlaceIndex over city_coords (cached per reference data version)."""
+    return _get_index("city")
+
+
+def get_county_index():
+    """PlaceIndex over the county_coords centroids (cached per reference data version)."""
+    return _get_index("county")
+
+
+def snap_to_place(lat, lon):
+    """Nearest city to (lat, lon) and its county, as a dict with 'city',
+    'county' and 'distance_km'. When county borders are installed (see
+    county_polygons) the county is the one containing the point and the city
+    the nearest one in that county.
+    """
+    index = get_city_index()
+    city, km = index.nearest(lat, lon, k=1)[0]
+    county = wa_counties.city_to_county.get(city)
+    inside = county_polygons.county_at(lat, lon)
+    if inside is not None and inside != county:
+        in_county = index.nearest_of(lat, lon, wa_counties.get_cities_by_county().get(inside, []))
+        if in_county is not None:
+            city, km = in_county
+            county = inside
+    return {'city': city, 'county': county, 'distance_km': km}
+
+
+def resolve_county(location):
+    """County for a county name or a (lat, lon) pair (see snap_to_place)."""
+    if isinstance(location, (tuple, list)):
+        return snap_to_place(*location)['county']
+    return location
+
+
+def parse_coordinates(text):
+    """Parse 'lat, lon' (decimal degrees) into a (lat, lon) tuple, or None."""
+    parts = text.replace(",", " ").split()
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
@@ -0,0 +1,149 @@
+# time_matrix.py
+# Dense symmetric drive-time matrices for counties and cities, loaded from the
+# compiled wa_artifact. Route totals (single routes or whole batches of candidate
+# routes) are evaluated with numpy fancy indexing instead of per-leg dict lookups.
+
+import numpy as np
+
+from memory_accounting import drop_oldest, register_cache
+from wa_counties import external_routing_enabled, get_city_drive_time, get_drive_time
+
+
+class TimeMatrix:
+    """Symmetric drive-time matrix (seconds) over interned names.
+    Entries of -1 mean no estimate is available for that pair.
+    """
+
+    def __init__(self, names, matrix):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def ids_of(self, names):
+        return [self.ids[name] for name in names]
+
+    def time(self, a, b):
+        """Drive time between IDs a and b in seconds, or None if unknown."""
+        seconds = int(self.matrix[a, b])
+        return seconds if seconds >= 0 else None
+
+    def leg_times(self, route_ids):
+        """Per-leg drive times for a route of IDs (array of length len(route) - 1)."""
+        route_ids = np.asarray(route_ids, dtype=np.intp)
+        return self.matrix[route_ids[:-1], route_ids[1:]]
+
+    def set_times(self, updates):
+        """Overwrite pair times in place: updates is an iterable of (a, b, seconds)
+        with seconds None for unknown; both directions are set. The memory-mapped
+        artifact matrix is copied on the first write.
+        """
+        if not self.matrix.flags.writeable:
+            self.matrix = np.array(self.matrix)
+        for a, b, seconds in updates:
+            value = -1 if seconds is None else seconds
+            self.matrix[a, b] = value
+            self.matrix[b, a] = value
+
+    def route_cost(self, route_ids):
+        """See route_cost()."""
+        return route_cost(route_ids, self.matrix)
+
+
+def route_cost(route_ids, matrix=None):
+    """Total drive time of a route, or of a batch of routes, by fancy indexing.
+
+    route_ids: 1-D sequence of IDs -> returns a scalar total.
+               2-D array (one route per row) -> returns an array of totals. Rows may
+               be padded at the end with -1; padded legs cost nothing.
+    matrix:    TimeMatrix or 2-D array; defaults to the county matrix. Use a float
+               matrix with inf entries to mark forbidden legs.
+    """
+    if matrix is None:
+        matrix = get_county_time_matrix()
+    if isinstance(matrix, TimeMatrix):
+        matrix = matrix.matrix
+
+    routes = np.asarray(route_ids, dtype=np.intp)
+    if routes.ndim == 1:
+        if len(routes) < 2:
+            return matrix.dtype.type(0)
+        return matrix[routes[:-1], routes[1:]].sum()
+
+    if routes.shape[1] < 2:
+        return np.zeros(routes.shape[0], dtype=matrix.dtype)
+    src = routes[:, :-1]
+    dst = routes[:, 1:]
+    legs = matrix[np.maximum(src, 0), np.maximum(dst, 0)]
+    padded = (src < 0) | (dst < 0)
+    if padded.any():
+        legs = np.where(padded, 0, legs)
+    return legs.sum(axis=1)
+
+
+_matrices = {}
+
+
+def _load_matrices(artifact=None):
+    """County and city TimeMatrix for an artifact (default: the current one),
+    cached per data version.
+    """
+    if artifact is None:
+        from wa_artifact import get_artifact
+        artifact = get_artifact()
+    matrices = _matrices.get(artifact.data_version)
+    if matrices is None:
+        matrices = {
+            "county": TimeMatrix(artifact.county_names, artifact.county_time_matrix),
+            "city": TimeMatrix(artifact.city_names, artifact.city_time_matrix),
+        }
+        _matrices[artifact.data_version] = matrices
+    return matrices
+
+
+register_cache("time_matrices", lambda: [_matrices],
+               evict=lambda fraction: drop_oldest(_matrices, fraction, keep=1),
+               description="County and city drive-time matrices per data version")
+
+
+def prepare_matrices(artifact):
+    """Load the matrices for an artifact ahead of its data version going live."""
+    _load_matrices(artifact)
+
+
+def forget_data_version(data_version):
+    """Drop matrices of an old artifact data version."""
+    _matrices.pop(data_version, None)
+
+
+def get_county_time_matrix():
+    """County x county matrix with get_drive_time's offline values (0 on the diagonal)."""
+    return _load_matrices()["county"]
+
+
+def get_city_time_matrix():
+    """City x city matrix with get_city_drive_time's offline values."""
+    return _load_matrices()["city"]
+
+
+def county_drive_time(county1, county2):
+    """get_drive_time() served from the matrix when no external routing API is configured."""
+    if not external_routing_enabled():
+        times = get_county_time_matrix()
+        if county1 in times and county2 in times:
+            return times.time(times.ids[county1], times.ids[county2])
+    return get_drive_time(county1, county2)
+
+
+def city_drive_time(city1, city2):
+    """get_city_drive_time() served from the matrix when no external routing API is configured."""
+    if not external_routing_enabled():
+        times = get_city_time_matrix()
+        if city1 in times and city2 in times:
+            return times.time(times.ids[city1], times.ids[city2])
+    return get_city_drive_time(city1, city2)
@@ -0,0 +1,227 @@
+# tracing.py
+# Lightweight stage timing. Code marks stages with `with span("routing"):` (or
+# the @traced decorator); when tracing is off a span is a shared no-op object,
+# so instrumented hot paths pay one flag check. Tracing is on process-wide with
+# WA_TRACE=1 / enable(), or for one Streamlit rerun at a time: begin_trace()
+# starts collecting the current thread's spans (each session's script runs in
+# its own thread) and end_trace() returns them for the performance panel. A
+# trace whose thread exits without end_trace() (an interrupted rerun, a closed
+# session) is dropped the next time any trace begins or ends.
+#
+# Finished spans also feed per-stage latency histograms and a ring buffer of
+# recent spans, exported as Prometheus text (prometheus_text) and JSON lines
+# (export_jsonl) for monitoring.
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get("WA_TRACE", "") not in ("", "0")
+_local = threading.local()
+_lock = threading.Lock()
+_recent = collections.deque(maxlen=2000)
+_stats = {}
+# Threads with an open trace by ident; with tracing off and no traces open,
+# spans skip even the thread-local lookup
+_open_traces = {}
+
+
+def enable(on=True):
+    """Turn process-wide tracing on or off."""
+    global _enabled
+    _enabled = on
+
+
+def is_enabled():
+    return _enabled
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start", "depth")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.depth = getattr(_local, "depth", 0)
+        _local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _local.depth = self.depth
+        _finish(self.name, duration, self.depth, self.attrs, exc_type)
+        return False
+
+
+def _finish(name, duration, depth, attrs, exc_type=None):
+    record = {
+        'name': name,
+        'ts': time.time() - duration,
+        'duration_ms': duration * 1000.0,
+        'depth': depth,
+        'thread': threading.current_thread().name,
+    }
+    if attrs:
+        record['attrs'] = attrs
+    if exc_type is not None:
+        record['error'] = exc_type.__name__
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.append(record)
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * len(BUCKETS)}
+        stats['count'] += 1
+        stats['sum'] += duration
+        stats['max'] = max(stats['max'], duration)
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                stats['buckets'][i] += 1
+                break
+        _recent.append(record)
+
+
+def record_duration(name, seconds, **attrs):
+    """Record a stage timed by the caller (e.g. a whole rerun) as a finished
+    span, if tracing is on for the process or the current thread.
+    """
+    if not _enabled and (not _open_traces or getattr(_local, "trace", None) is None):
+        return
+    _finish(name, seconds, 0, attrs)
+
+
+def span(name, **attrs):
+    """Context manager timing one stage; a no-op unless tracing is on for
+    the process or for the current thread's trace.
+    """
+    if not _enabled and (not _open_traces or getattr(_local, "trace", None) is None):
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def traced(name=None):
+    """Decorator running the function inside span(name or its qualified name)."""
+    def decorate(func):
+        stage = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled and (not _open_traces or getattr(_local, "trace", None) is None):
+                return func(*args, **kwargs)
+            with _Span(stage, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _forget_exited():
+    # A thread's spans live in its thread-local state and go with it; only
+    # its entry here would keep the fast path off
+    for ident, thread in list(_open_traces.items()):
+        if not thread.is_alive():
+            del _open_traces[ident]
+
+
+def begin_trace():
+    """Start collecting this thread's spans (e.g. for one app rerun)."""
+    with _lock:
+        _forget_exited()
+        _open_traces[threading.get_ident()] = threading.current_thread()
+    _local.trace = []
+    _local.depth = 0
+
+
+def end_trace():
+    """Stop collecting and return this thread's spans in finishing order."""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    with _lock:
+        _open_traces.pop(threading.get_ident(), None)
+        _forget_exited()
+    return trace or []
+
+
+def summarize(spans):
+    """Per-stage totals of a list of spans: dicts with 'name', 'calls' and
+    'total_ms', slowest first.
+    """
+    totals = {}
+    for record in spans:
+        entry = totals.setdefault(record['name'], {'name': record['name'], 'calls': 0, 'total_ms': 0.0})
+        entry['calls'] += 1
+        entry['total_ms'] += record['duration_ms']
+    return sorted(totals.values(), key=lambda entry: entry['total_ms'], reverse=True)
+
+
+def recent_spans():
+    """Copy of the most recent finished spans (all threads), oldest first."""
+    with _lock:
+        return list(_recent)
+
+
+def export_jsonl(target, spans=None):
+    """Write spans (default: recent_spans()) as JSON lines to a path
+    (appended) or an open text file. Returns the number written.
+    """
+    spans = recent_spans() if spans is None else spans
+    lines = "".join(json.dumps(record) + "\n" for record in spans)
+    if hasattr(target, "write"):
+        target.write(lines)
+    else:
+        with open(target, "a", encoding="utf-8") as f:
+            f.write(lines)
+    return len(spans)
+
+
+def prometheus_text(prefix="wa_stage"):
+    """Per-stage duration histograms in the Prometheus text exposition format."""
+    with _lock:
+        snapshot = {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in _stats.items()}
+    metric = f"{prefix}_duration_seconds"
+    lines = [f"# HELP {metric} Time spent in each planner stage.", f"# TYPE {metric} histogram"]
+    for name in sorted(snapshot):
+        stats = snapshot[name]
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        cumulative = 0
+        for bound, count in zip(BUCKETS, stats['buckets']):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{stage="{label}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{stage="{label}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'{metric}_sum{{stage="{label}"}} {stats["sum"]:.6f}')
+        lines.append(f'{metric}_count{{stage="{label}"}} {stats["count"]}')
+    lines.append(f"# HELP {prefix}_duration_max_seconds Slowest call of each stage.")
+    lines.append(f"# TYPE {prefix}_duration_max_seconds gauge")
+    for name in sorted(snapshot):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'{prefix}_duration_max_seconds{{stage="{label}"}} {snapshot[name]["max"]:.6f}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Drop collected statistics and recent spans."""
+    with _lock:
+        _stats.clear()
+        _recent.clear()
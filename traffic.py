@@ -0,0 +1,178 @@
+# traffic.py
+# Time-of-day-aware routing. Congested edges carry an hourly speed profile
+# (fraction of free-flow speed for each hour, loaded from traffic_profiles.csv);
+# a time-dependent Dijkstra then routes for a given departure time, so the
+# Seattle corridor is slower at rush hour than at midnight.
+#
+# Profiles are stored as one compact float32 array of travel-time multipliers,
+# one row per profiled edge, with hour 0 repeated at the end so interpolating
+# across midnight needs no special case. Edges without a profile always run at
+# free-flow speed and skip the lookup entirely.
+
+import csv
+import datetime
+import heapq
+import os
+
+import numpy as np
+
+from route_graph import get_route_graph
+from tracing import traced
+from wa_counties import wa_county_graph
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traffic_profiles.csv")
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def seconds_of_day(departure):
+    """Seconds since midnight for a datetime/time, or pass seconds through."""
+    if isinstance(departure, (datetime.datetime, datetime.time)):
+        return departure.hour * 3600 + departure.minute * 60 + departure.second
+    return departure
+
+
+class TrafficProfiles:
+    """Hourly travel-time multipliers for edges of a RouteGraph.
+
+    multipliers[row, h] scales the free-flow drive time of the edge in `row`
+    when entered at hour h; column 24 repeats hour 0. Values in between hours
+    are interpolated linearly. edge_rows maps a CSR edge index
+    (indptr[u] + k for the k-th neighbor of u) to its row.
+    """
+
+    def __init__(self, route_graph, edge_rows, multipliers):
+        self.route_graph = route_graph
+        self.edge_rows = dict(edge_rows)
+        self.multipliers = np.asarray(multipliers, dtype=np.float32)
+        # Python lists for the search loop, as in RouteGraph
+        self._rows = self.multipliers.tolist()
+        indptr = route_graph.indptr.tolist()
+        self._profiled = [[self.edge_rows.get(indptr[u] + k) for k in range(len(route_graph.neighbors(u)))]
+                          for u in range(len(route_graph))]
+
+    @classmethod
+    def load(cls, route_graph, path=DEFAULT_PROFILE_PATH):
+        """Read a profile CSV: from_county, to_county, h00..h23 speed fractions.
+        Rows are directional; '#' lines are comments. Raises ValueError for
+        unknown or non-adjacent pairs and non-positive speeds.
+        """
+        indptr = route_graph.indptr.tolist()
+        edge_rows = {}
+        multipliers = []
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(line for line in f if not line.startswith("#"))
+            header = next(reader)
+            if len(header) != 26:
+                raise ValueError(f"{path}: expected from, to and 24 hourly columns")
+            for line_no, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                source, target = row[0].strip(), row[1].strip()
+                if source not in route_graph or target not in route_graph:
+                    raise ValueError(f"{path}:{line_no}: unknown county in {source} -> {target}")
+                u, v = route_graph.id_of(source), route_graph.id_of(target)
+                neighbors = route_graph.neighbors(u)
+                if v not in neighbors:
+                    raise ValueError(f"{path}:{line_no}: {source} and {target} are not adjacent")
+                speeds = [float(x) for x in row[2:26]]
+                if min(speeds) <= 0:
+                    raise ValueError(f"{path}:{line_no}: speeds must be positive")
+                edge_rows[indptr[u] + neighbors.index(v)] = len(multipliers)
+                multipliers.append([1.0 / s for s in speeds] + [1.0 / speeds[0]])
+        return cls(route_graph, edge_rows, np.asarray(multipliers, dtype=np.float32).reshape(-1, 25))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def multiplier(self, row, seconds):
+        """Interpolated travel-time multiplier of profile `row` at a time of day."""
+        hour, frac = divmod((seconds % SECONDS_PER_DAY) / 3600.0, 1.0)
+        values = self._rows[row]
+        h = int(hour)
+        return values[h] + (values[h + 1] - values[h]) * frac
+
+    def edge_time(self, u, k, depart_seconds):
+        """Drive time of the k-th edge out of u when entered at depart_seconds."""
+        w = self.route_graph.neighbor_weights(u)[k]
+        row = self._profiled[u][k]
+        return w if row is None else w * self.multiplier(row, depart_seconds)
+
+    @traced("traffic")
+    def path_time(self, path_ids, departure):
+        """Drive time along a path of adjacent IDs leaving at `departure`
+        (seconds since midnight or a datetime/time), or None if an edge is missing.
+        """
+        start = clock = seconds_of_day(departure)
+        for u, v in zip(path_ids[:-1], path_ids[1:]):
+            neighbors = self.route_graph.neighbors(u)
+            if v not in neighbors:
+                return None
+            clock += self.edge_time(u, neighbors.index(v), clock)
+        return clock - start
+
+    def earliest_arrival(self, source, departure):
+        """Time-dependent Dijkstra from `source` leaving at `departure`.
+        Returns (elapsed, parent) lists like RouteGraph.dijkstra, where elapsed is
+        the drive time in seconds from departure. Not cached: results depend on
+        the departure time. Assumes FIFO edges (leaving later never arrives
+        earlier), which holds for the hourly profiles' gentle slopes.
+        """
+        start = seconds_of_day(departure)
+        n = len(self.route_graph)
+        dist = [float('inf')] * n
+        parent = [-1] * n
+        dist[source] = 0
+        parent[source] = source
+        heap = [(0, source)]
+        neighbors = self.route_graph._neighbors
+        neighbor_weights = self.route_graph._neighbor_weights
+        profiled = self._profiled
+        multiplier = self.multiplier
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            rows = profiled[u]
+            for k, (v, w) in enumerate(zip(neighbors[u], neighbor_weights[u])):
+                row = rows[k]
+                nd = d + (w if row is None else w * multiplier(row, start + d))
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, parent
+
+    def shortest_path(self, source, target, departure):
+        """Fastest path leaving at `departure` as (list of IDs, seconds), or (None, None)."""
+        dist, parent = self.earliest_arrival(source, departure)
+        path = self.route_graph._walk_back(parent, source, target)
+        if path is None:
+            return None, None
+        return path, dist[target]
+
+
+_profiles = {}
+
+
+def get_traffic_profiles(path=DEFAULT_PROFILE_PATH):
+    """TrafficProfiles for the county graph, loaded once per file and data version."""
+    route_graph = get_route_graph(wa_county_graph)
+    profiles = _profiles.get(path)
+    # Reloaded when the reference data (and so the county graph) changes
+    if profiles is None or profiles.route_graph is not route_graph:
+        profiles = TrafficProfiles.load(route_graph, path)
+        _profiles[path] = profiles
+    return profiles
+
+
+def route_at(start, end, departure, path=DEFAULT_PROFILE_PATH):
+    """Fastest county route from start to end leaving at `departure`.
+    Returns (county names, seconds) or (None, None) if unreachable.
+    """
+    profiles = get_traffic_profiles(path)
+    route_graph = profiles.route_graph
+    route, seconds = profiles.shortest_path(route_graph.id_of(start), route_graph.id_of(end), departure)
+    if route is None:
+        return None, None
+    return route_graph.names_of(route), int(round(seconds))
@@ -0,0 +1,271 @@
+# wa_artifact.py
+# Compiles the reference tables (wa_counties.ReferenceData, loaded from wa_data/)
+# into a versioned binary artifact (one .npy file per array plus a JSON manifest).
+# Processes memory-map the arrays read-only, so loading is near-instant and
+# workers share the same pages.
+#
+# Build:  python wa_artifact.py build [--out DIR]
+# Info:   python wa_artifact.py info [--out DIR]
+#
+# Layout:
+#   wa_data.artifact/CURRENT            -> name of the current version directory
+#   wa_data.artifact/<data_version>/    -> manifest.json, *.npy, highway_connections.json
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+import wa_counties
+
+# Bump whenever the set of arrays or their meaning changes
+ARTIFACT_FORMAT_VERSION = 3
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wa_data.artifact")
+
+
+def compute_data_version(data=None):
+    """Artifact version (hex sha256) for a reference data snapshot (default: the
+    current one): its content hash combined with the artifact format.
+    """
+    data = data or wa_counties.current_data()
+    blob = f"{ARTIFACT_FORMAT_VERSION}:{data.data_version}".encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _compile_arrays(data):
+    """Intern names to integer IDs and build the numpy arrays stored in the artifact."""
+    county_names = sorted(set(data.wa_county_graph) | set(data.county_coords))
+    city_names = sorted(data.city_to_county)
+    county_ids = {name: i for i, name in enumerate(county_names)}
+
+    county_coords = np.full((len(county_names), 2), np.nan, dtype=np.float64)
+    for name, (lat, lon) in data.county_coords.items():
+        county_coords[county_ids[name]] = (lat, lon)
+
+    city_coords = np.full((len(city_names), 2), np.nan, dtype=np.float64)
+    city_county = np.empty(len(city_names), dtype=np.int32)
+    for i, city in enumerate(city_names):
+        if city in data.city_coords:
+            city_coords[i] = data.city_coords[city]
+        city_county[i] = county_ids[data.city_to_county[city]]
+
+    # Dense county-to-county matrix with get_drive_time's offline values (seconds).
+    # Times are symmetric: county_drive_times lists a few pairs in both orders
+    # (Grant/Okanogan with different values), the alphabetically first order wins.
+    n = len(county_names)
+    county_time_matrix = np.zeros((n, n), dtype=np.int32)
+    for i, a in enumerate(county_names):
+        for j in range(i + 1, n):
+            seconds = data.drive_time(a, county_names[j], use_apis=False)
+            county_time_matrix[i, j] = seconds
+            county_time_matrix[j, i] = seconds
+
+    # CSR adjacency weighted from the same matrix; neighbor order follows
+    # wa_county_graph so searches break ties exactly like the dict-based code does
+    indptr = [0]
+    indices = []
+    weights = []
+    for name in county_names:
+        for neighbor in data.wa_county_graph.get(name, []):
+            indices.append(county_ids[neighbor])
+            weights.append(int(county_time_matrix[county_ids[name], county_ids[neighbor]]))
+        indptr.append(len(indices))
+
+    # Dense city-to-city matrix with get_city_drive_time's offline values
+    # (seconds, -1 where no estimate is possible)
+    m = len(city_names)
+    city_time_matrix = np.zeros((m, m), dtype=np.int32)
+    for i, a in enumerate(city_names):
+        for j in range(i + 1, m):
+            seconds = data.city_drive_time(a, city_names[j], use_apis=False)
+            if seconds is None:
+                seconds = -1
+            city_time_matrix[i, j] = seconds
+            city_time_matrix[j, i] = seconds
+
+    arrays = {
+        "county_coords": county_coords,
+        "city_coords": city_coords,
+        "city_county": city_county,
+        "graph_indptr": np.asarray(indptr, dtype=np.int32),
+        "graph_indices": np.asarray(indices, dtype=np.int32),
+        "graph_weights": np.asarray(weights, dtype=np.int32),
+        "county_time_matrix": county_time_matrix,
+        "city_time_matrix": city_time_matrix,
+    }
+    return county_names, city_names, arrays
+
+
+def build_artifact(out_dir=None, data=None):
+    """Compile a reference data snapshot (default: the current one) into
+    `out_dir` and point CURRENT at it. Returns the path of the version
+    directory. Building an unchanged dataset is a no-op.
+    """
+    out_dir = out_dir or DEFAULT_ARTIFACT_DIR
+    data = data or wa_counties.current_data()
+    os.makedirs(out_dir, exist_ok=True)
+    data_version = compute_data_version(data)
+    version_dir = os.path.join(out_dir, data_version)
+
+    if not os.path.exists(os.path.join(version_dir, "manifest.json")):
+        county_names, city_names, arrays = _compile_arrays(data)
+        # Write into a scratch directory and rename it into place, so readers
+        # never observe a half-written version
+        tmp_dir = tempfile.mkdtemp(prefix=".build-", dir=out_dir)
+        try:
+            os.chmod(tmp_dir, 0o755)
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp_dir, name + ".npy"), np.ascontiguousarray(arr))
+            with open(os.path.join(tmp_dir, "highway_connections.json"), "w", encoding="utf-8") as f:
+                json.dump(data.wa_highway_connections, f)
+            manifest = {
+                "format_version": ARTIFACT_FORMAT_VERSION,
+                "data_version": data_version,
+                "county_names": county_names,
+                "city_names": city_names,
+                "arrays": {name: {"dtype": str(arr.dtype), "shape": list(arr.shape)}
+                           for name, arr in arrays.items()},
+            }
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            try:
+                os.rename(tmp_dir, version_dir)
+            except OSError:
+                # Another process published the same version first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    # Atomically repoint CURRENT
+    pointer_tmp = os.path.join(out_dir, f".CURRENT.{os.getpid()}")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(data_version)
+    os.replace(pointer_tmp, os.path.join(out_dir, "CURRENT"))
+    return version_dir
+
+
+class WaArtifact:
+    """Read-only view of a compiled artifact.
+
+    Counties and cities are identified by their index into county_names/city_names.
+    Arrays are memory-mapped (mode "r") unless loaded with mmap=False.
+    """
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.format_version = manifest["format_version"]
+        self.data_version = manifest["data_version"]
+        self.county_names = manifest["county_names"]
+        self.city_names = manifest["city_names"]
+        self.county_ids = {name: i for i, name in enumerate(self.county_names)}
+        self.city_ids = {name: i for i, name in enumerate(self.city_names)}
+        self.arrays = arrays
+
+        self.county_coords = arrays["county_coords"]
+        self.city_coords = arrays["city_coords"]
+        self.city_county = arrays["city_county"]
+        self.graph_indptr = arrays["graph_indptr"]
+        self.graph_indices = arrays["graph_indices"]
+        self.graph_weights = arrays["graph_weights"]
+        self.county_time_matrix = arrays["county_time_matrix"]
+        self.city_time_matrix = arrays["city_time_matrix"]
+        self._highway_connections = None
+
+    @property
+    def highway_connections(self):
+        """The wa_highway_connections table (display data, loaded on first access)."""
+        if self._highway_connections is None:
+            with open(os.path.join(self.path, "highway_connections.json"), encoding="utf-8") as f:
+                self._highway_connections = json.load(f)
+        return self._highway_connections
+
+    def __repr__(self):
+        return (f"WaArtifact(data_version={self.data_version[:12]}, "
+                f"counties={len(self.county_names)}, cities={len(self.city_names)})")
+
+
+def load_artifact(out_dir=None, version=None, mmap=True):
+    """Load a built artifact. Defaults to the version CURRENT points at.
+    Raises FileNotFoundError if nothing has been built, ValueError on a format mismatch.
+    """
+    out_dir = out_dir or DEFAULT_ARTIFACT_DIR
+    if version is None:
+        with open(os.path.join(out_dir, "CURRENT"), encoding="utf-8") as f:
+            version = f.read().strip()
+    path = os.path.join(out_dir, version)
+
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Artifact format {manifest.get('format_version')} in {path} does not match "
+                         f"{ARTIFACT_FORMAT_VERSION}; rebuild with `python wa_artifact.py build`")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+              for name in manifest["arrays"]}
+    return WaArtifact(path, manifest, arrays)
+
+
+_loaded_artifacts = {}
+
+
+def get_artifact(out_dir=None, data=None):
+    """Return the artifact for a reference data snapshot (default: the current
+    one), building it if it is missing. Cached per process and data version.
+    """
+    out_dir = out_dir or DEFAULT_ARTIFACT_DIR
+    data_version = compute_data_version(data)
+    cached = _loaded_artifacts.get((out_dir, data_version))
+    if cached is not None:
+        return cached
+
+    try:
+        artifact = load_artifact(out_dir, version=data_version)
+    except (OSError, ValueError):
+        build_artifact(out_dir, data)
+        artifact = load_artifact(out_dir, version=data_version)
+    _loaded_artifacts[(out_dir, data_version)] = artifact
+    return artifact
+
+
+def forget_data_version(data_version):
+    """Drop cached artifacts of an old data version."""
+    for key in [key for key in _loaded_artifacts if key[1] == data_version]:
+        del _loaded_artifacts[key]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect the compiled wa_counties data artifact.")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--out", default=DEFAULT_ARTIFACT_DIR, help="artifact directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        path = build_artifact(args.out)
+        print(f"Built {path}")
+        return 0
+
+    try:
+        artifact = load_artifact(args.out)
+    except FileNotFoundError:
+        print(f"No artifact in {args.out}; run `python wa_artifact.py build`")
+        return 1
+    current = compute_data_version()
+    print(artifact)
+    print(f"  path: {artifact.path}")
+    print(f"  up to date: {artifact.data_version == current}")
+    for name, arr in artifact.arrays.items():
+        print(f"  {name}: {arr.dtype} {arr.shape}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())